@@ -0,0 +1,24 @@
+"""track last raw event per reel and suppressed events per run"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("reels_latest_state", sa.Column("last_raw_event_at", sa.DateTime(timezone=True), nullable=True))
+    op.execute("UPDATE reels_latest_state SET last_raw_event_at = latest_scraped_at")
+    op.add_column(
+        "ingestion_runs",
+        sa.Column("events_suppressed", sa.Integer(), nullable=False, server_default="0"),
+    )
+
+
+def downgrade():
+    op.drop_column("ingestion_runs", "events_suppressed")
+    op.drop_column("reels_latest_state", "last_raw_event_at")
@@ -0,0 +1,32 @@
+"""add rebuild checkpoints and raw events reel_id/scraped_at index"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "rebuild_checkpoints",
+        sa.Column("job_name", sa.String(), primary_key=True, nullable=False),
+        sa.Column("last_reel_id", sa.String(), nullable=True),
+        sa.Column("touched_since", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("rows_rebuilt", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("started_at", sa.DateTime(timezone=True), nullable=False, server_default=sa.text("NOW()")),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False, server_default=sa.text("NOW()")),
+        sa.Column("finished_at", sa.DateTime(timezone=True), nullable=True),
+    )
+    # Serves DISTINCT ON (reel_id) ... ORDER BY reel_id, scraped_at DESC per key range.
+    op.create_index(
+        "ix_reels_raw_events_reel_id_scraped_at", "reels_raw_events", ["reel_id", sa.text("scraped_at DESC")]
+    )
+
+
+def downgrade():
+    op.drop_index("ix_reels_raw_events_reel_id_scraped_at", table_name="reels_raw_events")
+    op.drop_table("rebuild_checkpoints")
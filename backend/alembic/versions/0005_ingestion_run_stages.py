@@ -0,0 +1,26 @@
+"""add stage timings and item counters to ingestion runs"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+COUNTERS = ("items_received", "items_mapped", "items_dropped")
+STAGES = ("fetch_seconds", "map_seconds", "insert_raw_seconds", "upsert_latest_seconds")
+
+
+def upgrade():
+    for name in COUNTERS:
+        op.add_column("ingestion_runs", sa.Column(name, sa.Integer(), nullable=False, server_default="0"))
+    op.add_column("ingestion_runs", sa.Column("response_bytes", sa.BigInteger(), nullable=False, server_default="0"))
+    for name in STAGES:
+        op.add_column("ingestion_runs", sa.Column(name, sa.Float(), nullable=True))
+
+
+def downgrade():
+    for name in STAGES + ("response_bytes",) + COUNTERS:
+        op.drop_column("ingestion_runs", name)
@@ -0,0 +1,69 @@
+"""add reels_performance_mv materialized view"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+# Age is taken in exact integer microseconds, then divided like timedelta.total_seconds() / 3600.
+# count(*) OVER (ORDER BY v) counts the values <= v: the last position of v in the sorted column
+# plus one, which is the max-rank percentile metrics._percentile_rank uses.
+VIEW_SQL = """
+CREATE MATERIALIZED VIEW reels_performance_mv AS
+WITH cohort AS (
+    SELECT
+        s.*,
+        now() AS computed_at,
+        ((extract(epoch FROM now()) - extract(epoch FROM s.publish_time)) * 1000000)::bigint AS age_micros
+    FROM reels_latest_state s
+    WHERE s.publish_time >= now() - interval '7 days'
+), derived AS (
+    SELECT
+        c.*,
+        GREATEST(c.age_micros::float8 / 1000000 / 3600, 1::float8 / 60) AS hours_since_publish,
+        CASE
+            WHEN c.latest_views <> 0 THEN
+                (c.latest_likes::bigint + c.latest_comments + COALESCE(c.latest_shares_or_saves, 0))::float8
+                / c.latest_views
+            ELSE 0::float8
+        END AS engagement_rate
+    FROM cohort c
+), rates AS (
+    SELECT d.*, d.latest_views::float8 / d.hours_since_publish AS views_per_hour, count(*) OVER () AS n
+    FROM derived d
+)
+SELECT
+    reel_id,
+    platform,
+    reel_url,
+    publish_time,
+    latest_scraped_at,
+    latest_views AS views,
+    latest_likes AS likes,
+    latest_comments AS comments,
+    latest_shares_or_saves AS shares_or_saves,
+    hours_since_publish,
+    views_per_hour,
+    engagement_rate,
+    CASE WHEN n = 1 THEN 100::float8
+        ELSE (count(*) OVER (ORDER BY latest_views) - 1)::float8 / (n - 1) * 100 END AS views_percentile,
+    CASE WHEN n = 1 THEN 100::float8
+        ELSE (count(*) OVER (ORDER BY views_per_hour) - 1)::float8 / (n - 1) * 100 END AS views_per_hour_percentile,
+    CASE WHEN n = 1 THEN 100::float8
+        ELSE (count(*) OVER (ORDER BY engagement_rate) - 1)::float8 / (n - 1) * 100 END AS engagement_rate_percentile,
+    computed_at
+FROM rates
+"""
+
+
+def upgrade():
+    op.execute(VIEW_SQL)
+    # REFRESH ... CONCURRENTLY requires a unique index.
+    op.execute("CREATE UNIQUE INDEX ux_reels_performance_mv_reel_id ON reels_performance_mv (reel_id)")
+
+
+def downgrade():
+    op.execute("DROP MATERIALIZED VIEW IF EXISTS reels_performance_mv")
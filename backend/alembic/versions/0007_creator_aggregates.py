@@ -0,0 +1,45 @@
+"""add creator ids and per-creator view aggregates"""
+
+import importlib.util
+from pathlib import Path
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("reels_raw_events", sa.Column("creator_id", sa.String(), nullable=True))
+    op.add_column("reels_latest_state", sa.Column("creator_id", sa.String(), nullable=True))
+    # Serves a creator's reels by views; with a fixed baseline, outlier_score grows with views.
+    op.create_index(
+        "ix_reels_latest_state_creator_views",
+        "reels_latest_state",
+        ["creator_id", sa.text("latest_views DESC")],
+    )
+    op.create_table(
+        "creator_aggregates",
+        sa.Column("creator_id", sa.String(), primary_key=True, nullable=False),
+        sa.Column("platform", sa.String(), nullable=False),
+        sa.Column("video_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("total_views", sa.BigInteger(), nullable=False, server_default="0"),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False, server_default=sa.text("NOW()")),
+    )
+
+
+def downgrade():
+    spec = importlib.util.spec_from_file_location("performance_view_0006", Path(__file__).with_name("0006_performance_view.py"))
+    previous = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(previous)
+    op.drop_table("creator_aggregates")
+    op.drop_index("ix_reels_latest_state_creator_views", table_name="reels_latest_state")
+    # reels_performance_mv selects s.*, so it depends on creator_id; re-create it without the column.
+    op.execute("DROP MATERIALIZED VIEW IF EXISTS reels_performance_mv")
+    op.drop_column("reels_latest_state", "creator_id")
+    op.drop_column("reels_raw_events", "creator_id")
+    previous.upgrade()
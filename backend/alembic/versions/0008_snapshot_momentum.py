@@ -0,0 +1,95 @@
+"""cache previous snapshot counters on latest state and add momentum to reels_performance_mv"""
+
+import importlib.util
+from pathlib import Path
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "0008"
+down_revision = "0007"
+branch_labels = None
+depends_on = None
+
+# As in 0006, plus momentum: views gained per hour between the previous snapshot and the latest
+# one, where a reel with a single snapshot is measured from (0 views, publish_time).
+VIEW_SQL = """
+CREATE MATERIALIZED VIEW reels_performance_mv AS
+WITH cohort AS (
+    SELECT
+        s.*,
+        now() AS computed_at,
+        ((extract(epoch FROM now()) - extract(epoch FROM s.publish_time)) * 1000000)::bigint AS age_micros,
+        CASE WHEN s.prev_scraped_at IS NULL THEN 0 ELSE COALESCE(s.prev_views, 0) END AS base_views,
+        ((extract(epoch FROM s.latest_scraped_at) - extract(epoch FROM COALESCE(s.prev_scraped_at, s.publish_time)))
+            * 1000000)::bigint AS momentum_micros
+    FROM reels_latest_state s
+    WHERE s.publish_time >= now() - interval '7 days'
+), derived AS (
+    SELECT
+        c.*,
+        GREATEST(c.age_micros::float8 / 1000000 / 3600, 1::float8 / 60) AS hours_since_publish,
+        CASE
+            WHEN c.latest_views <> 0 THEN
+                (c.latest_likes::bigint + c.latest_comments + COALESCE(c.latest_shares_or_saves, 0))::float8
+                / c.latest_views
+            ELSE 0::float8
+        END AS engagement_rate,
+        GREATEST(c.latest_views - c.base_views, 0)::float8
+            / GREATEST(c.momentum_micros::float8 / 1000000 / 3600, 1::float8 / 60) AS momentum
+    FROM cohort c
+), rates AS (
+    SELECT d.*, d.latest_views::float8 / d.hours_since_publish AS views_per_hour, count(*) OVER () AS n
+    FROM derived d
+)
+SELECT
+    reel_id,
+    platform,
+    reel_url,
+    publish_time,
+    latest_scraped_at,
+    latest_views AS views,
+    latest_likes AS likes,
+    latest_comments AS comments,
+    latest_shares_or_saves AS shares_or_saves,
+    prev_views,
+    prev_scraped_at,
+    hours_since_publish,
+    views_per_hour,
+    engagement_rate,
+    CASE WHEN n = 1 THEN 100::float8
+        ELSE (count(*) OVER (ORDER BY latest_views) - 1)::float8 / (n - 1) * 100 END AS views_percentile,
+    CASE WHEN n = 1 THEN 100::float8
+        ELSE (count(*) OVER (ORDER BY views_per_hour) - 1)::float8 / (n - 1) * 100 END AS views_per_hour_percentile,
+    CASE WHEN n = 1 THEN 100::float8
+        ELSE (count(*) OVER (ORDER BY engagement_rate) - 1)::float8 / (n - 1) * 100 END AS engagement_rate_percentile,
+    momentum,
+    CASE WHEN n = 1 THEN 100::float8
+        ELSE (count(*) OVER (ORDER BY momentum) - 1)::float8 / (n - 1) * 100 END AS momentum_percentile,
+    computed_at
+FROM rates
+"""
+
+
+def _create_view(sql):
+    op.execute(sql)
+    op.execute("CREATE UNIQUE INDEX ux_reels_performance_mv_reel_id ON reels_performance_mv (reel_id)")
+
+
+def upgrade():
+    op.add_column("reels_latest_state", sa.Column("prev_views", sa.Integer(), nullable=True))
+    op.add_column("reels_latest_state", sa.Column("prev_scraped_at", sa.DateTime(timezone=True), nullable=True))
+    op.execute("DROP MATERIALIZED VIEW IF EXISTS reels_performance_mv")
+    _create_view(VIEW_SQL)
+
+
+def downgrade():
+    spec = importlib.util.spec_from_file_location("performance_view_0006", Path(__file__).with_name("0006_performance_view.py"))
+    previous = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(previous)
+    op.execute("DROP MATERIALIZED VIEW IF EXISTS reels_performance_mv")
+    # 0006 selects s.*, so the columns have to be gone before it is re-created.
+    op.drop_column("reels_latest_state", "prev_scraped_at")
+    op.drop_column("reels_latest_state", "prev_views")
+    _create_view(previous.VIEW_SQL)
@@ -0,0 +1,25 @@
+"""pre-aggregated sorted metric columns for the 7d/30d/90d cohorts"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "0009"
+down_revision = "0008"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "cohort_distributions",
+        sa.Column("window_days", sa.SmallInteger(), primary_key=True, nullable=False),
+        sa.Column("metric", sa.String(), primary_key=True, nullable=False),
+        sa.Column("reel_count", sa.Integer(), nullable=False),
+        sa.Column("sorted_values", sa.LargeBinary(), nullable=False),
+        sa.Column("computed_at", sa.DateTime(timezone=True), nullable=False),
+    )
+
+
+def downgrade():
+    op.drop_table("cohort_distributions")
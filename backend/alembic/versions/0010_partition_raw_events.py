@@ -0,0 +1,169 @@
+"""partition reels_raw_events by month of scraped_at, add daily rollups and the snapshot history view
+
+Downgrading copies the remaining raw events back into a plain table; days already rolled up
+are not expanded back into raw events.
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = "0010"
+down_revision = "0009"
+branch_labels = None
+depends_on = None
+
+COLUMNS = (
+    "id, reel_id, platform, reel_url, scraped_at, publish_time, views, likes, comments, shares_or_saves, "
+    "creator_id, caption_text, audio_id, audio_name, duration_seconds, apify_run_id, source_surface, created_at"
+)
+INDEXES = (
+    ("ix_reels_raw_events_reel_id_publish", ["reel_id", "publish_time"]),
+    ("ix_reels_raw_events_scraped_at", ["scraped_at"]),
+    ("ix_reels_raw_events_publish_time", ["publish_time"]),
+    ("ix_reels_raw_events_reel_id_scraped_at", ["reel_id", sa.text("scraped_at DESC")]),
+)
+
+# Creates the missing monthly (UTC) partitions covering [first_at, last_at]; returns how many.
+ENSURE_PARTITIONS_SQL = """
+CREATE OR REPLACE FUNCTION reels_raw_events_ensure_partitions(first_at timestamptz, last_at timestamptz)
+RETURNS integer LANGUAGE plpgsql AS $$
+DECLARE
+    month timestamp := date_trunc('month', first_at AT TIME ZONE 'UTC');
+    partition_name text;
+    created integer := 0;
+BEGIN
+    WHILE month <= last_at AT TIME ZONE 'UTC' LOOP
+        partition_name := 'reels_raw_events_p' || to_char(month, 'YYYY_MM');
+        IF to_regclass(partition_name) IS NULL THEN
+            EXECUTE format(
+                'CREATE TABLE %I PARTITION OF reels_raw_events FOR VALUES FROM (%L) TO (%L)',
+                partition_name, month AT TIME ZONE 'UTC', (month + interval '1 month') AT TIME ZONE 'UTC'
+            );
+            created := created + 1;
+        END IF;
+        month := month + interval '1 month';
+    END LOOP;
+    RETURN created;
+END
+$$
+"""
+
+# Raw events and rolled-up days as one snapshot stream; a day contributes its last snapshot.
+HISTORY_VIEW_SQL = """
+CREATE VIEW reels_snapshot_history AS
+SELECT
+    reel_id, platform, reel_url, scraped_at, publish_time, views, likes, comments, shares_or_saves,
+    creator_id, caption_text, audio_id, audio_name, duration_seconds, apify_run_id, source_surface,
+    created_at, 'raw' AS tier
+FROM reels_raw_events
+UNION ALL
+SELECT
+    reel_id, platform, reel_url, last_scraped_at, publish_time, last_views, last_likes, last_comments,
+    last_shares_or_saves, creator_id, caption_text, audio_id, audio_name, duration_seconds, apify_run_id,
+    source_surface, last_created_at, 'daily' AS tier
+FROM reels_daily_rollups
+"""
+
+
+def _raw_events_table(*constraints, **kwargs):
+    op.create_table(
+        "reels_raw_events",
+        sa.Column("id", postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column("reel_id", sa.String(), nullable=False),
+        sa.Column("platform", sa.String(), nullable=False, server_default="instagram"),
+        sa.Column("reel_url", sa.String(), nullable=False),
+        sa.Column("scraped_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("publish_time", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("views", sa.Integer(), nullable=False),
+        sa.Column("likes", sa.Integer(), nullable=False),
+        sa.Column("comments", sa.Integer(), nullable=False),
+        sa.Column("shares_or_saves", sa.Integer(), nullable=True),
+        sa.Column("creator_id", sa.String(), nullable=True),
+        sa.Column("caption_text", sa.Text(), nullable=True),
+        sa.Column("audio_id", sa.String(), nullable=True),
+        sa.Column("audio_name", sa.String(), nullable=True),
+        sa.Column("duration_seconds", sa.Float(), nullable=True),
+        sa.Column("apify_run_id", sa.String(), nullable=False),
+        sa.Column("source_surface", sa.String(), nullable=False, server_default="reels_feed"),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("NOW()"), nullable=False),
+        sa.UniqueConstraint("reel_id", "scraped_at", "apify_run_id", name="uq_reel_scrape_run"),
+        *constraints,
+        **kwargs,
+    )
+
+
+def _free_names(table):
+    # Constraint and index names are schema-wide, so the old table gives them up before the copy.
+    op.execute(f"ALTER TABLE {table} DROP CONSTRAINT reels_raw_events_pkey, DROP CONSTRAINT uq_reel_scrape_run")
+    for name, _ in INDEXES:
+        op.execute(f"DROP INDEX IF EXISTS {name}")
+
+
+def _create_indexes():
+    for name, columns in INDEXES:
+        op.create_index(name, "reels_raw_events", columns)
+
+
+def upgrade():
+    op.execute("ALTER TABLE reels_raw_events RENAME TO reels_raw_events_unpartitioned")
+    _free_names("reels_raw_events_unpartitioned")
+    # The partition key has to be part of every unique constraint, including the primary key.
+    _raw_events_table(
+        sa.PrimaryKeyConstraint("id", "scraped_at", name="reels_raw_events_pkey"),
+        postgresql_partition_by="RANGE (scraped_at)",
+    )
+    op.execute(ENSURE_PARTITIONS_SQL)
+    op.execute(
+        "SELECT reels_raw_events_ensure_partitions("
+        "COALESCE((SELECT min(scraped_at) FROM reels_raw_events_unpartitioned), now()), now() + interval '3 months')"
+    )
+    op.execute(f"INSERT INTO reels_raw_events ({COLUMNS}) SELECT {COLUMNS} FROM reels_raw_events_unpartitioned")
+    op.execute("DROP TABLE reels_raw_events_unpartitioned")
+    _create_indexes()
+
+    op.create_table(
+        "reels_daily_rollups",
+        sa.Column("reel_id", sa.String(), primary_key=True, nullable=False),
+        sa.Column("day", sa.Date(), primary_key=True, nullable=False),
+        sa.Column("snapshots", sa.Integer(), nullable=False),
+        sa.Column("first_scraped_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("last_scraped_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("last_views", sa.Integer(), nullable=False),
+        sa.Column("min_views", sa.Integer(), nullable=False),
+        sa.Column("max_views", sa.Integer(), nullable=False),
+        sa.Column("last_likes", sa.Integer(), nullable=False),
+        sa.Column("min_likes", sa.Integer(), nullable=False),
+        sa.Column("max_likes", sa.Integer(), nullable=False),
+        sa.Column("last_comments", sa.Integer(), nullable=False),
+        sa.Column("min_comments", sa.Integer(), nullable=False),
+        sa.Column("max_comments", sa.Integer(), nullable=False),
+        sa.Column("last_shares_or_saves", sa.Integer(), nullable=True),
+        sa.Column("min_shares_or_saves", sa.Integer(), nullable=True),
+        sa.Column("max_shares_or_saves", sa.Integer(), nullable=True),
+        sa.Column("platform", sa.String(), nullable=False),
+        sa.Column("reel_url", sa.String(), nullable=False),
+        sa.Column("publish_time", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("creator_id", sa.String(), nullable=True),
+        sa.Column("caption_text", sa.Text(), nullable=True),
+        sa.Column("audio_id", sa.String(), nullable=True),
+        sa.Column("audio_name", sa.String(), nullable=True),
+        sa.Column("duration_seconds", sa.Float(), nullable=True),
+        sa.Column("apify_run_id", sa.String(), nullable=False),
+        sa.Column("source_surface", sa.String(), nullable=False),
+        sa.Column("last_created_at", sa.DateTime(timezone=True), nullable=False),
+    )
+    op.execute(HISTORY_VIEW_SQL)
+
+
+def downgrade():
+    op.execute("DROP VIEW reels_snapshot_history")
+    op.drop_table("reels_daily_rollups")
+    op.execute("ALTER TABLE reels_raw_events RENAME TO reels_raw_events_partitioned")
+    _free_names("reels_raw_events_partitioned")
+    _raw_events_table(sa.PrimaryKeyConstraint("id", name="reels_raw_events_pkey"))
+    op.execute(f"INSERT INTO reels_raw_events ({COLUMNS}) SELECT {COLUMNS} FROM reels_raw_events_partitioned")
+    op.execute("DROP TABLE reels_raw_events_partitioned")
+    op.execute("DROP FUNCTION reels_raw_events_ensure_partitions(timestamptz, timestamptz)")
+    _create_indexes()
@@ -0,0 +1,50 @@
+"""single-row ingest_totals maintained by ingestion, seeded with exact counts"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "0011"
+down_revision = "0010"
+branch_labels = None
+depends_on = None
+
+SEED_SQL = """
+INSERT INTO ingest_totals (
+    id, total_raw_events, latest_state_count, last_scraped_at, last_apify_run_id, events_last_run,
+    reels_published_last_7d, published_counted_at, updated_at
+)
+SELECT
+    1,
+    (SELECT count(*) FROM reels_raw_events),
+    (SELECT count(*) FROM reels_latest_state),
+    last.scraped_at,
+    (SELECT apify_run_id FROM reels_raw_events WHERE scraped_at = last.scraped_at
+        GROUP BY apify_run_id ORDER BY count(*) DESC LIMIT 1),
+    (SELECT count(*) FROM reels_raw_events WHERE scraped_at = last.scraped_at),
+    (SELECT count(*) FROM reels_latest_state WHERE publish_time >= now() - interval '7 days'),
+    now(),
+    now()
+FROM (SELECT max(scraped_at) AS scraped_at FROM reels_raw_events) AS last
+"""
+
+
+def upgrade():
+    op.create_table(
+        "ingest_totals",
+        sa.Column("id", sa.SmallInteger(), primary_key=True, nullable=False),
+        sa.Column("total_raw_events", sa.BigInteger(), nullable=False, server_default="0"),
+        sa.Column("latest_state_count", sa.BigInteger(), nullable=False, server_default="0"),
+        sa.Column("last_scraped_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("last_apify_run_id", sa.String(), nullable=True),
+        sa.Column("events_last_run", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("reels_published_last_7d", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("published_counted_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.text("NOW()"), nullable=False),
+        sa.CheckConstraint("id = 1", name="ck_ingest_totals_single_row"),
+    )
+    op.execute(SEED_SQL)
+
+
+def downgrade():
+    op.drop_table("ingest_totals")
@@ -0,0 +1,18 @@
+"""add the retention stage timing to ingestion runs"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "0012"
+down_revision = "0011"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("ingestion_runs", sa.Column("retention_seconds", sa.Float(), nullable=True))
+
+
+def downgrade():
+    op.drop_column("ingestion_runs", "retention_seconds")
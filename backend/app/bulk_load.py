@@ -0,0 +1,306 @@
+"""Write paths for mapped ingestion events.
+
+`insert_events` writes each chunk of `chunk_size` events with multi-VALUES statements: the raw
+events, then the view deltas into creator_aggregates, then the reels_latest_state upsert. The
+raw events inserted and reels created are added to ingest_totals in the same transaction.
+
+`copy_events` COPYs the whole batch into a temporary staging table and does the same in
+`chunk_size` row ranges with set-based `INSERT ... SELECT ... ON CONFLICT`, free of bind
+parameters. It is the faster path for large runs and needs psycopg 3. Both return
+`(inserted, suppressed)` and add their time to the `insert_raw` and `upsert_latest` stages of an
+optional `IngestionStats`.
+
+With `heartbeat_hours`, both are change-aware: a snapshot is appended to reels_raw_events only
+when its counters differ from reels_latest_state or the reel's last raw event is at least
+`heartbeat_hours` old. reels_latest_state is updated either way, and a newer scrape moves the
+stored counters to prev_views/prev_scraped_at, the baseline for momentum.
+"""
+
+import logging
+from contextlib import nullcontext
+from datetime import timedelta
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy import case, func, literal_column, select, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from .creators import apply_creator_deltas, apply_staged_creator_deltas
+from .ingest_totals import add_counts
+from .models import ReelLatestState, ReelRawEvent
+
+logger = logging.getLogger(__name__)
+
+STAGE_TABLE = "reels_events_stage"
+
+# Column order shared by the staging table DDL and the COPY stream.
+STAGE_COLUMNS = (
+    "reel_id",
+    "platform",
+    "reel_url",
+    "scraped_at",
+    "publish_time",
+    "views",
+    "likes",
+    "comments",
+    "shares_or_saves",
+    "creator_id",
+    "caption_text",
+    "audio_id",
+    "audio_name",
+    "duration_seconds",
+    "apify_run_id",
+    "source_surface",
+)
+
+STAGE_DDL = f"""
+CREATE TEMPORARY TABLE IF NOT EXISTS {STAGE_TABLE} (
+    seq integer NOT NULL,
+    reel_id text NOT NULL,
+    platform text NOT NULL,
+    reel_url text NOT NULL,
+    scraped_at timestamptz NOT NULL,
+    publish_time timestamptz NOT NULL,
+    views integer NOT NULL,
+    likes integer NOT NULL,
+    comments integer NOT NULL,
+    shares_or_saves integer,
+    creator_id text,
+    caption_text text,
+    audio_id text,
+    audio_name text,
+    duration_seconds double precision,
+    apify_run_id text NOT NULL,
+    source_surface text NOT NULL,
+    write_raw boolean NOT NULL DEFAULT true
+) ON COMMIT DROP
+"""
+
+MERGE_RAW_SQL = text(
+    f"""
+    INSERT INTO reels_raw_events (id, {", ".join(STAGE_COLUMNS)})
+    SELECT gen_random_uuid(), {", ".join(STAGE_COLUMNS)}
+    FROM {STAGE_TABLE}
+    WHERE seq >= :lo AND seq < :hi AND write_raw
+    ON CONFLICT ON CONSTRAINT uq_reel_scrape_run DO NOTHING
+    """
+)
+
+# DISTINCT ON keeps the last staged row per reel so one statement never updates a row twice.
+# RETURNING (xmax = 0) is true for the reels the statement inserted rather than updated.
+MERGE_LATEST_SQL = text(
+    f"""
+    INSERT INTO reels_latest_state (
+        reel_id, platform, reel_url, publish_time, latest_views, latest_likes, latest_comments,
+        latest_shares_or_saves, latest_scraped_at, creator_id, caption_text, audio_id, audio_name,
+        duration_seconds, last_raw_event_at, updated_at
+    )
+    SELECT DISTINCT ON (reel_id)
+        reel_id, platform, reel_url, publish_time, views, likes, comments,
+        shares_or_saves, scraped_at, creator_id, caption_text, audio_id, audio_name,
+        duration_seconds, CASE WHEN write_raw THEN scraped_at END, now()
+    FROM {STAGE_TABLE}
+    WHERE seq >= :lo AND seq < :hi
+    ORDER BY reel_id, seq DESC
+    ON CONFLICT (reel_id) DO UPDATE SET
+        platform = EXCLUDED.platform,
+        reel_url = EXCLUDED.reel_url,
+        publish_time = EXCLUDED.publish_time,
+        latest_views = EXCLUDED.latest_views,
+        latest_likes = EXCLUDED.latest_likes,
+        latest_comments = EXCLUDED.latest_comments,
+        latest_shares_or_saves = EXCLUDED.latest_shares_or_saves,
+        latest_scraped_at = EXCLUDED.latest_scraped_at,
+        -- The stored snapshot becomes the previous one when a newer scrape replaces it.
+        prev_views = CASE WHEN EXCLUDED.latest_scraped_at > reels_latest_state.latest_scraped_at
+            THEN reels_latest_state.latest_views ELSE reels_latest_state.prev_views END,
+        prev_scraped_at = CASE WHEN EXCLUDED.latest_scraped_at > reels_latest_state.latest_scraped_at
+            THEN reels_latest_state.latest_scraped_at ELSE reels_latest_state.prev_scraped_at END,
+        creator_id = COALESCE(EXCLUDED.creator_id, reels_latest_state.creator_id),
+        caption_text = EXCLUDED.caption_text,
+        audio_id = EXCLUDED.audio_id,
+        audio_name = EXCLUDED.audio_name,
+        duration_seconds = EXCLUDED.duration_seconds,
+        last_raw_event_at = COALESCE(EXCLUDED.last_raw_event_at, reels_latest_state.last_raw_event_at),
+        updated_at = EXCLUDED.updated_at
+    RETURNING (xmax = 0)
+    """
+)
+
+# Flags the range's staged snapshots whose counters match the stored latest state within the
+# heartbeat. Run per range, after the earlier ranges merged, as insert_events checks each chunk.
+SUPPRESS_UNCHANGED_SQL = text(
+    f"""
+    UPDATE {STAGE_TABLE} AS s
+    SET write_raw = false
+    FROM reels_latest_state AS l
+    WHERE s.seq >= :lo AND s.seq < :hi
+      AND l.reel_id = s.reel_id
+      AND l.latest_views = s.views
+      AND l.latest_likes = s.likes
+      AND l.latest_comments = s.comments
+      AND l.latest_shares_or_saves IS NOT DISTINCT FROM s.shares_or_saves
+      AND l.last_raw_event_at > s.scraped_at - make_interval(hours => :heartbeat_hours)
+    """
+)
+
+
+def _chunks(rows: Sequence[Dict[str, object]], size: int) -> Iterator[Sequence[Dict[str, object]]]:
+    for start in range(0, len(rows), size):
+        yield rows[start : start + size]
+
+
+def _timed(stats, stage: str):
+    return stats.timed(stage) if stats is not None else nullcontext()
+
+
+def _latest_state_row(ev: Dict[str, object], write_raw: bool = True) -> Dict[str, object]:
+    return {
+        "reel_id": ev["reel_id"],
+        "platform": ev["platform"],
+        "reel_url": ev["reel_url"],
+        "publish_time": ev["publish_time"],
+        "latest_views": ev["views"],
+        "latest_likes": ev["likes"],
+        "latest_comments": ev["comments"],
+        "latest_shares_or_saves": ev["shares_or_saves"],
+        "latest_scraped_at": ev["scraped_at"],
+        "creator_id": ev.get("creator_id"),
+        "caption_text": ev.get("caption_text"),
+        "audio_id": ev.get("audio_id"),
+        "audio_name": ev.get("audio_name"),
+        "duration_seconds": ev.get("duration_seconds"),
+        # NULL keeps the stored value when the raw snapshot was suppressed.
+        "last_raw_event_at": ev["scraped_at"] if write_raw else None,
+    }
+
+
+def _unchanged(ev: Dict[str, object], latest, heartbeat: timedelta) -> bool:
+    return (
+        latest is not None
+        and latest.latest_views == ev["views"]
+        and latest.latest_likes == ev["likes"]
+        and latest.latest_comments == ev["comments"]
+        and latest.latest_shares_or_saves == ev["shares_or_saves"]
+        and latest.last_raw_event_at is not None
+        and latest.last_raw_event_at > ev["scraped_at"] - heartbeat
+    )
+
+
+def insert_events(
+    session: Session,
+    events: List[Dict[str, object]],
+    chunk_size: int,
+    heartbeat_hours: Optional[int] = None,
+    stats=None,
+) -> Tuple[int, int]:
+    """Insert raw events and upsert latest state with multi-VALUES statements of `chunk_size` rows."""
+    inserted = 0
+    suppressed = 0
+    created = 0
+    for chunk in _chunks(events, chunk_size):
+        write_flags = [True] * len(chunk)
+        with _timed(stats, "insert_raw"):
+            if heartbeat_hours is not None:
+                heartbeat = timedelta(hours=heartbeat_hours)
+                stored = session.execute(
+                    select(
+                        ReelLatestState.reel_id,
+                        ReelLatestState.latest_views,
+                        ReelLatestState.latest_likes,
+                        ReelLatestState.latest_comments,
+                        ReelLatestState.latest_shares_or_saves,
+                        ReelLatestState.last_raw_event_at,
+                    ).where(ReelLatestState.reel_id.in_({ev["reel_id"] for ev in chunk}))
+                )
+                latest_by_id = {row.reel_id: row for row in stored}
+                write_flags = [not _unchanged(ev, latest_by_id.get(ev["reel_id"]), heartbeat) for ev in chunk]
+                suppressed += write_flags.count(False)
+
+            raw_rows = [ev for ev, write_raw in zip(chunk, write_flags) if write_raw]
+            if raw_rows:
+                insert_stmt = insert(ReelRawEvent).values(raw_rows)
+                do_nothing_stmt = insert_stmt.on_conflict_do_nothing(constraint="uq_reel_scrape_run").returning(
+                    ReelRawEvent.id
+                )
+                inserted += len(session.execute(do_nothing_stmt).all())
+
+        # Last occurrence wins so one statement never updates the same reel twice.
+        latest_values = list(
+            {ev["reel_id"]: _latest_state_row(ev, write_raw) for ev, write_raw in zip(chunk, write_flags)}.values()
+        )
+        latest_insert = insert(ReelLatestState).values(latest_values)
+        newer_scrape = latest_insert.excluded.latest_scraped_at > ReelLatestState.latest_scraped_at
+        latest_upsert = latest_insert.on_conflict_do_update(
+            index_elements=[ReelLatestState.reel_id],
+            set_={
+                "platform": latest_insert.excluded.platform,
+                "reel_url": latest_insert.excluded.reel_url,
+                "publish_time": latest_insert.excluded.publish_time,
+                "latest_views": latest_insert.excluded.latest_views,
+                "latest_likes": latest_insert.excluded.latest_likes,
+                "latest_comments": latest_insert.excluded.latest_comments,
+                "latest_shares_or_saves": latest_insert.excluded.latest_shares_or_saves,
+                "latest_scraped_at": latest_insert.excluded.latest_scraped_at,
+                "prev_views": case(
+                    (newer_scrape, ReelLatestState.latest_views), else_=ReelLatestState.prev_views
+                ),
+                "prev_scraped_at": case(
+                    (newer_scrape, ReelLatestState.latest_scraped_at), else_=ReelLatestState.prev_scraped_at
+                ),
+                "creator_id": func.coalesce(latest_insert.excluded.creator_id, ReelLatestState.creator_id),
+                "caption_text": latest_insert.excluded.caption_text,
+                "audio_id": latest_insert.excluded.audio_id,
+                "audio_name": latest_insert.excluded.audio_name,
+                "duration_seconds": latest_insert.excluded.duration_seconds,
+                "last_raw_event_at": func.coalesce(
+                    latest_insert.excluded.last_raw_event_at, ReelLatestState.last_raw_event_at
+                ),
+            },
+        ).returning(literal_column("xmax = 0"))
+        with _timed(stats, "upsert_latest"):
+            apply_creator_deltas(session, latest_values)
+            created += sum(1 for (is_new,) in session.execute(latest_upsert) if is_new)
+    add_counts(session, raw_events=inserted, latest_states=created)
+    return inserted, suppressed
+
+
+def copy_events(
+    session: Session,
+    events: List[Dict[str, object]],
+    chunk_size: int,
+    heartbeat_hours: Optional[int] = None,
+    stats=None,
+) -> Tuple[int, int]:
+    """COPY events into a temporary staging table and merge them in `chunk_size` row ranges.
+
+    Requires the psycopg (v3) driver. The staging table is dropped when the transaction commits.
+    """
+    with _timed(stats, "insert_raw"):
+        session.execute(text(STAGE_DDL))
+        session.execute(text(f"TRUNCATE {STAGE_TABLE}"))
+
+        # The DBAPI connection shares the session's transaction, so the staged rows are visible to it.
+        dbapi_connection = session.connection().connection.driver_connection
+        copy_sql = f"COPY {STAGE_TABLE} (seq, {', '.join(STAGE_COLUMNS)}) FROM STDIN"
+        with dbapi_connection.cursor() as cursor:
+            with cursor.copy(copy_sql) as copy:
+                for seq, ev in enumerate(events):
+                    copy.write_row((seq, *(ev.get(column) for column in STAGE_COLUMNS)))
+
+    inserted = 0
+    suppressed = 0
+    created = 0
+    for lo in range(0, len(events), chunk_size):
+        bounds = {"lo": lo, "hi": lo + chunk_size}
+        with _timed(stats, "insert_raw"):
+            if heartbeat_hours is not None:
+                suppress = {**bounds, "heartbeat_hours": heartbeat_hours}
+                suppressed += session.execute(SUPPRESS_UNCHANGED_SQL, suppress).rowcount or 0
+            inserted += session.execute(MERGE_RAW_SQL, bounds).rowcount or 0
+        with _timed(stats, "upsert_latest"):
+            apply_staged_creator_deltas(session, **bounds)
+            created += sum(1 for (is_new,) in session.execute(MERGE_LATEST_SQL, bounds) if is_new)
+    add_counts(session, raw_events=inserted, latest_states=created)
+    logger.debug("Merged %s staged events in chunks of %s", len(events), chunk_size)
+    return inserted, suppressed
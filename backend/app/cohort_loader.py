@@ -0,0 +1,47 @@
+"""Load the latest-state columns the metrics need without hydrating ORM objects.
+
+Only COHORT_COLUMNS plus the creator totals (CREATOR_COLUMNS) are selected (no captions, audio
+names or identity-map bookkeeping), and rows are streamed from a server-side cursor in
+`cohort_batch_size` batches that go straight into CohortColumns.
+"""
+
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from .config import settings
+from .metrics_engine import COHORT_COLUMNS, CohortBuilder, CohortColumns
+from .models import CreatorAggregate, ReelLatestState
+
+
+def cohort_query(published_since: datetime):
+    return (
+        select(
+            *(getattr(ReelLatestState, column) for column in COHORT_COLUMNS),
+            ReelLatestState.creator_id,
+            CreatorAggregate.video_count,
+            CreatorAggregate.total_views,
+        )
+        .outerjoin(CreatorAggregate, CreatorAggregate.creator_id == ReelLatestState.creator_id)
+        .where(ReelLatestState.publish_time >= published_since)
+    )
+
+
+async def load_cohort(
+    session: AsyncSession, published_since: datetime, batch_size: Optional[int] = None
+) -> CohortColumns:
+    batch_size = batch_size or settings.cohort_batch_size
+    builder = CohortBuilder()
+    result = await session.stream(cohort_query(published_since).execution_options(yield_per=batch_size))
+    async for batch in result.partitions():
+        builder.add(batch)
+    return builder.build()
+
+
+def load_cohort_sync(session: Session, published_since: datetime, batch_size: Optional[int] = None) -> CohortColumns:
+    batch_size = batch_size or settings.cohort_batch_size
+    result = session.execute(cohort_query(published_since).execution_options(yield_per=batch_size))
+    return CohortColumns.from_batches(result.partitions())
@@ -0,0 +1,160 @@
+"""Pre-aggregated 7d/30d/90d cohorts for `GET /reels/performance?window=...`.
+
+For every window, cohort_distributions keeps each ranked metric's values over the window's
+reels, sorted ascending, as of `computed_at`. They are recomputed after each ingestion run and
+rebuild, so a request ranks a reel with one binary search per metric
+(`searchsorted(..., side="right") - 1` is the max rank the in-cohort ranking gives) instead of
+re-sorting up to 90 days of reels. Rows are evaluated at `computed_at`, so for an unchanged
+cohort they match `compute_performance` exactly. Distributions that missed their refresh (older
+than PERFORMANCE_PRECOMPUTED_MAX_AGE_SECONDS, by default two ingestion intervals) are not used:
+the window is then ranked per request.
+"""
+
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from .cohort_loader import load_cohort, load_cohort_sync
+from .config import settings
+from .db import SessionLocal
+from .metrics_engine import (
+    RANKED_METRICS,
+    CohortColumns,
+    PerformanceColumns,
+    _epoch_micros,
+    _round_like_python,
+    compute_performance,
+    derived_columns,
+)
+from .models import CohortDistribution
+from .snapshot_cache import precomputed_is_stale
+from .telemetry import observe_refresh_failure
+
+logger = logging.getLogger(__name__)
+
+# `window` query value -> days of publishes it covers.
+WINDOWS = {"7d": 7, "30d": 30, "90d": 90}
+_DTYPE = np.dtype("<f8")
+
+
+@dataclass
+class WindowDistributions:
+    """Sorted values of every ranked metric over one window's cohort."""
+
+    window_days: int
+    computed_at: datetime
+    sorted_values: Dict[str, np.ndarray]
+
+    def percentiles(self, metric: str, values: np.ndarray) -> np.ndarray:
+        """Max-rank percentiles of `values` within the window, rounded like the in-cohort ranking."""
+        ordered = self.sorted_values[metric]
+        n = ordered.size
+        if n <= 1:
+            return np.full(len(values), 100.0)
+        # Values below the whole distribution (reels that changed since the refresh) rank 0.
+        index = np.maximum(np.searchsorted(ordered, values, side="right") - 1, 0)
+        return _round_like_python(index / (n - 1) * 100, 2)
+
+    def percentile(self, metric: str, value: float) -> float:
+        """One reel's percentile: a single binary search (the builtin round matches _round_like_python)."""
+        ordered = self.sorted_values[metric]
+        if ordered.size <= 1:
+            return 100.0
+        index = max(int(np.searchsorted(ordered, value, side="right")) - 1, 0)
+        return round(index / (ordered.size - 1) * 100, 2)
+
+
+def window_distributions(cohort: CohortColumns, now: datetime) -> Dict[int, WindowDistributions]:
+    """Distributions for every window, from a cohort covering at least the widest one."""
+    columns = derived_columns(cohort, now)
+    distributions = {}
+    for days in WINDOWS.values():
+        in_window = cohort.publish_micros >= _epoch_micros(now - timedelta(days=days))
+        distributions[days] = WindowDistributions(
+            window_days=days,
+            computed_at=now,
+            sorted_values={
+                metric: np.sort(columns[metric][in_window].astype(np.float64)) for metric in RANKED_METRICS
+            },
+        )
+    return distributions
+
+
+def refresh_cohort_windows(session: Session, now: Optional[datetime] = None) -> None:
+    """Recompute cohort_distributions if PERFORMANCE_WINDOWS_REFRESH is on; failures are logged and counted."""
+    if not settings.performance_windows_refresh:
+        return
+    now = now or datetime.now(timezone.utc)
+    try:
+        cohort = load_cohort_sync(session, now - timedelta(days=max(WINDOWS.values())))
+        rows = [
+            {
+                "window_days": days,
+                "metric": metric,
+                "reel_count": int(values.size),
+                "sorted_values": values.astype(_DTYPE, copy=False).tobytes(),
+                "computed_at": now,
+            }
+            for days, distribution in window_distributions(cohort, now).items()
+            for metric, values in distribution.sorted_values.items()
+        ]
+        statement = insert(CohortDistribution)
+        session.execute(
+            statement.on_conflict_do_update(
+                index_elements=[CohortDistribution.window_days, CohortDistribution.metric],
+                set_={
+                    "reel_count": statement.excluded.reel_count,
+                    "sorted_values": statement.excluded.sorted_values,
+                    "computed_at": statement.excluded.computed_at,
+                },
+            ),
+            rows,
+        )
+        session.commit()
+        logger.info("Refreshed cohort distributions over %s reels", len(cohort))
+    except Exception:
+        session.rollback()
+        observe_refresh_failure("cohort_windows")
+        logger.exception("Refreshing cohort distributions failed")
+
+
+async def load_window_distributions(session: AsyncSession, days: int) -> Optional[WindowDistributions]:
+    rows = (await session.scalars(select(CohortDistribution).where(CohortDistribution.window_days == days))).all()
+    if {row.metric for row in rows} != set(RANKED_METRICS) or len({row.computed_at for row in rows}) != 1:
+        return None
+    return WindowDistributions(
+        window_days=days,
+        computed_at=rows[0].computed_at,
+        sorted_values={row.metric: np.frombuffer(row.sorted_values, dtype=_DTYPE) for row in rows},
+    )
+
+
+async def load_window_performance(session: AsyncSession, window: str) -> PerformanceColumns:
+    """The window's cohort ranked against its stored distributions, or within itself if they are missing or stale."""
+    days = WINDOWS[window]
+    distributions = await load_window_distributions(session, days)
+    if distributions is not None and precomputed_is_stale(f"{window} cohort distributions", distributions.computed_at):
+        distributions = None
+    if distributions is None:
+        now = datetime.now(timezone.utc)
+        return compute_performance(await load_cohort(session, now - timedelta(days=days)), now)
+    now = distributions.computed_at
+    cohort = await load_cohort(session, now - timedelta(days=days))
+    return compute_performance(cohort, now, distributions.percentiles)
+
+
+def main():
+    with SessionLocal() as session:
+        refresh_cohort_windows(session)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
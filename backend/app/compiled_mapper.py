@@ -0,0 +1,260 @@
+"""Schema-learning mapper for Instagram Apify items.
+
+`_map_apify_item` probes up to four publish-time keys and each `_parse_datetime` call may try
+four `strptime` formats before `fromisoformat`, which dominates mapping CPU on large runs.
+Within one actor run the payload shape is stable, so `learn_item_mapper` inspects the first
+items, works out which publish key and datetime layout the run uses, and returns a mapper whose
+fast path reads that key directly and parses it with `datetime.fromisoformat` (or
+`fromtimestamp`). The id, URL and counter keys are learned the same way, so the keys before
+the learned one in each fallback chain are checked once per item, with one `isdisjoint`,
+instead of read one by one. Items that do not fit the learned shape fall back to
+`_map_apify_item`, and the fast path is verified against the generic mapper on every sampled
+item before it is used.
+"""
+
+import logging
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from .sources import _map_apify_item, _parse_datetime
+
+logger = logging.getLogger(__name__)
+
+PUBLISH_KEYS = ("publishDate", "takenAt", "takenAtTimestamp", "timestamp")
+
+# The keys `_map_apify_item` reads each field from, in its order of preference.
+FIELD_KEYS = {
+    "reel_id": ("id", "itemId", "shortCode"),
+    "reel_url": ("url", "link"),
+    "views": ("playsCount", "playCount", "views"),
+    "likes": ("likesCount", "likeCount", "likes"),
+    "comments": ("commentsCount", "commentCount", "comments"),
+    "shares_or_saves": ("savesCount", "shareCount", "shares"),
+}
+
+# Sentinel returned by the fast path when an item does not match the learned shape.
+MISS = object()
+
+DatetimeLayout = Tuple[str, int, str]  # (kind, length, date/time separator)
+
+
+def _string_layout(value: str) -> Optional[DatetimeLayout]:
+    """Classify an ISO-like string whose date and time occupy exactly characters 0-18.
+
+    With that fixed layout `strptime` and `fromisoformat` read the same digits, so the kind
+    (what follows the seconds) decides which branch of `_parse_datetime` would match.
+    """
+    if len(value) < 19 or value[4] != "-" or value[7] != "-" or value[13] != ":" or value[16] != ":":
+        return None
+    sep = value[10]
+    if sep not in "T ":
+        return None
+    if len(value) == 19:
+        return ("naive", 19, sep)
+    tail = value[19]
+    if sep == "T" and value[-1] == "Z" and (len(value) == 20 or tail == "."):
+        return ("zulu", len(value), sep)
+    if tail in "+-":
+        return ("offset", len(value), sep)
+    return None
+
+
+def _learn_publish(sample: Sequence[Dict[str, object]]) -> Optional[Tuple[int, object]]:
+    """Return (publish key index, layout) shared by every sampled item, or None."""
+    learned = None
+    for item in sample:
+        for index, key in enumerate(PUBLISH_KEYS):
+            value = item.get(key)
+            if _parse_datetime(value) is not None:
+                break
+        else:
+            return None
+        if isinstance(value, bool):
+            return None
+        layout = "number" if isinstance(value, (int, float)) else _string_layout(value)
+        if layout is None or learned not in (None, (index, layout)):
+            return None
+        learned = (index, layout)
+    return learned
+
+
+def _learn_keys(sample: Sequence[Dict[str, object]]) -> Dict[str, int]:
+    """Index of the first present key of every FIELD_KEYS chain, where all sampled items agree.
+
+    `len(keys)` means no key of the chain was present; a field the items disagree on gets 0,
+    which keeps reading its whole chain.
+    """
+    learned: Dict[str, int] = {}
+    for field, keys in FIELD_KEYS.items():
+        indices = {next((i for i, key in enumerate(keys) if key in item), len(keys)) for item in sample}
+        learned[field] = indices.pop() if len(indices) == 1 else 0
+    return learned
+
+
+def _first_truthy(get, keys: Sequence[str]) -> object:
+    for key in keys:
+        value = get(key)
+        if value:
+            return value
+    return None
+
+
+def _publish_parser(layout) -> Callable[[object], object]:
+    utc = timezone.utc
+    fromisoformat = datetime.fromisoformat
+
+    if layout == "number":
+
+        def parse_number(value):
+            if value.__class__ is not int and value.__class__ is not float:
+                return MISS
+            return datetime.fromtimestamp(value, tz=utc)
+
+        return parse_number
+
+    kind, length, sep = layout
+
+    def parse_string(value):
+        if (
+            value.__class__ is not str
+            or len(value) != length
+            or value[10] != sep
+            or value[4] != "-"
+            or value[7] != "-"
+            or value[13] != ":"
+            or value[16] != ":"
+        ):
+            return MISS
+        if kind == "offset" and value[19] not in "+-":
+            return MISS
+        try:
+            parsed = fromisoformat(value)
+        except ValueError:
+            return MISS
+        if kind == "naive":
+            return parsed.replace(tzinfo=utc)
+        return parsed
+
+    return parse_string
+
+
+def _build_fast_mapper(publish_index: int, layout, key_indices: Dict[str, int]) -> Callable[..., object]:
+    publish_key = PUBLISH_KEYS[publish_index]
+    parse_publish = _publish_parser(layout)
+    # Every key a generic lookup would try before the learned ones; items carrying any of them miss.
+    absent = frozenset(PUBLISH_KEYS[:publish_index]).union(
+        *(FIELD_KEYS[field][:index] for field, index in key_indices.items())
+    )
+
+    def learned(field: str) -> Tuple[Optional[str], Tuple[str, ...]]:
+        """The learned key and the keys after it, read only when its value is falsy.
+
+        A chain with no key present learns None, which no JSON object has as a key.
+        """
+        keys, index = FIELD_KEYS[field], key_indices[field]
+        return (keys[index] if index < len(keys) else None), keys[index + 1 :]
+
+    id_key, id_rest = learned("reel_id")
+    url_key, url_rest = learned("reel_url")
+    views_key, views_rest = learned("views")
+    likes_key, likes_rest = learned("likes")
+    comments_key, comments_rest = learned("comments")
+    shares_key, shares_rest = learned("shares_or_saves")
+
+    def fast_map(item, scraped_at, apify_run_id, source_surface):
+        if not item.keys().isdisjoint(absent):
+            return MISS
+        get = item.get
+        reel_id = get(id_key) or _first_truthy(get, id_rest)
+        if not reel_id:
+            return None
+
+        reel_url = get(url_key) or _first_truthy(get, url_rest)
+        if not reel_url:
+            shortcode = get("shortCode") or get("code")
+            if not shortcode:
+                return None
+            reel_url = f"https://www.instagram.com/reel/{shortcode}/"
+
+        publish_time = parse_publish(get(publish_key))
+        if publish_time is MISS:
+            return MISS
+
+        shares = get(shares_key) or _first_truthy(get, shares_rest)
+        creator_id = get("ownerId") or get("ownerUsername")
+        return {
+            "reel_id": str(reel_id),
+            "platform": "instagram",
+            "reel_url": reel_url,
+            "scraped_at": scraped_at,
+            "publish_time": publish_time,
+            "views": int(get(views_key) or _first_truthy(get, views_rest) or 0),
+            "likes": int(get(likes_key) or _first_truthy(get, likes_rest) or 0),
+            "comments": int(get(comments_key) or _first_truthy(get, comments_rest) or 0),
+            "shares_or_saves": int(shares) if shares is not None else None,
+            "creator_id": str(creator_id) if creator_id else None,
+            "caption_text": get("caption") or get("title"),
+            "audio_id": get("musicId") or get("audioId"),
+            "audio_name": get("musicTitle") or get("audioName"),
+            "duration_seconds": get("duration") or get("videoDuration"),
+            "apify_run_id": apify_run_id,
+            "source_surface": source_surface,
+        }
+
+    return fast_map
+
+
+class CompiledItemMapper:
+    """Maps items with a learned fast path, falling back to `_map_apify_item` per item."""
+
+    def __init__(self, fast_map: Optional[Callable[..., object]]):
+        self.fast_map = fast_map
+        self.fast_hits = 0
+        self.fallbacks = 0
+
+    def map_item(
+        self, item: Dict[str, object], scraped_at: datetime, apify_run_id: str, source_surface: str
+    ) -> Optional[Dict[str, object]]:
+        if self.fast_map is not None:
+            mapped = self.fast_map(item, scraped_at, apify_run_id, source_surface)
+            if mapped is not MISS:
+                self.fast_hits += 1
+                return mapped
+        self.fallbacks += 1
+        return _map_apify_item(item, scraped_at, apify_run_id, source_surface)
+
+    def map_items(
+        self, items: List[Dict[str, object]], scraped_at: datetime, apify_run_id: str, source_surface: str
+    ) -> List[Dict[str, object]]:
+        map_item = self.map_item
+        events = []
+        for item in items:
+            mapped = map_item(item, scraped_at, apify_run_id, source_surface)
+            if mapped:
+                events.append(mapped)
+        return events
+
+
+def learn_item_mapper(sample: Sequence[Dict[str, object]]) -> CompiledItemMapper:
+    """Learn the payload shape from `sample` and return a mapper specialised for it."""
+    learned = _learn_publish(sample)
+    if learned is None:
+        logger.debug("No stable publish-time shape in %s sampled items; using generic mapper", len(sample))
+        return CompiledItemMapper(None)
+
+    key_indices = _learn_keys(sample)
+    fast_map = _build_fast_mapper(*learned, key_indices)
+    scraped_at = datetime.now(timezone.utc)
+    for item in sample:
+        fast = fast_map(item, scraped_at, "", "")
+        if fast is not MISS and fast != _map_apify_item(item, scraped_at, "", ""):
+            logger.warning("Compiled mapper disagreed with generic mapper; using generic mapper")
+            return CompiledItemMapper(None)
+
+    logger.debug(
+        "Compiled item mapper for publish key %s layout %s, key indices %s",
+        PUBLISH_KEYS[learned[0]],
+        learned[1],
+        key_indices,
+    )
+    return CompiledItemMapper(fast_map)
@@ -9,10 +9,80 @@ class Settings(BaseSettings):
     """Application configuration loaded from environment variables."""
 
     database_url: str = Field(..., env="DATABASE_URL")
+    # Async driver URL for the read endpoints; defaults to DATABASE_URL on asyncpg.
+    async_database_url: Optional[str] = Field(None, env="ASYNC_DATABASE_URL")
+    db_pool_size: int = Field(5, env="DB_POOL_SIZE")
+    db_max_overflow: int = Field(10, env="DB_MAX_OVERFLOW")
+    # Pooled connections older than this are replaced on checkout (poolers and load balancers drop idle ones); -1 never.
+    db_pool_recycle_seconds: int = Field(-1, env="DB_POOL_RECYCLE_SECONDS")
+    # Test each connection with a round trip on checkout and replace it if the server or pooler closed it.
+    db_pool_pre_ping: bool = Field(False, env="DB_POOL_PRE_PING")
+    # "session" for direct connections and session poolers; "transaction" (e.g. Supabase's pooler on 6543) disables prepared statements.
+    db_pooler_mode: str = Field("session", env="DB_POOLER_MODE")
+    # Replica for the dashboard read endpoints (/reels/performance*, /creators*); they use the primary while it is down or lagging.
+    read_replica_url: Optional[str] = Field(None, env="READ_REPLICA_URL")
+    read_replica_max_lag_seconds: float = Field(30.0, env="READ_REPLICA_MAX_LAG_SECONDS")
+    # Replica reachability and lag are re-checked at most this often.
+    read_replica_check_seconds: float = Field(10.0, env="READ_REPLICA_CHECK_SECONDS")
     apify_api_token: Optional[str] = Field(None, env="APIFY_API_TOKEN")
     apify_actor_id: Optional[str] = Field(None, env="APIFY_ACTOR_ID")
     apify_max_results: int = Field(200, env="APIFY_MAX_RESULTS")
+    # JSON list of {"platform", "actor_id", "input", "source_surface"}; defaults to one Instagram feed.
+    apify_feeds_json: Optional[str] = Field(None, env="APIFY_FEEDS_JSON")
+    ingestion_max_concurrency: int = Field(4, env="INGESTION_MAX_CONCURRENCY")
+    apify_base_url: str = Field("https://api.apify.com/v2", env="APIFY_BASE_URL")
+    # "sync" waits for run-sync-get-dataset-items; "stream" starts the run and persists dataset pages as they land.
+    apify_ingest_mode: str = Field("sync", env="APIFY_INGEST_MODE")
+    apify_page_size: int = Field(500, env="APIFY_PAGE_SIZE")
+    apify_poll_interval_seconds: int = Field(5, env="APIFY_POLL_INTERVAL_SECONDS")
+    apify_run_timeout_seconds: int = Field(1800, env="APIFY_RUN_TIMEOUT_SECONDS")
+    # Items sampled per run to learn a specialised Instagram item mapper; 0 maps every item generically.
+    mapper_sample_size: int = Field(200, env="MAPPER_SAMPLE_SIZE")
+    # "values" uses chunked multi-VALUES inserts; "copy" stages rows with COPY and merges set-based.
+    persist_mode: str = Field("values", env="PERSIST_MODE")
+    persist_chunk_size: int = Field(2000, env="PERSIST_CHUNK_SIZE")
+    # "append" writes every snapshot; "changes" skips snapshots whose counters are unchanged.
+    raw_event_mode: str = Field("append", env="RAW_EVENT_MODE")
+    # In "changes" mode an unchanged reel is still written once this many hours have passed.
+    raw_event_heartbeat_hours: int = Field(24, env="RAW_EVENT_HEARTBEAT_HOURS")
+    # Raw events older than this many days are rolled into reels_daily_rollups, a month partition at a time; 0 keeps them all.
+    raw_events_retention_days: int = Field(0, env="RAW_EVENTS_RETENTION_DAYS")
+    # Monthly reels_raw_events partitions created ahead of the current month before each ingestion run.
+    raw_events_partition_months_ahead: int = Field(3, env="RAW_EVENTS_PARTITION_MONTHS_AHEAD")
+    rebuild_chunk_size: int = Field(5000, env="REBUILD_CHUNK_SIZE")
+    # Default /ingest/runs limit: recent runs listed, and succeeded runs the stage p50/p95 cover.
+    ingest_status_recent_runs: int = Field(20, env="INGEST_STATUS_RECENT_RUNS")
+    # "maintained" reports the ingest_totals counters; "estimated" reports the planner's row estimates (pg_class.reltuples).
+    ingest_status_counts: str = Field("maintained", env="INGEST_STATUS_COUNTS")
+    # Longest a cached /reels/performance response is served (hours_since_publish drifts); 0 disables.
+    performance_cache_max_staleness_seconds: int = Field(300, env="PERFORMANCE_CACHE_MAX_STALENESS_SECONDS")
+    # Oldest refresh of the window distributions / performance view still served; 0 means twice
+    # INGESTION_INTERVAL_HOURS, so only a missed or failed refresh makes them fall back to per-request ranking.
+    performance_precomputed_max_age_seconds: int = Field(0, env="PERFORMANCE_PRECOMPUTED_MAX_AGE_SECONDS")
+    # "python" computes /reels/performance per request; "view" reads reels_performance_mv, refreshed after ingestion/rebuild.
+    performance_source: str = Field("python", env="PERFORMANCE_SOURCE")
+    # Recompute the 7d/30d/90d cohort distributions (cohort_distributions) after ingestion/rebuild.
+    performance_windows_refresh: bool = Field(True, env="PERFORMANCE_WINDOWS_REFRESH")
+    # "pydantic" validates /reels/performance rows through ReelPerformanceList; "orjson" encodes the computed rows directly.
+    performance_encoder: str = Field("pydantic", env="PERFORMANCE_ENCODER")
+    # Rows encoded per chunk of a /reels/performance?format=ndjson stream.
+    performance_ndjson_chunk_rows: int = Field(1000, env="PERFORMANCE_NDJSON_CHUNK_ROWS")
+    # gzip level (1-9) of the cached /reels/performance/columns payloads; 1 is ~9x faster than 6 for ~12% more bytes.
+    performance_gzip_level: int = Field(1, env="PERFORMANCE_GZIP_LEVEL")
+    # Largest `limit` accepted by GET /reels/performance.
+    performance_max_page_size: int = Field(1000, env="PERFORMANCE_MAX_PAGE_SIZE")
+    # Rows per server-side cursor fetch when loading the /reels/performance cohort.
+    cohort_batch_size: int = Field(5000, env="COHORT_BATCH_SIZE")
+    # Finished ingestion jobs kept in memory for GET /ingest/jobs/{id}.
+    ingestion_job_history: int = Field(50, env="INGESTION_JOB_HISTORY")
     ingestion_interval_hours: int = Field(6, env="INGESTION_INTERVAL_HOURS")
+    # Serve Prometheus metrics at /metrics and time every request; set PROMETHEUS_MULTIPROC_DIR with several workers.
+    metrics_enabled: bool = Field(True, env="METRICS_ENABLED")
+    # /reels/performance requests with an `X-Profile` header equal to this return a sampling profile; unset disables.
+    profiling_token: Optional[str] = Field(None, env="PROFILING_TOKEN")
+    profiling_interval_ms: int = Field(5, env="PROFILING_INTERVAL_MS")
+    # Directory each captured profile is also written to.
+    profiling_dir: Optional[str] = Field(None, env="PROFILING_DIR")
     environment: str = Field("local", env="ENVIRONMENT")
 
     class Config:
@@ -0,0 +1,167 @@
+"""Creator-relative outlier scores (docs/shortflow_outlier_source_of_truth.md).
+
+    outlier_score = views / creator_avg_excluding_v
+    creator_avg_excluding_v = (total_views - views) / (video_count - 1)
+
+creator_aggregates keeps `total_views` and `video_count` per creator over reels_latest_state.
+The write paths apply each batch's changes to it as deltas before they upsert latest state, so
+a reel's leave-one-out baseline costs O(1) instead of a pass over the creator's other videos.
+`recompute_creator_aggregates` rebuilds the table from scratch (used after rebuild_latest_state).
+"""
+
+import logging
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (inclusive) of each tier. The source of truth leaves gaps (below 0.5x, 1.5x-2x)
+# and shares its boundaries between neighbours; here everything up to 2x is Typical and a
+# boundary belongs to the lower tier, matching its worked examples (20x -> Major Outlier).
+OUTLIER_TIERS = (
+    (2.0, "Typical"),
+    (5.0, "Strong"),
+    (10.0, "High Outlier"),
+    (20.0, "Major Outlier"),
+    (50.0, "Breakout"),
+    (100.0, "Viral Outlier"),
+    (float("inf"), "Explosive"),
+)
+
+
+def outlier_score(views: int, creator_total_views: Optional[int], creator_video_count: Optional[int]) -> Optional[float]:
+    """Times-above-baseline multiplier, or None until the creator has a second video with views."""
+    if creator_total_views is None or not creator_video_count or creator_video_count < 2:
+        return None
+    others = creator_total_views - views
+    if others <= 0:
+        return None
+    return round(views / (others / (creator_video_count - 1)), 2)
+
+
+def outlier_tier(score: Optional[float]) -> Optional[str]:
+    if score is None:
+        return None
+    for bound, name in OUTLIER_TIERS:
+        if score <= bound:
+            return name
+    return OUTLIER_TIERS[-1][1]
+
+
+# Adds the change a batch of incoming reels makes to each creator's totals. {incoming} yields
+# one row per reel (reel_id, platform, creator_id, views) and must run before the batch is
+# upserted into reels_latest_state, whose current row is the "before" side. A reel keeps its
+# stored creator when the incoming snapshot has none, and moves between creators if it changes.
+_CREATOR_DELTAS_SQL = """
+WITH incoming AS ({incoming}),
+matched AS (
+    SELECT i.platform, i.views, COALESCE(i.creator_id, l.creator_id) AS creator_id,
+           l.creator_id AS stored_creator_id, l.platform AS stored_platform,
+           l.latest_views AS stored_views
+    FROM incoming i
+    LEFT JOIN reels_latest_state l ON l.reel_id = i.reel_id
+),
+changes AS (
+    SELECT creator_id, platform,
+           CASE WHEN stored_creator_id IS NOT DISTINCT FROM creator_id THEN 0 ELSE 1 END AS videos,
+           views - CASE WHEN stored_creator_id IS NOT DISTINCT FROM creator_id THEN stored_views ELSE 0 END AS views
+    FROM matched
+    WHERE creator_id IS NOT NULL
+    UNION ALL
+    SELECT stored_creator_id, stored_platform, -1, -stored_views
+    FROM matched
+    WHERE stored_creator_id IS NOT NULL AND stored_creator_id <> creator_id
+)
+INSERT INTO creator_aggregates (creator_id, platform, video_count, total_views, updated_at)
+SELECT creator_id, min(platform), sum(videos), sum(views), now()
+FROM changes
+GROUP BY creator_id
+ON CONFLICT (creator_id) DO UPDATE SET
+    video_count = creator_aggregates.video_count + EXCLUDED.video_count,
+    total_views = creator_aggregates.total_views + EXCLUDED.total_views,
+    updated_at = EXCLUDED.updated_at
+"""
+
+APPLY_STAGED_DELTAS_SQL = text(
+    _CREATOR_DELTAS_SQL.format(
+        incoming="""
+        SELECT DISTINCT ON (reel_id) reel_id, platform, creator_id, views
+        FROM reels_events_stage
+        WHERE seq >= :lo AND seq < :hi
+        ORDER BY reel_id, seq DESC
+        """
+    )
+)
+
+APPLY_DELTAS_SQL = text(
+    _CREATOR_DELTAS_SQL.format(
+        incoming="""
+        SELECT * FROM unnest(
+            CAST(:reel_ids AS text[]), CAST(:platforms AS text[]), CAST(:creator_ids AS text[]),
+            CAST(:views AS integer[])
+        ) AS t(reel_id, platform, creator_id, views)
+        """
+    )
+)
+
+RECOMPUTE_SQL = (
+    text("DELETE FROM creator_aggregates"),
+    text(
+        """
+        INSERT INTO creator_aggregates (creator_id, platform, video_count, total_views, updated_at)
+        SELECT creator_id, min(platform), count(*), sum(latest_views), now()
+        FROM reels_latest_state
+        WHERE creator_id IS NOT NULL
+        GROUP BY creator_id
+        """
+    ),
+)
+
+
+def apply_creator_deltas(session: Session, latest_rows: Sequence[Dict[str, object]]) -> None:
+    """Apply deltas for latest-state rows (one per reel) that are about to be upserted."""
+    if not latest_rows:
+        return
+    session.execute(
+        APPLY_DELTAS_SQL,
+        {
+            "reel_ids": [row["reel_id"] for row in latest_rows],
+            "platforms": [row["platform"] for row in latest_rows],
+            "creator_ids": [row.get("creator_id") for row in latest_rows],
+            "views": [row["latest_views"] for row in latest_rows],
+        },
+    )
+
+
+def apply_staged_creator_deltas(session: Session, lo: int, hi: int) -> None:
+    """Apply deltas for staged rows with seq in [lo, hi) before MERGE_LATEST_SQL runs on them."""
+    session.execute(APPLY_STAGED_DELTAS_SQL, {"lo": lo, "hi": hi})
+
+
+def recompute_creator_aggregates(session: Session) -> int:
+    """Rebuild creator_aggregates from reels_latest_state; the caller commits."""
+    delete, insert = RECOMPUTE_SQL
+    session.execute(delete)
+    creators = session.execute(insert).rowcount or 0
+    logger.info("Recomputed aggregates for %s creators", creators)
+    return creators
+
+
+def creator_reel_rows(rows: Iterable[Sequence[object]], total_views: int, video_count: int) -> List[Dict[str, object]]:
+    """(reel_id, reel_url, publish_time, views) rows of one creator -> dicts with outlier fields."""
+    reels = []
+    for reel_id, reel_url, publish_time, views in rows:
+        score = outlier_score(views, total_views, video_count)
+        reels.append(
+            {
+                "reel_id": reel_id,
+                "reel_url": reel_url,
+                "publish_time": publish_time,
+                "views": views,
+                "outlier_score": score,
+                "outlier_tier": outlier_tier(score),
+            }
+        )
+    return reels
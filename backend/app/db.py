@@ -1,14 +1,148 @@
-from sqlalchemy import create_engine
+import asyncio
+import logging
+import time
+import uuid
+from typing import Optional
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import InterfaceError, OperationalError, SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import declarative_base, sessionmaker
 
 from .config import settings
 
+logger = logging.getLogger(__name__)
+
+# Replication lag in seconds; 0 on a primary and on a replica that has replayed all it received
+# (the last replay timestamp stops moving while the primary is idle).
+REPLICA_LAG_SQL = text(
+    """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(extract(epoch FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+    """
+)
+# A replica that has not answered the health check within this long counts as down.
+REPLICA_CHECK_TIMEOUT_SECONDS = 2.0
+
+
+def _engine_options(url: str) -> dict:
+    """Pool settings shared by every engine, plus driver arguments for DB_POOLER_MODE."""
+    connect_args = {}
+    if settings.db_pooler_mode == "transaction":
+        # A transaction pooler hands each transaction to any server connection, where statements
+        # prepared by an earlier transaction don't exist and their names may already be taken.
+        driver = make_url(url).get_driver_name()
+        if driver == "psycopg":
+            connect_args = {"prepare_threshold": None}
+        elif driver == "asyncpg":
+            connect_args = {
+                "statement_cache_size": 0,
+                "prepared_statement_cache_size": 0,
+                "prepared_statement_name_func": lambda: f"__asyncpg_{uuid.uuid4()}__",
+            }
+    return {
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_recycle": settings.db_pool_recycle_seconds,
+        "pool_pre_ping": settings.db_pool_pre_ping,
+        "connect_args": connect_args,
+    }
+
+
 # Use future engine for 2.0 style behavior.
-engine = create_engine(settings.database_url, future=True)
+engine = create_engine(settings.database_url, future=True, **_engine_options(settings.database_url))
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
 Base = declarative_base()
 
 
+def _async_url(database_url: str) -> str:
+    """Point DATABASE_URL at asyncpg; asyncpg spells libpq's `sslmode` as `ssl`."""
+    url = make_url(database_url)
+    if url.drivername in ("postgresql", "postgresql+psycopg", "postgresql+psycopg2"):
+        query = dict(url.query)
+        if "sslmode" in query:
+            query["ssl"] = query.pop("sslmode")
+        url = url.set(drivername="postgresql+asyncpg", query=query)
+    return url.render_as_string(hide_password=False)
+
+
+def _create_async_engine(url: str, **overrides) -> AsyncEngine:
+    return create_async_engine(url, **{**_engine_options(url), **overrides})
+
+
+# Read endpoints use the async engine so concurrent requests don't serialize on the event loop.
+async_engine = _create_async_engine(settings.async_database_url or _async_url(settings.database_url))
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+# Always pre-pinged, so get_read_session finds a dead replica connection at checkout.
+replica_async_engine = (
+    _create_async_engine(_async_url(settings.read_replica_url), pool_pre_ping=True) if settings.read_replica_url else None
+)
+
+
+class ReadRouter:
+    """Chooses the engine for read-only sessions.
+
+    The replica is used while it answers and lags the primary by at most `max_lag_seconds`;
+    otherwise reads go to the primary. Health is re-checked at most every `check_seconds`, by
+    one request while the others keep using the last verdict.
+    """
+
+    def __init__(self, primary: AsyncEngine, replica: Optional[AsyncEngine], max_lag_seconds: float, check_seconds: float):
+        self.primary = primary
+        self.replica = replica
+        self.max_lag_seconds = max_lag_seconds
+        self.check_seconds = check_seconds
+        # None until the first check, so its verdict is always logged.
+        self.healthy: Optional[bool] = None
+        self.lag_seconds: Optional[float] = None
+        self._checked_at = float("-inf")
+        self._checking = False
+
+    async def engine(self) -> AsyncEngine:
+        if self.replica is None:
+            return self.primary
+        if not self._checking and time.monotonic() - self._checked_at >= self.check_seconds:
+            self._checking = True
+            try:
+                await self.check()
+            finally:
+                self._checking = False
+        return self.replica if self.healthy else self.primary
+
+    async def _replica_lag(self) -> float:
+        async with self.replica.connect() as connection:
+            return float((await connection.execute(REPLICA_LAG_SQL)).scalar())
+
+    async def check(self) -> None:
+        try:
+            lag = await asyncio.wait_for(self._replica_lag(), REPLICA_CHECK_TIMEOUT_SECONDS)
+        except (SQLAlchemyError, OSError, asyncio.TimeoutError) as exc:
+            self._set_health(False, None, f"unreachable: {exc!r}")
+            return
+        self._set_health(lag <= self.max_lag_seconds, lag, f"{lag:.1f}s behind")
+
+    def mark_down(self, exc: BaseException) -> None:
+        """Route reads to the primary until the next health check, after a replica connection failed."""
+        self._set_health(False, None, f"failed a request: {exc!r}")
+
+    def _set_health(self, healthy: bool, lag: Optional[float], detail: str) -> None:
+        if healthy != self.healthy:
+            if healthy:
+                logger.info("Read replica available (%s); routing reads to it", detail)
+            else:
+                logger.warning("Read replica %s; reading from the primary", detail)
+        self.healthy, self.lag_seconds = healthy, lag
+        self._checked_at = time.monotonic()
+
+
+read_router = ReadRouter(
+    async_engine, replica_async_engine, settings.read_replica_max_lag_seconds, settings.read_replica_check_seconds
+)
+
+
 def get_session():
     """FastAPI dependency that yields a database session."""
     session = SessionLocal()
@@ -17,3 +151,34 @@ def get_session():
     finally:
         session.close()
 
+
+async def get_async_session():
+    """FastAPI dependency that yields an async database session."""
+    async with AsyncSessionLocal() as session:
+        yield session
+
+
+async def get_read_session():
+    """FastAPI dependency for read-only endpoints: the replica when healthy (see ReadRouter), else the primary.
+
+    The replica connection is checked out before the endpoint runs, so a replica that went down
+    since the last health check is swapped for the primary. A replica failing later, in the middle
+    of a request, fails that request and sends the following ones to the primary.
+    """
+    bind = await read_router.engine()
+    session = AsyncSessionLocal(bind=bind)
+    if bind is read_router.replica:
+        try:
+            await session.connection()
+        except (OperationalError, InterfaceError, OSError) as exc:
+            read_router.mark_down(exc)
+            await session.close()
+            bind = read_router.primary
+            session = AsyncSessionLocal(bind=bind)
+    async with session:
+        try:
+            yield session
+        except (OperationalError, InterfaceError, OSError) as exc:
+            if bind is read_router.replica:
+                read_router.mark_down(exc)
+            raise
@@ -0,0 +1,147 @@
+"""Maintained totals behind GET /ingest/status.
+
+ingest_totals holds a single row (id 1) so the endpoint reads one primary key instead of
+counting reels_raw_events and reels_latest_state on every poll. Writers keep it current in
+their own transaction:
+
+- both bulk_load paths add the raw events they inserted and the reels they created;
+- persist_mapped_events records the scrape time, Apify run id and events of the last scrape;
+- raw event retention subtracts the raw events of every partition it drops;
+- ingestion and rebuild_latest_state recount the reels published in the last 7 days (as of
+  `published_counted_at`), and the rebuild recounts reels_latest_state.
+
+`python -m app.ingest_totals` recomputes every field exactly, e.g. after rows were written
+outside the app. With INGEST_STATUS_COUNTS=estimated the endpoint reports the planner's row
+estimates (pg_class.reltuples) for the two totals instead.
+"""
+
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from .db import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+TOTALS_ID = 1
+
+ADD_COUNTS_SQL = text(
+    """
+    UPDATE ingest_totals SET
+        total_raw_events = total_raw_events + :raw_events,
+        latest_state_count = latest_state_count + :latest_states,
+        updated_at = now()
+    WHERE id = 1
+    """
+)
+
+# A newer scrape starts a new "last run"; further batches of the same scrape (pages, feeds) add to it.
+RECORD_SCRAPE_SQL = text(
+    """
+    UPDATE ingest_totals SET
+        events_last_run = CASE WHEN last_scraped_at = :scraped_at THEN events_last_run + :events ELSE :events END,
+        last_apify_run_id = :apify_run_id,
+        last_scraped_at = :scraped_at,
+        updated_at = now()
+    WHERE id = 1 AND (last_scraped_at IS NULL OR last_scraped_at <= :scraped_at)
+    """
+)
+
+# Served by ix_reels_latest_state_publish_time, so it reads one week of reels.
+COUNT_PUBLISHED_SQL = text(
+    """
+    UPDATE ingest_totals SET
+        reels_published_last_7d = (SELECT count(*) FROM reels_latest_state WHERE publish_time >= :since),
+        published_counted_at = :now,
+        updated_at = now()
+    WHERE id = 1
+    """
+)
+
+RECOUNT_LATEST_STATES_SQL = text(
+    "UPDATE ingest_totals SET latest_state_count = (SELECT count(*) FROM reels_latest_state), updated_at = now() "
+    "WHERE id = 1"
+)
+
+# Full scans; migration 0011 seeds the row with the same counts.
+RECOUNT_SQL = text(
+    """
+    INSERT INTO ingest_totals (
+        id, total_raw_events, latest_state_count, last_scraped_at, last_apify_run_id, events_last_run,
+        reels_published_last_7d, published_counted_at, updated_at
+    )
+    SELECT
+        1,
+        (SELECT count(*) FROM reels_raw_events),
+        (SELECT count(*) FROM reels_latest_state),
+        last.scraped_at,
+        (SELECT apify_run_id FROM reels_raw_events WHERE scraped_at = last.scraped_at
+            GROUP BY apify_run_id ORDER BY count(*) DESC LIMIT 1),
+        (SELECT count(*) FROM reels_raw_events WHERE scraped_at = last.scraped_at),
+        (SELECT count(*) FROM reels_latest_state WHERE publish_time >= now() - interval '7 days'),
+        now(),
+        now()
+    FROM (SELECT max(scraped_at) AS scraped_at FROM reels_raw_events) AS last
+    ON CONFLICT (id) DO UPDATE SET
+        total_raw_events = EXCLUDED.total_raw_events,
+        latest_state_count = EXCLUDED.latest_state_count,
+        last_scraped_at = EXCLUDED.last_scraped_at,
+        last_apify_run_id = EXCLUDED.last_apify_run_id,
+        events_last_run = EXCLUDED.events_last_run,
+        reels_published_last_7d = EXCLUDED.reels_published_last_7d,
+        published_counted_at = EXCLUDED.published_counted_at,
+        updated_at = EXCLUDED.updated_at
+    """
+)
+
+# Planner estimates (as of the last ANALYZE); raw events sum the partitions, whose parent has none.
+ESTIMATED_COUNTS_SQL = text(
+    """
+    SELECT
+        (SELECT coalesce(sum(greatest(child.reltuples, 0)), 0)::bigint
+            FROM pg_inherits JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+            WHERE pg_inherits.inhparent = 'reels_raw_events'::regclass),
+        (SELECT greatest(reltuples, 0)::bigint FROM pg_class WHERE oid = 'reels_latest_state'::regclass)
+    """
+)
+
+
+def add_counts(session: Session, raw_events: int = 0, latest_states: int = 0) -> None:
+    """Add inserted (or, negative, removed) rows to the totals; the caller commits."""
+    if raw_events or latest_states:
+        session.execute(ADD_COUNTS_SQL, {"raw_events": raw_events, "latest_states": latest_states})
+
+
+def record_scrape(session: Session, scraped_at: datetime, apify_run_id: str, events: int) -> None:
+    """Record `events` raw events written for the scrape at `scraped_at`; the caller commits."""
+    session.execute(RECORD_SCRAPE_SQL, {"scraped_at": scraped_at, "apify_run_id": apify_run_id, "events": events})
+
+
+def refresh_published_count(session: Session, now: Optional[datetime] = None) -> None:
+    """Recount reels published in the 7 days before `now`; the caller commits."""
+    now = now or datetime.now(timezone.utc)
+    session.execute(COUNT_PUBLISHED_SQL, {"since": now - timedelta(days=7), "now": now})
+
+
+def recount_latest_states(session: Session) -> None:
+    session.execute(RECOUNT_LATEST_STATES_SQL)
+
+
+def recount(session: Session) -> None:
+    """Recompute every total exactly; the caller commits."""
+    session.execute(RECOUNT_SQL)
+
+
+def main():
+    with SessionLocal() as session:
+        recount(session)
+        session.commit()
+    logger.info("Recounted ingest_totals")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
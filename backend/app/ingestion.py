@@ -1,181 +1,207 @@
-import json
 import logging
-import os
+import queue
+import threading
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 from typing import Dict, List, Optional
 
-import requests
-from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.orm import Session
 
+from . import bulk_load
+from .apify import UNKNOWN_RUN_ID, apify_http_session
+from .cohort_windows import refresh_cohort_windows
 from .config import settings
-from .models import ReelLatestState, ReelRawEvent
+from .ingest_totals import record_scrape, refresh_published_count
+from .performance_view import refresh_performance_view
+from .raw_event_retention import apply_retention, ensure_partitions
+from .run_ledger import IngestionStats, finish_run, start_run
+from .snapshot_cache import performance_cache
+from .sources import Feed, configured_feeds, get_adapter
+from .telemetry import observe_ingestion, observe_retention_failure
 
 logger = logging.getLogger(__name__)
 
 
-def _parse_datetime(value: Optional[object]) -> Optional[datetime]:
-    if value is None:
-        return None
-    if isinstance(value, (int, float)):
-        return datetime.fromtimestamp(value, tz=timezone.utc)
-    if isinstance(value, str):
-        for fmt in ("%Y-%m-%dT%H:%M:%S.%fZ", "%Y-%m-%dT%H:%M:%SZ", "%Y-%m-%d %H:%M:%S", "%Y-%m-%dT%H:%M:%S"):
-            try:
-                return datetime.strptime(value, fmt).replace(tzinfo=timezone.utc)
-            except ValueError:
-                continue
-        try:
-            return datetime.fromisoformat(value.replace("Z", "+00:00"))
-        except Exception:
-            logger.debug("Unable to parse datetime: %s", value)
-    return None
-
-
-def _canonical_url(item: Dict[str, object]) -> Optional[str]:
-    url = item.get("url") or item.get("link")
-    if url:
-        return url
-    shortcode = item.get("shortCode") or item.get("code")
-    if shortcode:
-        return f"https://www.instagram.com/reel/{shortcode}/"
-    return None
-
-
-def _map_apify_item(item: Dict[str, object], scraped_at: datetime, apify_run_id: str) -> Optional[Dict[str, object]]:
-    reel_id = item.get("id") or item.get("itemId") or item.get("shortCode")
-    if not reel_id:
-        return None
-
-    reel_url = _canonical_url(item)
-    if not reel_url:
-        return None
+def persist_mapped_events(
+    session: Session,
+    events: List[Dict[str, object]],
+    apify_run_id: str,
+    stats: Optional[IngestionStats] = None,
+) -> int:
+    """Write already-mapped events to reels_raw_events and reels_latest_state and commit."""
+    if not events:
+        logger.warning("No valid events mapped from Apify run %s", apify_run_id)
+        return 0
 
-    publish_time = (
-        _parse_datetime(item.get("publishDate"))
-        or _parse_datetime(item.get("takenAt"))
-        or _parse_datetime(item.get("takenAtTimestamp"))
-        or _parse_datetime(item.get("timestamp"))
+    # In "changes" mode unchanged snapshots are only re-written once per heartbeat interval.
+    heartbeat_hours = settings.raw_event_heartbeat_hours if settings.raw_event_mode == "changes" else None
+    load = bulk_load.copy_events if settings.persist_mode == "copy" else bulk_load.insert_events
+    inserted, suppressed = load(session, events, settings.persist_chunk_size, heartbeat_hours, stats)
+    if inserted:
+        record_scrape(session, max(ev["scraped_at"] for ev in events), apify_run_id, inserted)
+    with stats.timed("upsert_latest") if stats is not None else nullcontext():
+        session.commit()
+    performance_cache.invalidate()
+    if stats is not None:
+        stats.events_inserted += inserted
+        stats.events_suppressed += suppressed
+    logger.info(
+        "Persisted %s new raw events for Apify run %s (%s unchanged suppressed)", inserted, apify_run_id, suppressed
     )
-    if not publish_time:
-        return None
-
-    views = item.get("playsCount") or item.get("playCount") or item.get("views") or 0
-    likes = item.get("likesCount") or item.get("likeCount") or item.get("likes") or 0
-    comments = item.get("commentsCount") or item.get("commentCount") or item.get("comments") or 0
-    shares = item.get("savesCount") or item.get("shareCount") or item.get("shares") or None
-
-    mapped = {
-        "reel_id": str(reel_id),
-        "platform": "instagram",
-        "reel_url": reel_url,
-        "scraped_at": scraped_at,
-        "publish_time": publish_time,
-        "views": int(views),
-        "likes": int(likes),
-        "comments": int(comments),
-        "shares_or_saves": int(shares) if shares is not None else None,
-        "caption_text": item.get("caption") or item.get("title"),
-        "audio_id": item.get("musicId") or item.get("audioId"),
-        "audio_name": item.get("musicTitle") or item.get("audioName"),
-        "duration_seconds": item.get("duration") or item.get("videoDuration"),
-        "apify_run_id": apify_run_id,
-        "source_surface": "reels_feed",
-    }
-    return mapped
-
-
-def fetch_apify_reels() -> List[Dict[str, object]]:
-    """Run the configured Apify actor and return raw items."""
-    if not settings.apify_api_token or not settings.apify_actor_id:
-        raise RuntimeError("Apify credentials are not configured.")
-
-    url = f"https://api.apify.com/v2/acts/{settings.apify_actor_id}/run-sync-get-dataset-items"
-    params = {"token": settings.apify_api_token, "limit": settings.apify_max_results}
-    default_input = {
-        "resultsLimit": settings.apify_max_results,
-        "scrapeType": "RECOMMENDED",
-        "maxRequestRetries": 2,
-        "maxConcurrency": 10,
-        "proxy": {"useApifyProxy": True},
-    }
+    return inserted
 
-    # Allow override via APIFY_INPUT_JSON for quick iteration.
-    custom_input = os.getenv("APIFY_INPUT_JSON")
-    payload = json.loads(custom_input) if custom_input else default_input
 
-    response = requests.post(url, params=params, json=payload, timeout=120)
-    response.raise_for_status()
-    run_id = response.headers.get("x-apify-run-id") or response.headers.get("X-Apify-Run-Id") or "unknown-run"
-    items = response.json()
-    logger.info("Fetched %s items from Apify run %s", len(items), run_id)
-    return items, run_id
+def persist_events(
+    session: Session,
+    items: List[Dict[str, object]],
+    apify_run_id: str,
+    scraped_at: Optional[datetime] = None,
+    platform: str = "instagram",
+) -> int:
+    """Map raw Apify items with the platform's adapter, then persist them."""
+    scraped_at = scraped_at or datetime.now(timezone.utc)
+    adapter = get_adapter(platform)
+    events = adapter.map_items(items, scraped_at, apify_run_id, adapter.default_surface)
+    return persist_mapped_events(session, events, apify_run_id)
 
 
-def persist_events(session: Session, items: List[Dict[str, object]], apify_run_id: str) -> int:
-    """Persist raw events and update the latest state snapshot."""
+def _put(pages: queue.Queue, message: tuple, stop: threading.Event) -> None:
+    # Bounded queue: block for backpressure, but give up once the consumer has stopped.
+    while not stop.is_set():
+        try:
+            pages.put(message, timeout=1)
+            return
+        except queue.Full:
+            continue
+
+
+def _pump_feed(http, feed: Feed, stream: bool, pages: queue.Queue, stop: threading.Event) -> None:
+    error = None
+    try:
+        for page in get_adapter(feed.platform).iter_pages(http, feed, stream):
+            _put(pages, ("page", feed, page), stop)
+            if stop.is_set():
+                return
+    except Exception as exc:
+        logger.exception("Fetching %s feed from actor %s failed", feed.platform, feed.actor_id)
+        error = exc
+    _put(pages, ("done", feed, error), stop)
+
+
+def _run_feeds(session: Session, feeds: List[Feed], stats: IngestionStats) -> str:
+    """Fetch every feed concurrently and persist; returns the comma-joined Apify run ids.
+
+    In sync mode all feeds are merged into one persistence pass once the slowest feed returns.
+    In stream mode each page is persisted as it arrives from any feed.
+    """
+    stream = settings.apify_ingest_mode == "stream"
+    # All feeds share one scraped_at so a run stays a single snapshot in reels_raw_events.
     scraped_at = datetime.now(timezone.utc)
-    events: List[Dict[str, object]] = []
-    for item in items:
-        mapped = _map_apify_item(item, scraped_at, apify_run_id)
-        if mapped:
-            events.append(mapped)
+    concurrency = max(1, min(settings.ingestion_max_concurrency, len(feeds)))
+    pages: queue.Queue = queue.Queue(maxsize=concurrency * 2)
+    stop = threading.Event()
+
+    run_ids: List[str] = []
+    errors: List[Exception] = []
+    pending: List[Dict[str, object]] = []
+    with apify_http_session(concurrency) as http, ThreadPoolExecutor(
+        max_workers=concurrency, thread_name_prefix="apify-feed"
+    ) as pool:
+        for feed in feeds:
+            pool.submit(_pump_feed, http, feed, stream, pages, stop)
+        try:
+            remaining = len(feeds)
+            while remaining:
+                # Time blocked on the queue is the fetch cost not hidden behind mapping/persisting.
+                with stats.timed("fetch"):
+                    kind, feed, payload = pages.get()
+                if kind == "done":
+                    remaining -= 1
+                    if payload is not None:
+                        errors.append(payload)
+                    continue
+                run_id, items, response_bytes = payload
+                if run_id not in run_ids:
+                    run_ids.append(run_id)
+                with stats.timed("map"):
+                    events = get_adapter(feed.platform).map_items(items, scraped_at, run_id, feed.source_surface)
+                stats.items_received += len(items)
+                stats.items_mapped += len(events)
+                stats.response_bytes += response_bytes
+                if stream:
+                    persist_mapped_events(session, events, run_id, stats)
+                else:
+                    pending.extend(events)
+        finally:
+            stop.set()
+
+    if len(errors) == len(feeds):
+        raise errors[0]
+    apify_run_id = ", ".join(run_ids) or UNKNOWN_RUN_ID
+    if not stream:
+        persist_mapped_events(session, pending, apify_run_id, stats)
+    return apify_run_id
+
+
+def _apply_retention(session: Session, stats: IngestionStats) -> Optional[str]:
+    """Roll up expired raw-event partitions; a failure is reported, not raised, since the run's data is committed."""
+    try:
+        with stats.timed("retention"):
+            apply_retention(session)
+    except Exception as exc:
+        logger.exception("Raw event retention failed; the ingested data is kept")
+        observe_retention_failure()
+        return f"retention: {exc}"
+    return None
 
-    if not events:
-        logger.warning("No valid events mapped from Apify run %s", apify_run_id)
-        return 0
 
-    insert_stmt = insert(ReelRawEvent).values(events)
-    do_nothing_stmt = insert_stmt.on_conflict_do_nothing(constraint="uq_reel_scrape_run")
-    result = session.execute(do_nothing_stmt)
-    inserted = result.rowcount or 0
-
-    latest_values = []
-    for ev in events:
-        latest_values.append(
-            {
-                "reel_id": ev["reel_id"],
-                "platform": ev["platform"],
-                "reel_url": ev["reel_url"],
-                "publish_time": ev["publish_time"],
-                "latest_views": ev["views"],
-                "latest_likes": ev["likes"],
-                "latest_comments": ev["comments"],
-                "latest_shares_or_saves": ev["shares_or_saves"],
-                "latest_scraped_at": ev["scraped_at"],
-                "caption_text": ev.get("caption_text"),
-                "audio_id": ev.get("audio_id"),
-                "audio_name": ev.get("audio_name"),
-                "duration_seconds": ev.get("duration_seconds"),
-            }
-        )
-
-    latest_insert = insert(ReelLatestState).values(latest_values)
-    latest_upsert = latest_insert.on_conflict_do_update(
-        index_elements=[ReelLatestState.reel_id],
-        set_={
-            "platform": latest_insert.excluded.platform,
-            "reel_url": latest_insert.excluded.reel_url,
-            "publish_time": latest_insert.excluded.publish_time,
-            "latest_views": latest_insert.excluded.latest_views,
-            "latest_likes": latest_insert.excluded.latest_likes,
-            "latest_comments": latest_insert.excluded.latest_comments,
-            "latest_shares_or_saves": latest_insert.excluded.latest_shares_or_saves,
-            "latest_scraped_at": latest_insert.excluded.latest_scraped_at,
-            "caption_text": latest_insert.excluded.caption_text,
-            "audio_id": latest_insert.excluded.audio_id,
-            "audio_name": latest_insert.excluded.audio_name,
-            "duration_seconds": latest_insert.excluded.duration_seconds,
-        },
-    )
-    session.execute(latest_upsert)
-    session.commit()
-    logger.info("Persisted %s new raw events for Apify run %s", inserted, apify_run_id)
-    return inserted
+def run_ingestion(session: Session, stats: Optional[IngestionStats] = None) -> Dict[str, object]:
+    """Fetch data from Apify, persist to Supabase/Postgres and record the run in ingestion_runs.
 
+    Pass `stats` to observe the run's counters while it is in progress.
+    """
+    feeds = configured_feeds()
+    if not settings.apify_api_token or not feeds:
+        raise RuntimeError("Apify credentials are not configured.")
 
-def run_ingestion(session: Session) -> Dict[str, object]:
-    """Fetch data from Apify and persist to Supabase/Postgres."""
-    items, run_id = fetch_apify_reels()
-    ingested = persist_events(session, items, run_id)
-    return {"ingested_count": ingested, "apify_run_id": run_id}
+    run = start_run(session, (feed.platform for feed in feeds))
+    stats = stats if stats is not None else IngestionStats()
+    try:
+        ensure_partitions(session)
+        apify_run_id = _run_feeds(session, feeds, stats)
+        retention_error = _apply_retention(session, stats)
+        refresh_performance_view(session)
+        refresh_cohort_windows(session)
+
+        # Committed together with the ledger row by finish_run.
+        refresh_published_count(session)
+        finish_run(session, run, stats, "succeeded", apify_run_id=apify_run_id, error=retention_error)
+    except Exception as exc:
+        # Best effort: a failure to record the failure must not replace the original error.
+        try:
+            session.rollback()
+            finish_run(session, run, stats, "failed", error=str(exc))
+        except Exception:
+            logger.exception("Could not mark ingestion run %s as failed", run.id)
+        try:
+            observe_ingestion("failed", stats)
+        except Exception:
+            logger.exception("Could not record metrics for failed ingestion run %s", run.id)
+        raise exc
+    observe_ingestion("succeeded", stats)
+    logger.info(
+        "Ingestion run %s: %s items received, %s dropped, fetch %.2fs, map %.2fs, insert %.2fs, upsert %.2fs",
+        run.id,
+        stats.items_received,
+        stats.items_dropped,
+        stats.fetch_seconds,
+        stats.map_seconds,
+        stats.insert_raw_seconds,
+        stats.upsert_latest_seconds,
+    )
+    return {
+        "ingested_count": stats.events_inserted,
+        "suppressed_count": stats.events_suppressed,
+        "apify_run_id": apify_run_id,
+    }
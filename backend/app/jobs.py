@@ -0,0 +1,134 @@
+"""Background ingestion jobs.
+
+Ingestion is blocking (HTTP to Apify plus sync SQLAlchemy writes), so both the API and the
+scheduler hand it to a single worker thread instead of running it on the event loop. Only one
+job runs at a time: submitting while a job is queued or running returns that job, and a
+Postgres advisory lock keeps other processes (extra uvicorn workers, cron) from overlapping it.
+"""
+
+import logging
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Dict, Iterator, Optional, Tuple
+
+from sqlalchemy import text
+
+from . import ingestion
+from .config import settings
+from .db import SessionLocal, engine
+from .run_ledger import IngestionStats
+
+logger = logging.getLogger(__name__)
+
+# Arbitrary application-wide key for pg_try_advisory_lock / pg_try_advisory_xact_lock.
+INGESTION_LOCK_KEY = 0x5348504C
+
+ACTIVE_STATUSES = {"queued", "running"}
+
+
+@dataclass
+class IngestionJob:
+    id: str
+    trigger: str
+    status: str = "queued"
+    created_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    stats: IngestionStats = field(default_factory=IngestionStats)
+    result: Optional[Dict[str, object]] = None
+    error: Optional[str] = None
+
+    @property
+    def progress(self) -> Dict[str, int]:
+        return {
+            "items_received": self.stats.items_received,
+            "items_mapped": self.stats.items_mapped,
+            "events_inserted": self.stats.events_inserted,
+            "events_suppressed": self.stats.events_suppressed,
+        }
+
+
+@contextmanager
+def advisory_lock() -> Iterator[bool]:
+    """Hold the cross-process ingestion lock on a dedicated connection; yields whether it was acquired.
+
+    The session-level lock is taken in a transaction committed at once, so the connection waits
+    outside a transaction while the run holds the lock. Behind a transaction pooler a session lock
+    could stay behind on a server connection that other clients reuse, so with
+    DB_POOLER_MODE=transaction the transaction-level lock is taken and its transaction stays open
+    until the run ends.
+    """
+    per_transaction = settings.db_pooler_mode == "transaction"
+    function = "pg_try_advisory_xact_lock" if per_transaction else "pg_try_advisory_lock"
+    with engine.connect() as connection:
+        acquired = connection.execute(text(f"SELECT {function}(:key)"), {"key": INGESTION_LOCK_KEY}).scalar()
+        if not per_transaction:
+            connection.commit()
+        try:
+            yield bool(acquired)
+        finally:
+            if acquired and not per_transaction:
+                connection.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": INGESTION_LOCK_KEY})
+            connection.commit()
+
+
+class IngestionJobQueue:
+    def __init__(self, history: int):
+        self.history = history
+        self._jobs: "OrderedDict[str, IngestionJob]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def submit(self, trigger: str) -> Tuple[IngestionJob, bool]:
+        """Queue an ingestion job; returns (job, created). An active job is returned instead of a new one."""
+        with self._lock:
+            for job in self._jobs.values():
+                if job.status in ACTIVE_STATUSES:
+                    return job, False
+            job = IngestionJob(id=uuid.uuid4().hex, trigger=trigger)
+            self._jobs[job.id] = job
+            while len(self._jobs) > self.history:
+                self._jobs.popitem(last=False)
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ingestion-job")
+            self._executor.submit(self._execute, job)
+        logger.info("Queued %s ingestion job %s", trigger, job.id)
+        return job, True
+
+    def get(self, job_id: str) -> Optional[IngestionJob]:
+        return self._jobs.get(job_id)
+
+    def _execute(self, job: IngestionJob) -> None:
+        job.status = "running"
+        job.started_at = datetime.now(timezone.utc)
+        try:
+            with advisory_lock() as acquired:
+                if not acquired:
+                    job.status = "skipped"
+                    job.error = "Another process is already running ingestion."
+                    logger.warning("Ingestion job %s skipped: %s", job.id, job.error)
+                    return
+                with SessionLocal() as session:
+                    job.result = ingestion.run_ingestion(session, job.stats)
+            job.status = "succeeded"
+            logger.info("Ingestion job %s (%s) complete: %s", job.id, job.trigger, job.result)
+        except Exception as exc:
+            job.status = "failed"
+            job.error = str(exc)
+            logger.exception("Ingestion job %s (%s) failed", job.id, job.trigger)
+        finally:
+            job.finished_at = datetime.now(timezone.utc)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+
+ingestion_jobs = IngestionJobQueue(settings.ingestion_job_history)
@@ -1,18 +1,40 @@
+import gzip
 import logging
 from datetime import datetime, timedelta, timezone
+from typing import Literal, Optional, Tuple
 
-from fastapi import Depends, FastAPI, HTTPException
+from fastapi import Depends, FastAPI, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy import func
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from .cohort_loader import load_cohort
+from .cohort_windows import load_window_performance
+from .creators import creator_reel_rows
 from .config import settings
-from .db import get_session
-from .ingestion import run_ingestion
-from .metrics import attach_percentiles, compute_derived_metrics
-from .models import ReelLatestState, ReelRawEvent
-from .schemas import IngestResult, IngestStatus, ReelPerformanceList
+from .db import async_engine, get_async_session, get_read_session, replica_async_engine
+from .jobs import ingestion_jobs
+from .metrics_engine import PerformanceColumns, compute_performance
+from .ingest_totals import ESTIMATED_COUNTS_SQL, TOTALS_ID
+from .models import CreatorAggregate, IngestTotals, ReelLatestState
+from .performance_encoding import (
+    COLUMN_FIELDS,
+    DEFAULT_COLUMN_FIELDS,
+    NDJSON_MEDIA_TYPE,
+    encode_columns,
+    encode_performance,
+    iter_ndjson,
+)
+from .performance_page import PageRequest, decode_cursor, select_page
+from .performance_view import load_performance_view
+from .profiling import ProfilingMiddleware
+from .run_ledger import recent_runs, stage_timings
+from .schemas import CreatorDetail, CreatorList, IngestJob, IngestRuns, IngestStatus, ReelPerformanceList
 from .scheduler import ingestion_scheduler
+from .snapshot_cache import accepts_encoding, data_version, encoding_etag, etag_matches, performance_cache
+from .sources import configured_feeds
+from .telemetry import PrometheusMiddleware, render_metrics
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -25,7 +47,13 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Next-Cursor", "X-Computed-At"],
 )
+if settings.profiling_token:
+    app.add_middleware(ProfilingMiddleware)
+# Added last, so it is outermost and times everything, profiled requests included.
+if settings.metrics_enabled:
+    app.add_middleware(PrometheusMiddleware)
 
 
 @app.on_event("startup")
@@ -36,6 +64,10 @@ async def startup_event():
 @app.on_event("shutdown")
 async def shutdown_event():
     ingestion_scheduler.shutdown()
+    ingestion_jobs.shutdown()
+    await async_engine.dispose()
+    if replica_async_engine is not None:
+        await replica_async_engine.dispose()
 
 
 @app.get("/health")
@@ -43,64 +75,244 @@ async def health():
     return {"status": "ok", "environment": settings.environment}
 
 
-@app.post("/ingest/run", response_model=IngestResult)
-async def ingest_now(session: Session = Depends(get_session)):
-    try:
-        result = run_ingestion(session)
-        return result
-    except Exception as exc:
-        logger.exception("Manual ingestion failed")
-        raise HTTPException(status_code=500, detail=str(exc)) from exc
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus exposition of request latency, DB pool and ingestion metrics (see telemetry.py)."""
+    if not settings.metrics_enabled:
+        raise HTTPException(status_code=404, detail="Metrics are disabled.")
+    body, content_type = render_metrics()
+    return Response(body, media_type=content_type)
+
+
+@app.post("/ingest/run", response_model=IngestJob, status_code=202)
+async def ingest_now():
+    """Queue an ingestion job and return it; an already queued or running job is returned instead."""
+    if not settings.apify_api_token or not configured_feeds():
+        raise HTTPException(status_code=500, detail="Apify credentials are not configured.")
+    job, _ = ingestion_jobs.submit("manual")
+    # FastAPI turns a returned dataclass into a dict with dataclasses.asdict, which drops `progress`.
+    return IngestJob.from_orm(job)
 
 
-@app.get("/reels/performance", response_model=ReelPerformanceList)
-async def reels_performance(session: Session = Depends(get_session)):
+@app.get("/ingest/jobs/{job_id}", response_model=IngestJob)
+async def ingest_job(job_id: str):
+    job = ingestion_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Ingestion job not found.")
+    return IngestJob.from_orm(job)
+
+
+async def _performance(session: AsyncSession, window: Optional[str]) -> PerformanceColumns:
+    if window is not None:
+        return await load_window_performance(session, window)
+    if settings.performance_source == "view":
+        return await load_performance_view(session)
     now = datetime.now(timezone.utc)
-    seven_days_ago = now - timedelta(days=7)
-    states = (
-        session.query(ReelLatestState)
-        .filter(ReelLatestState.publish_time >= seven_days_ago)
-        .all()
+    return compute_performance(await load_cohort(session, now - timedelta(days=7)), now)
+
+
+async def _cached_performance(session: AsyncSession, version: str, window: Optional[str]) -> PerformanceColumns:
+    return await performance_cache.get_or_compute(
+        f"performance:{window}" if window else "performance", version, lambda: _performance(session, window)
     )
-    derived = compute_derived_metrics(states, now)
-    enriched = attach_percentiles(derived)
-    return {"items": enriched}
 
 
-@app.get("/ingest/status", response_model=IngestStatus)
-async def ingest_status(session: Session = Depends(get_session)):
-    last_scraped_at = session.query(func.max(ReelRawEvent.scraped_at)).scalar()
-
-    last_apify_run_id = None
-    events_last_run = 0
-    if last_scraped_at:
-        latest_run = (
-            session.query(ReelRawEvent.apify_run_id, func.count(ReelRawEvent.id))
-            .filter(ReelRawEvent.scraped_at == last_scraped_at)
-            .group_by(ReelRawEvent.apify_run_id)
-            .order_by(func.count(ReelRawEvent.id).desc())
-            .first()
-        )
-        if latest_run:
-            last_apify_run_id, events_last_run = latest_run
-
-    total_raw_events = session.query(func.count(ReelRawEvent.id)).scalar() or 0
-    latest_state_count = session.query(func.count(ReelLatestState.reel_id)).scalar() or 0
+def _computed_at_header(performance: PerformanceColumns) -> dict:
+    """`X-Computed-At`: the time hours_since_publish and the rates are as of (a refresh, for view and windows)."""
+    return {"X-Computed-At": performance.computed_at.isoformat()} if performance.computed_at else {}
 
-    now = datetime.now(timezone.utc)
-    seven_days_ago = now - timedelta(days=7)
-    reels_published_last_7d = (
-        session.query(func.count(ReelLatestState.reel_id))
-        .filter(ReelLatestState.publish_time >= seven_days_ago)
-        .scalar()
-        or 0
+
+SortKey = Literal["performance_score", "views_per_hour", "engagement_rate", "views", "momentum"]
+Window = Literal["7d", "30d", "90d"]
+
+
+def _page_request(
+    limit: Optional[int], sort: Optional[str], min_percentile: Optional[float], platform: Optional[str], cursor: Optional[str]
+) -> Tuple[PageRequest, bool]:
+    """The requested page, and whether any paging parameter was given at all."""
+    page = PageRequest(sort=sort or "performance_score", limit=limit, min_percentile=min_percentile, platform=platform)
+    if cursor is not None:
+        try:
+            page.after = decode_cursor(cursor, page.sort)
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc)) from exc
+    return page, any(value is not None for value in (limit, sort, min_percentile, platform, cursor))
+
+
+@app.get(
+    "/reels/performance",
+    # Documented only: the endpoint returns encoded bytes or a stream, so nothing is validated here.
+    responses={
+        200: {
+            "model": ReelPerformanceList,
+            "description": "A page or the whole cohort as JSON, or with `format=ndjson` one ReelPerformance per line.",
+            "content": {NDJSON_MEDIA_TYPE: {"schema": {"$ref": "#/components/schemas/ReelPerformance"}}},
+        }
+    },
+)
+async def reels_performance(
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1, le=settings.performance_max_page_size),
+    sort: Optional[SortKey] = None,
+    min_percentile: Optional[float] = Query(None, ge=0, le=100),
+    platform: Optional[str] = None,
+    cursor: Optional[str] = None,
+    window: Optional[Window] = None,
+    response_format: Optional[Literal["json", "ndjson"]] = Query(None, alias="format"),
+    session: AsyncSession = Depends(get_read_session),
+):
+    """Without parameters, the whole 7-day cohort; otherwise one sorted, filtered page (see docs/api_reference.md).
+
+    `window` serves a pre-aggregated cohort (cohort_windows.py) instead of ranking per request.
+    `format=ndjson` streams the rows, one per line, with the next cursor in `X-Next-Cursor`.
+    """
+    page, paged = _page_request(limit, sort, min_percentile, platform, cursor)
+    version = await data_version(session)
+    performance = await _cached_performance(session, version, window)
+
+    if response_format == "ndjson":
+        # Encoded while it is sent, from the cached cohort; the stream itself is not cached.
+        indices, next_cursor = select_page(performance, page) if paged else (None, None)
+        headers = {"X-Next-Cursor": next_cursor} if next_cursor else {}
+        headers.update(_computed_at_header(performance))
+        return StreamingResponse(iter_ndjson(performance, indices), media_type=NDJSON_MEDIA_TYPE, headers=headers)
+
+    async def build() -> bytes:
+        if not paged:
+            return encode_performance(performance)
+        indices, next_cursor = select_page(performance, page)
+        return encode_performance(performance, indices, next_cursor)
+
+    key = f"reels_performance?{request.url.query}" if paged or window else "reels_performance"
+    snapshot = await performance_cache.get_or_build(key, version, build)
+    headers = {"ETag": snapshot.etag, "Cache-Control": "no-cache", **_computed_at_header(performance)}
+    if etag_matches(request.headers.get("if-none-match"), snapshot.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(snapshot.body, media_type="application/json", headers=headers)
+
+
+@app.get("/reels/performance/columns")
+async def reels_performance_columns(
+    request: Request,
+    fields: str = ",".join(DEFAULT_COLUMN_FIELDS),
+    limit: Optional[int] = Query(None, ge=1, le=settings.performance_max_page_size),
+    sort: Optional[SortKey] = None,
+    min_percentile: Optional[float] = Query(None, ge=0, le=100),
+    platform: Optional[str] = None,
+    cursor: Optional[str] = None,
+    window: Optional[Window] = None,
+    session: AsyncSession = Depends(get_read_session),
+):
+    """The same cohort and pages as /reels/performance, as one array per requested field, gzipped."""
+    columns = [field.strip() for field in fields.split(",") if field.strip()]
+    unknown = sorted(set(columns) - set(COLUMN_FIELDS))
+    if not columns or unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown or missing fields: {', '.join(unknown)}")
+    page, paged = _page_request(limit, sort, min_percentile, platform, cursor)
+    version = await data_version(session)
+    performance = await _cached_performance(session, version, window)
+
+    async def build() -> bytes:
+        indices, next_cursor = select_page(performance, page) if paged else (None, None)
+        # Cached compressed, so repeat requests only pay for the bytes.
+        return gzip.compress(encode_columns(performance, columns, indices, next_cursor), settings.performance_gzip_level)
+
+    snapshot = await performance_cache.get_or_build(f"reels_performance_columns?{request.url.query}", version, build)
+    gzipped = accepts_encoding(request.headers.get("accept-encoding"), "gzip")
+    # The gzip and identity bodies differ byte for byte, so each gets its own strong ETag.
+    etag = encoding_etag(snapshot.etag, "gzip") if gzipped else snapshot.etag
+    headers = {
+        "ETag": etag,
+        "Cache-Control": "no-cache",
+        "Vary": "Accept-Encoding",
+        **_computed_at_header(performance),
+    }
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    if gzipped:
+        return Response(snapshot.body, media_type="application/json", headers={**headers, "Content-Encoding": "gzip"})
+    return Response(gzip.decompress(snapshot.body), media_type="application/json", headers=headers)
+
+
+def _creator_summary(aggregate: CreatorAggregate) -> dict:
+    return {
+        "creator_id": aggregate.creator_id,
+        "platform": aggregate.platform,
+        "video_count": aggregate.video_count,
+        "total_views": aggregate.total_views,
+        "average_views": aggregate.total_views / aggregate.video_count if aggregate.video_count else 0.0,
+    }
+
+
+@app.get("/creators", response_model=CreatorList)
+async def creators(
+    platform: Optional[str] = None,
+    min_videos: int = Query(1, ge=1),
+    limit: int = Query(50, ge=1, le=settings.performance_max_page_size),
+    session: AsyncSession = Depends(get_read_session),
+):
+    """Creators by total views, from the incrementally maintained creator_aggregates."""
+    query = select(CreatorAggregate).where(CreatorAggregate.video_count >= min_videos)
+    if platform is not None:
+        query = query.where(CreatorAggregate.platform == platform)
+    query = query.order_by(CreatorAggregate.total_views.desc(), CreatorAggregate.creator_id).limit(limit)
+    return {"items": [_creator_summary(aggregate) for aggregate in (await session.scalars(query)).all()]}
+
+
+@app.get("/creators/{creator_id}", response_model=CreatorDetail)
+async def creator_detail(
+    creator_id: str,
+    limit: int = Query(50, ge=1, le=settings.performance_max_page_size),
+    session: AsyncSession = Depends(get_read_session),
+):
+    """A creator's totals and top reels by outlier score (the same order as views, for a fixed baseline)."""
+    aggregate = await session.get(CreatorAggregate, creator_id)
+    if aggregate is None:
+        raise HTTPException(status_code=404, detail="Creator not found.")
+    rows = await session.execute(
+        select(ReelLatestState.reel_id, ReelLatestState.reel_url, ReelLatestState.publish_time, ReelLatestState.latest_views)
+        .where(ReelLatestState.creator_id == creator_id)
+        .order_by(ReelLatestState.latest_views.desc(), ReelLatestState.reel_id)
+        .limit(limit)
     )
+    return {
+        **_creator_summary(aggregate),
+        "reels": creator_reel_rows(rows, aggregate.total_views, aggregate.video_count),
+    }
+
+
+@app.get("/ingest/status", response_model=IngestStatus)
+async def ingest_status(session: AsyncSession = Depends(get_async_session)):
+    """One primary-key read of the totals ingestion maintains (plus a catalog read in estimated mode).
 
+    Served from the primary, so a run's totals show as soon as it commits, whatever the replica lag.
+    """
+    totals = await session.get(IngestTotals, TOTALS_ID)
+    total_raw_events = totals.total_raw_events if totals else 0
+    latest_state_count = totals.latest_state_count if totals else 0
+    if settings.ingest_status_counts == "estimated":
+        total_raw_events, latest_state_count = (await session.execute(ESTIMATED_COUNTS_SQL)).one()
     return {
-        "last_scraped_at": last_scraped_at,
-        "last_apify_run_id": last_apify_run_id,
-        "events_last_run": events_last_run,
+        "last_scraped_at": totals.last_scraped_at if totals else None,
+        "last_apify_run_id": totals.last_apify_run_id if totals else None,
+        "events_last_run": totals.events_last_run if totals else 0,
         "total_raw_events": total_raw_events,
         "latest_state_count": latest_state_count,
-        "reels_published_last_7d": reels_published_last_7d,
+        "reels_published_last_7d": totals.reels_published_last_7d if totals else 0,
+        "published_counted_at": totals.published_counted_at if totals else None,
+        "totals_source": settings.ingest_status_counts,
+        "totals_updated_at": totals.updated_at if totals else None,
+    }
+
+
+@app.get("/ingest/runs", response_model=IngestRuns)
+async def ingest_runs(
+    limit: int = Query(settings.ingest_status_recent_runs, ge=1, le=200),
+    session: AsyncSession = Depends(get_async_session),
+):
+    """The newest ledger runs and p50/p95 stage timings over as many succeeded runs, from the primary."""
+    # The ledger helpers are sync; run_sync drives them over the same async connection.
+    return {
+        "recent_runs": await session.run_sync(recent_runs, limit),
+        "stage_timings": await session.run_sync(stage_timings, limit),
     }
@@ -20,6 +20,7 @@ class DerivedReelMetrics:
     hours_since_publish: float
     views_per_hour: float
     engagement_rate: float
+    momentum: float
 
 
 def _safe_div(num: float, denom: float) -> float:
@@ -32,6 +33,16 @@ def _hours_since_publish(publish_time: datetime, now: datetime) -> float:
     return hours
 
 
+def _momentum(state: ReelLatestState) -> float:
+    """Views/hour between the previous and the latest snapshot (publish time counts as 0 views)."""
+    if state.prev_scraped_at is None:
+        base_views, base_time = 0, state.publish_time
+    else:
+        base_views, base_time = state.prev_views or 0, state.prev_scraped_at
+    # Counters occasionally drop (removed bot views); that is no momentum rather than negative.
+    return max(state.latest_views - base_views, 0) / _hours_since_publish(base_time, state.latest_scraped_at)
+
+
 def compute_derived_metrics(states: Sequence[ReelLatestState], now: Optional[datetime] = None) -> List[DerivedReelMetrics]:
     """Compute derived metrics for each latest reel state."""
     now = now or datetime.now(timezone.utc)
@@ -57,6 +68,7 @@ def compute_derived_metrics(states: Sequence[ReelLatestState], now: Optional[dat
                 hours_since_publish=hours,
                 views_per_hour=views_per_hour,
                 engagement_rate=engagement_rate,
+                momentum=_momentum(state),
             )
         )
     return derived
@@ -87,13 +99,15 @@ def attach_percentiles(derived: List[DerivedReelMetrics]) -> List[dict]:
     views_values = [d.views for d in derived]
     vph_values = [d.views_per_hour for d in derived]
     er_values = [d.engagement_rate for d in derived]
+    momentum_values = [d.momentum for d in derived]
 
     views_percentiles = _percentile_rank(views_values)
     vph_percentiles = _percentile_rank(vph_values)
     er_percentiles = _percentile_rank(er_values)
+    momentum_percentiles = _percentile_rank(momentum_values)
 
     enriched = []
-    for d, vp, vphp, erp in zip(derived, views_percentiles, vph_percentiles, er_percentiles):
+    for d, vp, vphp, erp, mp in zip(derived, views_percentiles, vph_percentiles, er_percentiles, momentum_percentiles):
         performance_score = round(0.45 * erp + 0.40 * vphp + 0.15 * vp, 2)
         enriched.append(
             {
@@ -113,6 +127,8 @@ def attach_percentiles(derived: List[DerivedReelMetrics]) -> List[dict]:
                 "views_per_hour_percentile": vphp,
                 "engagement_rate_percentile": erp,
                 "performance_score": performance_score,
+                "momentum": round(d.momentum, 2),
+                "momentum_percentile": mp,
             }
         )
     return enriched
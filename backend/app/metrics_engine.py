@@ -0,0 +1,357 @@
+"""Array-backed equivalent of `compute_derived_metrics` + `attach_percentiles`.
+
+Works on whole columns with NumPy instead of one dataclass and one dict per reel. Every
+float is produced by the same IEEE operations as the reference implementation in
+`metrics.py`, and rounding goes through `_round_like_python`, so the rows match it exactly.
+"""
+
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .creators import OUTLIER_TIERS
+from .models import ReelLatestState
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+MICROSECOND = timedelta(microseconds=1)
+MIN_HOURS = 1 / 60  # minimum one minute to avoid div-by-zero, as in metrics._hours_since_publish
+_TIER_BOUNDS = np.array([bound for bound, _ in OUTLIER_TIERS[:-1]])
+_TIER_NAMES = [name for _, name in OUTLIER_TIERS]
+
+# Column order accepted by `CohortColumns.from_rows` / `from_batches`.
+COHORT_COLUMNS = (
+    "reel_id",
+    "platform",
+    "reel_url",
+    "publish_time",
+    "latest_scraped_at",
+    "latest_views",
+    "latest_likes",
+    "latest_comments",
+    "latest_shares_or_saves",
+    "prev_views",
+    "prev_scraped_at",
+)
+
+# Optional trailing columns: with them, rows also carry creator_id and the outlier fields.
+CREATOR_COLUMNS = ("creator_id", "creator_video_count", "creator_total_views")
+
+
+def _epoch_micros(moment: datetime) -> int:
+    # Integer microseconds keep `now - publish_time` exact, like timedelta arithmetic.
+    return (moment - EPOCH) // MICROSECOND
+
+
+@dataclass
+class CohortColumns:
+    """The latest-state columns the metrics need, one list/array per field."""
+
+    reel_id: List[str]
+    platform: List[str]
+    reel_url: List[str]
+    publish_time: List[datetime]
+    latest_scraped_at: List[datetime]
+    views: np.ndarray
+    likes: np.ndarray
+    comments: np.ndarray
+    shares_or_saves: List[Optional[int]]
+    publish_micros: np.ndarray
+    # Momentum baseline: the previous snapshot, or (0 views, publish_time) when there is none.
+    scraped_micros: np.ndarray
+    base_views: np.ndarray
+    base_micros: np.ndarray
+    creator_id: Optional[List[Optional[str]]] = None
+    creator_video_count: Optional[np.ndarray] = None  # 0 when the reel has no creator aggregate
+    creator_total_views: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return len(self.reel_id)
+
+    @classmethod
+    def from_batches(cls, batches: Iterable[Sequence[Sequence[Any]]]) -> "CohortColumns":
+        """Build columns from batches of tuples ordered as COHORT_COLUMNS (+ CREATOR_COLUMNS)."""
+        builder = CohortBuilder()
+        for rows in batches:
+            builder.add(rows)
+        return builder.build()
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Sequence[Any]]) -> "CohortColumns":
+        """Build columns from tuples ordered as COHORT_COLUMNS."""
+        return cls.from_batches([list(rows)])
+
+    @classmethod
+    def from_states(cls, states: Sequence[ReelLatestState]) -> "CohortColumns":
+        return cls.from_rows(tuple(getattr(state, column) for column in COHORT_COLUMNS) for state in states)
+
+
+class CohortBuilder:
+    """Accumulates row batches into columns so each batch can be released once added."""
+
+    def __init__(self):
+        self._text: List[List[Any]] = [[], [], [], [], []]  # reel_id, platform, reel_url, publish, scraped
+        self._counters: List[List[np.ndarray]] = [[], [], []]  # views, likes, comments
+        self._shares: List[Optional[int]] = []
+        self._micros: List[np.ndarray] = []
+        self._momentum: List[List[np.ndarray]] = [[], [], []]  # scraped_micros, base_views, base_micros
+        self._creators: Optional[List[Any]] = None
+        self._creator_counters: List[List[np.ndarray]] = [[], []]  # video_count, total_views
+
+    def add(self, rows: Sequence[Sequence[Any]]) -> None:
+        if not rows:
+            return
+        columns = list(zip(*rows))
+        if len(columns) > len(COHORT_COLUMNS):
+            if self._creators is None:
+                self._creators = []
+            self._creators.extend(columns[11])
+            for target, values in zip(self._creator_counters, columns[12:14]):
+                target.append(np.fromiter((value or 0 for value in values), dtype=np.int64, count=len(rows)))
+        for target, values in zip(self._text, columns[:5]):
+            target.extend(values)
+        for target, values in zip(self._counters, columns[5:8]):
+            target.append(np.array(values, dtype=np.int64))
+        self._shares.extend(columns[8])
+        publish_micros = np.fromiter((_epoch_micros(t) for t in columns[3]), dtype=np.int64, count=len(rows))
+        self._micros.append(publish_micros)
+        scraped_micros, base_views, base_micros = self._momentum
+        scraped_micros.append(np.fromiter((_epoch_micros(t) for t in columns[4]), dtype=np.int64, count=len(rows)))
+        has_prev = np.fromiter((t is not None for t in columns[10]), dtype=bool, count=len(rows))
+        base_views.append(
+            np.where(has_prev, np.fromiter((v or 0 for v in columns[9]), dtype=np.int64, count=len(rows)), 0)
+        )
+        base_micros.append(
+            np.where(
+                has_prev,
+                np.fromiter((_epoch_micros(t) if t else 0 for t in columns[10]), dtype=np.int64, count=len(rows)),
+                publish_micros,
+            )
+        )
+
+    def build(self) -> CohortColumns:
+        def concat(chunks: List[np.ndarray]) -> np.ndarray:
+            return np.concatenate(chunks) if chunks else np.empty(0, dtype=np.int64)
+
+        reel_id, platform, reel_url, publish, scraped = self._text
+        views, likes, comments = (concat(chunks) for chunks in self._counters)
+        return CohortColumns(
+            reel_id=reel_id,
+            platform=platform,
+            reel_url=reel_url,
+            publish_time=publish,
+            latest_scraped_at=scraped,
+            views=views,
+            likes=likes,
+            comments=comments,
+            shares_or_saves=self._shares,
+            publish_micros=concat(self._micros),
+            scraped_micros=concat(self._momentum[0]),
+            base_views=concat(self._momentum[1]),
+            base_micros=concat(self._momentum[2]),
+            creator_id=self._creators,
+            creator_video_count=concat(self._creator_counters[0]) if self._creators is not None else None,
+            creator_total_views=concat(self._creator_counters[1]) if self._creators is not None else None,
+        )
+
+
+@dataclass
+class PerformanceColumns:
+    """Derived metrics, percentiles and score for a cohort; floats are already rounded."""
+
+    cohort: CohortColumns
+    hours_since_publish: np.ndarray
+    views_per_hour: np.ndarray
+    engagement_rate: np.ndarray
+    views_percentile: np.ndarray
+    views_per_hour_percentile: np.ndarray
+    engagement_rate_percentile: np.ndarray
+    performance_score: np.ndarray
+    momentum: np.ndarray
+    momentum_percentile: np.ndarray
+    outlier_score: Optional[List[Optional[float]]] = None
+    outlier_tier: Optional[List[Optional[str]]] = None
+    # The time hours_since_publish and the rates are as of.
+    computed_at: Optional[datetime] = None
+
+    def __len__(self) -> int:
+        return len(self.cohort)
+
+    def rows(self, indices: Optional[Sequence[int]] = None) -> List[Dict[str, Any]]:
+        """Return the same list of dicts as `attach_percentiles(compute_derived_metrics(...))`.
+
+        With `indices`, only those rows are built, in that order. Cohorts loaded with
+        CREATOR_COLUMNS add creator_id, outlier_score and outlier_tier to every row.
+        """
+        c = self.cohort
+        if indices is None:
+            objects = iter
+            numbers = np.ndarray.tolist
+        else:
+            positions = np.asarray(indices, dtype=np.int64)
+            objects = lambda values: [values[i] for i in positions.tolist()]  # noqa: E731
+            numbers = lambda values: values[positions].tolist()  # noqa: E731
+        columns = zip(
+            objects(c.reel_id),
+            objects(c.platform),
+            objects(c.reel_url),
+            objects(c.publish_time),
+            objects(c.latest_scraped_at),
+            numbers(c.views),
+            numbers(c.likes),
+            numbers(c.comments),
+            objects(c.shares_or_saves),
+            numbers(self.hours_since_publish),
+            numbers(self.views_per_hour),
+            numbers(self.engagement_rate),
+            numbers(self.views_percentile),
+            numbers(self.views_per_hour_percentile),
+            numbers(self.engagement_rate_percentile),
+            numbers(self.performance_score),
+            numbers(self.momentum),
+            numbers(self.momentum_percentile),
+        )
+        keys = (
+            "reel_id",
+            "platform",
+            "reel_url",
+            "publish_time",
+            "latest_scraped_at",
+            "views",
+            "likes",
+            "comments",
+            "shares_or_saves",
+            "hours_since_publish",
+            "views_per_hour",
+            "engagement_rate",
+            "views_percentile",
+            "views_per_hour_percentile",
+            "engagement_rate_percentile",
+            "performance_score",
+            "momentum",
+            "momentum_percentile",
+        )
+        if self.outlier_score is not None:
+            columns = (
+                (*row, creator_id, score, tier)
+                for row, creator_id, score, tier in zip(
+                    columns, objects(c.creator_id), objects(self.outlier_score), objects(self.outlier_tier)
+                )
+            )
+            keys += ("creator_id", "outlier_score", "outlier_tier")
+        return [dict(zip(keys, row)) for row in columns]
+
+
+def _round_like_python(values: np.ndarray, ndigits: int) -> np.ndarray:
+    """Round like the builtin `round(x, ndigits)` (correctly rounded), which np.round is not.
+
+    np.round scales, rounds and unscales; the scaled value can land on the wrong side of a
+    .5 boundary. Those near-tie elements are re-rounded with the builtin.
+    """
+    scale = 10.0**ndigits
+    scaled = values * scale
+    rounded = np.rint(scaled) / scale
+    distance = np.abs(scaled - np.floor(scaled) - 0.5)
+    suspect = np.flatnonzero(
+        (distance <= 4 * np.spacing(np.abs(scaled))) | (np.abs(scaled) >= 2.0**52) | ~np.isfinite(scaled)
+    )
+    if suspect.size:
+        rounded[suspect] = [round(value, ndigits) for value in values[suspect].tolist()]
+    return rounded
+
+
+def _max_rank_percentiles(values: np.ndarray) -> np.ndarray:
+    """Percentile of the last position of each value in the sorted column, like metrics._percentile_rank."""
+    n = values.size
+    if n == 1:
+        return np.array([100.0])
+    # Searching the sorted column for itself walks memory in order; scatter back afterwards.
+    order = np.argsort(values, kind="stable")
+    ordered = values[order]
+    index = np.empty(n, dtype=np.int64)
+    index[order] = np.searchsorted(ordered, ordered, side="right") - 1
+    return _round_like_python(index / (n - 1) * 100, 2)
+
+
+def _empty_performance(cohort: CohortColumns, computed_at: Optional[datetime] = None) -> PerformanceColumns:
+    empty = np.empty(0)
+    return PerformanceColumns(cohort, *([empty] * 9), computed_at=computed_at)
+
+
+def momentum_per_hour(cohort: CohortColumns) -> np.ndarray:
+    """Unrounded metrics._momentum: views gained per hour since the previous snapshot."""
+    span = np.maximum((cohort.scraped_micros - cohort.base_micros) / 1_000_000 / 3600, MIN_HOURS)
+    return np.maximum(cohort.views - cohort.base_views, 0) / span
+
+
+def _outliers(cohort: CohortColumns) -> Tuple[List[Optional[float]], List[Optional[str]]]:
+    """Vectorized creators.outlier_score / outlier_tier from the joined creator aggregates."""
+    views, counts = cohort.views, cohort.creator_video_count
+    others = cohort.creator_total_views - views
+    defined = (counts >= 2) & (others > 0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        scores = _round_like_python(np.where(defined, views / (others / (counts - 1)), 0.0), 2)
+    tiers = np.searchsorted(_TIER_BOUNDS, scores, side="left")
+    defined = defined.tolist()
+    return (
+        [score if ok else None for score, ok in zip(scores.tolist(), defined)],
+        [_TIER_NAMES[tier] if ok else None for tier, ok in zip(tiers.tolist(), defined)],
+    )
+
+
+# Metrics ranked into percentiles, by the column name derived_columns() returns them under.
+RANKED_METRICS = ("views", "views_per_hour", "engagement_rate", "momentum")
+
+
+def derived_columns(cohort: CohortColumns, now: datetime) -> Dict[str, np.ndarray]:
+    """Unrounded hours_since_publish and RANKED_METRICS as of `now`."""
+    hours = np.maximum((_epoch_micros(now) - cohort.publish_micros) / 1_000_000 / 3600, MIN_HOURS)
+    shares = np.fromiter((s or 0 for s in cohort.shares_or_saves), dtype=np.int64, count=len(cohort))
+    interactions = cohort.likes + cohort.comments + shares
+    with np.errstate(divide="ignore", invalid="ignore"):
+        engagement_rate = np.where(cohort.views != 0, interactions / cohort.views, 0.0)
+    return {
+        "hours_since_publish": hours,
+        "views": cohort.views,
+        "views_per_hour": cohort.views / hours,
+        "engagement_rate": engagement_rate,
+        "momentum": momentum_per_hour(cohort),
+    }
+
+
+def compute_performance(
+    cohort: CohortColumns,
+    now: Optional[datetime] = None,
+    percentiles: Optional[Callable[[str, np.ndarray], np.ndarray]] = None,
+) -> PerformanceColumns:
+    """Metrics, percentiles and score for `cohort` as of `now`.
+
+    Percentiles rank each metric within the cohort unless `percentiles(metric, values)` is
+    given, e.g. binary searches into a pre-aggregated distribution (cohort_windows.py).
+    """
+    now = now or datetime.now(timezone.utc)
+    if not len(cohort):
+        return _empty_performance(cohort, now)
+    rank = percentiles or (lambda _metric, values: _max_rank_percentiles(values))
+
+    columns = derived_columns(cohort, now)
+    views_pct, vph_pct, er_pct, momentum_pct = (rank(metric, columns[metric]) for metric in RANKED_METRICS)
+    score = _round_like_python(0.45 * er_pct + 0.40 * vph_pct + 0.15 * views_pct, 2)
+
+    outlier_score, outlier_tier = _outliers(cohort) if cohort.creator_id is not None else (None, None)
+    return PerformanceColumns(
+        cohort=cohort,
+        hours_since_publish=_round_like_python(columns["hours_since_publish"], 2),
+        views_per_hour=_round_like_python(columns["views_per_hour"], 2),
+        engagement_rate=_round_like_python(columns["engagement_rate"], 4),
+        views_percentile=views_pct,
+        views_per_hour_percentile=vph_pct,
+        engagement_rate_percentile=er_pct,
+        performance_score=score,
+        momentum=_round_like_python(columns["momentum"], 2),
+        momentum_percentile=momentum_pct,
+        outlier_score=outlier_score,
+        outlier_tier=outlier_tier,
+        computed_at=now,
+    )
@@ -2,11 +2,16 @@ import uuid
 from datetime import datetime
 
 from sqlalchemy import (
+    BigInteger,
+    CheckConstraint,
     Column,
+    Date,
     DateTime,
     Float,
     Index,
     Integer,
+    LargeBinary,
+    SmallInteger,
     String,
     Text,
     UniqueConstraint,
@@ -17,18 +22,22 @@ from .db import Base
 
 
 class ReelRawEvent(Base):
+    """One scraped snapshot; range-partitioned by month of scraped_at (see raw_event_retention.py)."""
+
     __tablename__ = "reels_raw_events"
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     reel_id = Column(String, nullable=False)
     platform = Column(String, nullable=False, default="instagram")
     reel_url = Column(String, nullable=False)
-    scraped_at = Column(DateTime(timezone=True), nullable=False, index=True)
+    # Part of the primary key because Postgres requires the partition key in every unique constraint.
+    scraped_at = Column(DateTime(timezone=True), primary_key=True, nullable=False, index=True)
     publish_time = Column(DateTime(timezone=True), nullable=False, index=True)
     views = Column(Integer, nullable=False)
     likes = Column(Integer, nullable=False)
     comments = Column(Integer, nullable=False)
     shares_or_saves = Column(Integer)
+    creator_id = Column(String)
     caption_text = Column(Text)
     audio_id = Column(String)
     audio_name = Column(String)
@@ -40,9 +49,49 @@ class ReelRawEvent(Base):
     __table_args__ = (
         UniqueConstraint("reel_id", "scraped_at", "apify_run_id", name="uq_reel_scrape_run"),
         Index("ix_reels_raw_events_reel_id_publish", "reel_id", "publish_time"),
+        Index("ix_reels_raw_events_reel_id_scraped_at", "reel_id", scraped_at.desc()),
+        {"postgresql_partition_by": "RANGE (scraped_at)"},
     )
 
 
+class ReelDailyRollup(Base):
+    """One reel's raw snapshots of one UTC day, kept after its partition aged out of retention.
+
+    Counters keep the day's last, min and max; the other fields are the last snapshot's.
+    """
+
+    __tablename__ = "reels_daily_rollups"
+
+    reel_id = Column(String, primary_key=True)
+    day = Column(Date, primary_key=True)
+    snapshots = Column(Integer, nullable=False)
+    first_scraped_at = Column(DateTime(timezone=True), nullable=False)
+    last_scraped_at = Column(DateTime(timezone=True), nullable=False)
+    last_views = Column(Integer, nullable=False)
+    min_views = Column(Integer, nullable=False)
+    max_views = Column(Integer, nullable=False)
+    last_likes = Column(Integer, nullable=False)
+    min_likes = Column(Integer, nullable=False)
+    max_likes = Column(Integer, nullable=False)
+    last_comments = Column(Integer, nullable=False)
+    min_comments = Column(Integer, nullable=False)
+    max_comments = Column(Integer, nullable=False)
+    last_shares_or_saves = Column(Integer)
+    min_shares_or_saves = Column(Integer)
+    max_shares_or_saves = Column(Integer)
+    platform = Column(String, nullable=False)
+    reel_url = Column(String, nullable=False)
+    publish_time = Column(DateTime(timezone=True), nullable=False)
+    creator_id = Column(String)
+    caption_text = Column(Text)
+    audio_id = Column(String)
+    audio_name = Column(String)
+    duration_seconds = Column(Float)
+    apify_run_id = Column(String, nullable=False)
+    source_surface = Column(String, nullable=False)
+    last_created_at = Column(DateTime(timezone=True), nullable=False)
+
+
 class ReelLatestState(Base):
     __tablename__ = "reels_latest_state"
 
@@ -55,13 +104,101 @@ class ReelLatestState(Base):
     latest_comments = Column(Integer, nullable=False)
     latest_shares_or_saves = Column(Integer)
     latest_scraped_at = Column(DateTime(timezone=True), nullable=False)
+    # Counters of the snapshot before latest_scraped_at, for momentum; NULL until a second scrape.
+    prev_views = Column(Integer)
+    prev_scraped_at = Column(DateTime(timezone=True))
+    creator_id = Column(String)
     caption_text = Column(Text)
     audio_id = Column(String)
     audio_name = Column(String)
     duration_seconds = Column(Float)
+    # scraped_at of the last snapshot written to reels_raw_events; lags latest_scraped_at when
+    # unchanged snapshots are suppressed.
+    last_raw_event_at = Column(DateTime(timezone=True))
     updated_at = Column(DateTime(timezone=True), default=datetime.utcnow, onupdate=datetime.utcnow)
 
     __table_args__ = (
         Index("ix_reels_latest_state_publish_time", "publish_time"),
+        Index("ix_reels_latest_state_creator_views", "creator_id", latest_views.desc()),
     )
 
+
+class CreatorAggregate(Base):
+    """Running view totals per creator over reels_latest_state, kept current by persist_events."""
+
+    __tablename__ = "creator_aggregates"
+
+    creator_id = Column(String, primary_key=True)
+    platform = Column(String, nullable=False)
+    video_count = Column(Integer, nullable=False, default=0)
+    total_views = Column(BigInteger, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), nullable=False, default=datetime.utcnow)
+
+
+class CohortDistribution(Base):
+    """One window's sorted values of a ranked metric, as of `computed_at` (see cohort_windows.py)."""
+
+    __tablename__ = "cohort_distributions"
+
+    window_days = Column(SmallInteger, primary_key=True)
+    metric = Column(String, primary_key=True)
+    reel_count = Column(Integer, nullable=False)
+    # Little-endian float64 array, ascending.
+    sorted_values = Column(LargeBinary, nullable=False)
+    computed_at = Column(DateTime(timezone=True), nullable=False)
+
+
+class IngestTotals(Base):
+    """The single (id 1) row of totals GET /ingest/status reads (see ingest_totals.py)."""
+
+    __tablename__ = "ingest_totals"
+
+    id = Column(SmallInteger, primary_key=True)
+    total_raw_events = Column(BigInteger, nullable=False, default=0)
+    latest_state_count = Column(BigInteger, nullable=False, default=0)
+    last_scraped_at = Column(DateTime(timezone=True))
+    last_apify_run_id = Column(String)
+    events_last_run = Column(Integer, nullable=False, default=0)
+    reels_published_last_7d = Column(Integer, nullable=False, default=0)
+    published_counted_at = Column(DateTime(timezone=True))
+    updated_at = Column(DateTime(timezone=True), default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (CheckConstraint("id = 1", name="ck_ingest_totals_single_row"),)
+
+
+class IngestionRun(Base):
+    __tablename__ = "ingestion_runs"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    apify_run_id = Column(String)
+    platform = Column(String, nullable=False, default="instagram")
+    started_at = Column(DateTime(timezone=True), nullable=False, default=datetime.utcnow, index=True)
+    finished_at = Column(DateTime(timezone=True))
+    status = Column(String, nullable=False, default="running")
+    events_ingested = Column(Integer, nullable=False, default=0)
+    events_suppressed = Column(Integer, nullable=False, default=0)
+    items_received = Column(Integer, nullable=False, default=0)
+    items_mapped = Column(Integer, nullable=False, default=0)
+    items_dropped = Column(Integer, nullable=False, default=0)
+    response_bytes = Column(BigInteger, nullable=False, default=0)
+    # Wall-clock seconds per stage; streamed runs accumulate each stage across pages.
+    fetch_seconds = Column(Float)
+    map_seconds = Column(Float)
+    insert_raw_seconds = Column(Float)
+    upsert_latest_seconds = Column(Float)
+    # Rolling up expired raw-event partitions after the load (RAW_EVENTS_RETENTION_DAYS).
+    retention_seconds = Column(Float)
+    error_message = Column(Text)
+    created_at = Column(DateTime(timezone=True), default=datetime.utcnow, nullable=False)
+
+
+class RebuildCheckpoint(Base):
+    __tablename__ = "rebuild_checkpoints"
+
+    job_name = Column(String, primary_key=True)
+    last_reel_id = Column(String)
+    touched_since = Column(DateTime(timezone=True))
+    rows_rebuilt = Column(Integer, nullable=False, default=0)
+    started_at = Column(DateTime(timezone=True), nullable=False, default=datetime.utcnow)
+    updated_at = Column(DateTime(timezone=True), nullable=False, default=datetime.utcnow)
+    finished_at = Column(DateTime(timezone=True))
@@ -0,0 +1,118 @@
+"""Encoders for /reels/performance responses.
+
+Rows come from PerformanceColumns.rows(), whose types already match ReelPerformance, so the
+"orjson" encoder serializes them directly instead of validating every row (HttpUrl parsing,
+datetime checks) through ReelPerformanceList first. The JSON is the same document apart
+from key order. NDJSON streams one row per line in chunks, so a client can render the
+first rows while the rest of the cohort is still being encoded. The columnar encoding sends
+one array per requested field instead of row objects, for charts that only need a few
+numbers per point.
+"""
+
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+import orjson
+
+from .config import settings
+from .metrics_engine import PerformanceColumns
+from .schemas import ReelPerformanceList
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+def encode_performance(
+    performance: PerformanceColumns, indices: Optional[Sequence[int]] = None, next_cursor: Optional[str] = None
+) -> bytes:
+    """One ReelPerformanceList document, encoded as PERFORMANCE_ENCODER says."""
+    rows = performance.rows(indices)
+    if settings.performance_encoder == "orjson":
+        return orjson.dumps({"items": rows, "next_cursor": next_cursor})
+    return ReelPerformanceList(items=rows, next_cursor=next_cursor).json().encode()
+
+
+def iter_ndjson(
+    performance: PerformanceColumns, indices: Optional[Sequence[int]] = None, chunk_rows: Optional[int] = None
+) -> Iterator[bytes]:
+    """Yield the rows as NDJSON, `chunk_rows` rows per chunk; only one chunk of dicts is alive at a time."""
+    chunk_rows = chunk_rows or settings.performance_ndjson_chunk_rows
+    positions = np.arange(len(performance)) if indices is None else np.asarray(indices, dtype=np.int64)
+    for start in range(0, len(positions), chunk_rows):
+        rows = performance.rows(positions[start : start + chunk_rows])
+        yield b"".join(orjson.dumps(row, option=orjson.OPT_APPEND_NEWLINE) for row in rows)
+
+
+# Fields encode_columns accepts. Numbers are sent as plain arrays (publish_time as epoch
+# milliseconds), DICTIONARY_COLUMNS as {"dictionary": [distinct values], "codes": [index per row]}.
+NUMERIC_COLUMNS = (
+    "views",
+    "likes",
+    "comments",
+    "hours_since_publish",
+    "views_per_hour",
+    "engagement_rate",
+    "views_percentile",
+    "views_per_hour_percentile",
+    "engagement_rate_percentile",
+    "performance_score",
+    "momentum",
+    "momentum_percentile",
+)
+TEXT_COLUMNS = ("reel_id", "reel_url", "creator_id")
+DICTIONARY_COLUMNS = ("platform", "outlier_tier")
+COLUMN_FIELDS = NUMERIC_COLUMNS + TEXT_COLUMNS + DICTIONARY_COLUMNS + ("publish_time", "outlier_score")
+# What the dashboard scatter plots: x, y, size, highlight, colour, and the id to look a point up.
+DEFAULT_COLUMN_FIELDS = (
+    "reel_id",
+    "platform",
+    "views",
+    "views_per_hour_percentile",
+    "engagement_rate_percentile",
+    "performance_score",
+)
+
+
+def _dictionary(values: Sequence[Any]) -> Dict[str, List[Any]]:
+    codes_by_value: Dict[Any, int] = {}
+    codes = [codes_by_value.setdefault(value, len(codes_by_value)) for value in values]
+    return {"dictionary": list(codes_by_value), "codes": codes}
+
+
+def encode_columns(
+    performance: PerformanceColumns,
+    fields: Sequence[str],
+    indices: Optional[Sequence[int]] = None,
+    next_cursor: Optional[str] = None,
+) -> bytes:
+    """`{"count", "columns": {field: values}, "next_cursor"}` for COLUMN_FIELDS `fields`, in row order."""
+    cohort = performance.cohort
+    positions = None if indices is None else np.asarray(indices, dtype=np.int64)
+
+    def array(values: np.ndarray) -> np.ndarray:
+        return values if positions is None else values[positions]
+
+    def objects(values: Optional[Sequence[Any]]) -> List[Any]:
+        if values is None:
+            values = [None] * len(performance)
+        return list(values) if positions is None else [values[i] for i in positions.tolist()]
+
+    columns: Dict[str, Any] = {}
+    for field in fields:
+        if field in NUMERIC_COLUMNS:
+            source = cohort if field in ("views", "likes", "comments") else performance
+            columns[field] = array(getattr(source, field))
+        elif field == "publish_time":
+            columns[field] = array(cohort.publish_micros) // 1000
+        elif field == "outlier_score":
+            columns[field] = objects(performance.outlier_score)
+        elif field in DICTIONARY_COLUMNS:
+            source = cohort if field == "platform" else performance
+            columns[field] = _dictionary(objects(getattr(source, field)))
+        elif field in TEXT_COLUMNS:
+            columns[field] = objects(getattr(cohort, field))
+        else:
+            raise ValueError(f"Unknown column {field!r}")
+    count = len(performance) if positions is None else len(positions)
+    return orjson.dumps(
+        {"count": count, "columns": columns, "next_cursor": next_cursor}, option=orjson.OPT_SERIALIZE_NUMPY
+    )
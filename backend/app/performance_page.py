@@ -0,0 +1,92 @@
+"""Filtered, sorted, keyset-paginated pages of a computed /reels/performance cohort.
+
+Rows are ordered by the sort key descending, then reel_id ascending, and a cursor is the
+(sort value, reel_id) of the last row served, so pages stay stable while the cohort is
+re-ranked between requests. Filtering is vectorized and the page is picked with a partial
+selection (np.partition) of `limit + 1` candidates, so only the page itself is sorted and
+serialized.
+"""
+
+import base64
+import json
+from dataclasses import dataclass
+from typing import List, Optional, Tuple, Union
+
+import numpy as np
+
+from .metrics_engine import PerformanceColumns
+
+# Sort key -> percentile column that `min_percentile` applies to. performance_score is already
+# a 0-100 blend of the three percentiles, so it is filtered on directly.
+SORT_KEYS = {
+    "performance_score": "performance_score",
+    "views_per_hour": "views_per_hour_percentile",
+    "engagement_rate": "engagement_rate_percentile",
+    "views": "views_percentile",
+    "momentum": "momentum_percentile",
+}
+
+Value = Union[int, float]
+
+
+@dataclass
+class PageRequest:
+    sort: str = "performance_score"
+    limit: Optional[int] = None
+    min_percentile: Optional[float] = None
+    platform: Optional[str] = None
+    after: Optional[Tuple[Value, str]] = None
+
+
+def encode_cursor(sort: str, value: Value, reel_id: str) -> str:
+    raw = json.dumps([sort, value, reel_id], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str) -> Tuple[Value, str]:
+    """Return the (value, reel_id) a cursor points after; ValueError if it is malformed or for another sort."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        cursor_sort, value, reel_id = json.loads(raw)
+    except (ValueError, TypeError) as exc:
+        raise ValueError("Malformed cursor.") from exc
+    if cursor_sort != sort:
+        raise ValueError(f"Cursor was issued for sort={cursor_sort}.")
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not isinstance(reel_id, str):
+        raise ValueError("Malformed cursor.")
+    return value, reel_id
+
+
+def _sort_values(performance: PerformanceColumns, sort: str) -> np.ndarray:
+    return performance.cohort.views if sort == "views" else getattr(performance, sort)
+
+
+def select_page(performance: PerformanceColumns, page: PageRequest) -> Tuple[List[int], Optional[str]]:
+    """Return the row indices of the requested page, in order, and the cursor of the next page."""
+    values = _sort_values(performance, page.sort)
+    reel_ids = performance.cohort.reel_id
+    mask = np.ones(len(performance), dtype=bool)
+    if page.platform is not None:
+        mask &= np.array([platform == page.platform for platform in performance.cohort.platform], dtype=bool)
+    if page.min_percentile is not None:
+        mask &= getattr(performance, SORT_KEYS[page.sort]) >= page.min_percentile
+    if page.after is not None:
+        after_value, after_id = page.after
+        ties = np.flatnonzero(mask & (values == after_value))
+        mask &= values < after_value
+        mask[[i for i in ties.tolist() if reel_ids[i] > after_id]] = True
+
+    candidates = np.flatnonzero(mask)
+    if page.limit is not None and candidates.size > page.limit + 1:
+        # Everything in the top limit + 1 is >= the (limit + 1)-th largest value.
+        candidate_values = values[candidates]
+        boundary = np.partition(candidate_values, candidates.size - page.limit - 1)[candidates.size - page.limit - 1]
+        candidates = candidates[candidate_values >= boundary]
+
+    keys = values[candidates].tolist()
+    ordered = [i for _, i in sorted(zip(keys, candidates.tolist()), key=lambda pair: (-pair[0], reel_ids[pair[1]]))]
+    if page.limit is None or len(ordered) <= page.limit:
+        return ordered, None
+    ordered = ordered[: page.limit]
+    last = ordered[-1]
+    return ordered, encode_cursor(page.sort, values[last].item(), reel_ids[last])
@@ -0,0 +1,150 @@
+"""Materialized-view mode for /reels/performance (PERFORMANCE_SOURCE=view).
+
+reels_performance_mv holds the 7-day cohort with hours since publish, views/hour, engagement
+rate, momentum and their four max-rank percentiles, all as unrounded float8 computed with the same
+IEEE operations as `metrics.py`. Rounding and performance_score stay in Python so the
+rows match the in-process engine exactly for the same `now` (the view's `computed_at`).
+
+Those time-dependent columns are frozen at the refresh, which runs after every ingestion. Once the
+view is older than PERFORMANCE_PRECOMPUTED_MAX_AGE_SECONDS (by default two ingestion intervals, so
+a refresh was missed) or empty, /reels/performance computes the cohort per request instead.
+"""
+
+import logging
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from .cohort_loader import load_cohort
+from .config import settings
+from .db import SessionLocal
+from .metrics_engine import (
+    CohortBuilder,
+    PerformanceColumns,
+    _empty_performance,
+    _outliers,
+    _round_like_python,
+    compute_performance,
+)
+from .snapshot_cache import precomputed_is_stale
+from .telemetry import observe_refresh_failure
+
+logger = logging.getLogger(__name__)
+
+VIEW_NAME = "reels_performance_mv"
+
+# Column order of reels_performance_mv; the view itself is defined in migration 0008.
+VIEW_COLUMNS = (
+    "reel_id",
+    "platform",
+    "reel_url",
+    "publish_time",
+    "latest_scraped_at",
+    "views",
+    "likes",
+    "comments",
+    "shares_or_saves",
+    "prev_views",
+    "prev_scraped_at",
+    "hours_since_publish",
+    "views_per_hour",
+    "engagement_rate",
+    "views_percentile",
+    "views_per_hour_percentile",
+    "engagement_rate_percentile",
+    "momentum",
+    "momentum_percentile",
+    "computed_at",
+)
+# Where the unrounded float8 metrics start in a view row, and where the joined creator columns do.
+_METRICS_START = VIEW_COLUMNS.index("hours_since_publish")
+_CREATOR_START = len(VIEW_COLUMNS)
+
+REFRESH_SQL = text(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {VIEW_NAME}")
+# Every row of a refresh carries the same computed_at.
+COMPUTED_AT_SQL = text(f"SELECT computed_at FROM {VIEW_NAME} LIMIT 1")
+
+
+def refresh_performance_view(session: Session) -> None:
+    """Refresh the view if PERFORMANCE_SOURCE=view; failures are logged and counted, not raised."""
+    if settings.performance_source != "view":
+        return
+    try:
+        session.execute(REFRESH_SQL)
+        session.commit()
+        logger.info("Refreshed %s", VIEW_NAME)
+    except Exception:
+        session.rollback()
+        observe_refresh_failure("performance_view")
+        logger.exception("Refreshing %s failed", VIEW_NAME)
+
+
+# Creator totals are joined at read time, so outlier scores follow persist_events, not refreshes.
+VIEW_QUERY = text(
+    f"""
+    SELECT {", ".join(f"v.{column}" for column in VIEW_COLUMNS)}, l.creator_id, a.video_count, a.total_views
+    FROM {VIEW_NAME} v
+    JOIN reels_latest_state l ON l.reel_id = v.reel_id
+    LEFT JOIN creator_aggregates a ON a.creator_id = l.creator_id
+    """
+)
+
+
+def performance_from_view_rows(rows) -> PerformanceColumns:
+    """Round the view's float8 columns and add performance_score, as metrics_engine does."""
+    builder = CohortBuilder()
+    builder.add([(*row[:_METRICS_START], *row[_CREATOR_START:]) for row in rows])
+    cohort = builder.build()
+    if not rows:
+        return _empty_performance(cohort)
+    computed_at = rows[0][_CREATOR_START - 1]
+
+    floats = np.array([row[_METRICS_START:_CREATOR_START - 1] for row in rows], dtype=np.float64)
+    hours, vph, er, views_pct, vph_pct, er_pct, momentum, momentum_pct = (
+        floats[:, index] for index in range(floats.shape[1])
+    )
+    views_pct, vph_pct, er_pct = (_round_like_python(column, 2) for column in (views_pct, vph_pct, er_pct))
+    outlier_score, outlier_tier = _outliers(cohort)
+    return PerformanceColumns(
+        cohort=cohort,
+        hours_since_publish=_round_like_python(hours, 2),
+        views_per_hour=_round_like_python(vph, 2),
+        engagement_rate=_round_like_python(er, 4),
+        views_percentile=views_pct,
+        views_per_hour_percentile=vph_pct,
+        engagement_rate_percentile=er_pct,
+        performance_score=_round_like_python(0.45 * er_pct + 0.40 * vph_pct + 0.15 * views_pct, 2),
+        momentum=_round_like_python(momentum, 2),
+        momentum_percentile=_round_like_python(momentum_pct, 2),
+        outlier_score=outlier_score,
+        outlier_tier=outlier_tier,
+        computed_at=computed_at,
+    )
+
+
+async def load_performance_view(session: AsyncSession) -> PerformanceColumns:
+    """The view's cohort, or the 7-day cohort computed per request if the view is empty or stale."""
+    computed_at = await session.scalar(COMPUTED_AT_SQL)
+    if computed_at is not None and not precomputed_is_stale(VIEW_NAME, computed_at):
+        return performance_from_view_rows((await session.execute(VIEW_QUERY)).all())
+    now = datetime.now(timezone.utc)
+    return compute_performance(await load_cohort(session, now - timedelta(days=7)), now)
+
+
+def load_performance_view_sync(session: Session) -> PerformanceColumns:
+    return performance_from_view_rows(session.execute(VIEW_QUERY).all())
+
+
+def main():
+    with SessionLocal() as session:
+        session.execute(REFRESH_SQL)
+        session.commit()
+    logger.info("Refreshed %s", VIEW_NAME)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
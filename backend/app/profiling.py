@@ -0,0 +1,126 @@
+"""Opt-in sampling profiles of single /reels/performance requests.
+
+With PROFILING_TOKEN set, a request to a /reels/performance path that carries
+`X-Profile: <token>` runs as usual while a background thread samples the event-loop thread's
+stack every PROFILING_INTERVAL_MS. The response body is then replaced by the profile in folded
+stack format: one `outer;...;inner count` line per distinct stack, which speedscope and
+flamegraph.pl read. The original status is returned in `X-Profile-Status`. With PROFILING_DIR
+set, the profile is also written there and its file name returned in `X-Profile-File`.
+
+Only the event-loop thread is sampled, so other requests running on the same worker at the
+time show up too. A snapshot-cache hit profiles the cache lookup, so profile right after an
+ingestion, or with a query string not requested before, to see the cohort computation.
+"""
+
+import hmac
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = b"x-profile"
+PROFILED_PATH_PREFIX = "/reels/performance"
+
+
+def _frame_label(code) -> str:
+    filename = "/".join(code.co_filename.split(os.sep)[-2:])
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    """Counts one thread's stacks, sampled from a daemon thread every `interval` seconds."""
+
+    def __init__(self, thread_id: int, interval: float):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, name="stack-sampler", daemon=True)
+
+    def _sample(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            labels = []
+            while frame is not None:
+                labels.append(_frame_label(frame.f_code))
+                frame = frame.f_back
+            if labels:
+                self.stacks[";".join(reversed(labels))] += 1
+
+    @property
+    def samples(self) -> int:
+        return sum(self.stacks.values())
+
+    def folded(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def __enter__(self) -> "StackSampler":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._stop.set()
+        self._thread.join()
+
+
+def _requested(scope) -> bool:
+    if not settings.profiling_token or not scope["path"].startswith(PROFILED_PATH_PREFIX):
+        return False
+    for name, value in scope["headers"]:
+        if name == PROFILE_HEADER:
+            return hmac.compare_digest(value, settings.profiling_token.encode())
+    return False
+
+
+def _store(profile: bytes, path: str) -> str:
+    name = f"{datetime.now(timezone.utc):%Y%m%dT%H%M%S%f}{path.replace('/', '_')}.folded"
+    os.makedirs(settings.profiling_dir, exist_ok=True)
+    with open(os.path.join(settings.profiling_dir, name), "wb") as handle:
+        handle.write(profile)
+    return name
+
+
+class ProfilingMiddleware:
+    """Replaces the response of a profiled request with its folded-stack profile (plain ASGI)."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not _requested(scope):
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def discard(message):
+            # The body is produced (streams included) but not sent; only its status is kept.
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+
+        started = time.perf_counter()
+        with StackSampler(threading.get_ident(), settings.profiling_interval_ms / 1000) as sampler:
+            await self.app(scope, receive, discard)
+        seconds = time.perf_counter() - started
+
+        profile = sampler.folded().encode()
+        headers = [
+            (b"content-type", b"text/plain; charset=utf-8"),
+            (b"content-length", str(len(profile)).encode()),
+            (b"x-profile-status", str(status).encode()),
+            (b"x-profile-samples", str(sampler.samples).encode()),
+            (b"x-profile-seconds", f"{seconds:.4f}".encode()),
+        ]
+        if settings.profiling_dir:
+            headers.append((b"x-profile-file", _store(profile, scope["path"]).encode()))
+        logger.info("Profiled %s: %d samples over %.3fs", scope["path"], sampler.samples, seconds)
+        await send({"type": "http.response.start", "status": 200, "headers": headers})
+        await send({"type": "http.response.body", "body": profile})
@@ -0,0 +1,166 @@
+"""Monthly partitions of reels_raw_events, and retention into reels_daily_rollups.
+
+reels_raw_events is range-partitioned by UTC month of scraped_at (migration 0010). Ingestion
+creates the current month's partition and RAW_EVENTS_PARTITION_MONTHS_AHEAD more before it
+writes, and when RAW_EVENTS_RETENTION_DAYS is set, rolls every partition that ended longer ago
+than that into one reels_daily_rollups row per reel and UTC day (last/min/max counters, the last
+snapshot's other fields) and drops it in the same transaction. Dropping a partition is a
+catalog change rather than a DELETE, so retention leaves no dead tuples to vacuum.
+
+reels_snapshot_history presents both tiers as one snapshot stream (a rolled-up day as its
+last snapshot), which is what rebuild_latest_state reads. A reel whose newest snapshot has
+been rolled up gets the previous day's last snapshot as its prev_* values.
+"""
+
+import logging
+import re
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from .config import settings
+from .db import SessionLocal
+from .ingest_totals import add_counts
+
+logger = logging.getLogger(__name__)
+
+_PARTITION_NAME = re.compile(r"^reels_raw_events_p(\d{4})_(\d{2})$")
+
+ENSURE_PARTITIONS_SQL = text(
+    "SELECT reels_raw_events_ensure_partitions(:now, :now + make_interval(months => :months_ahead))"
+)
+
+LIST_PARTITIONS_SQL = text(
+    """
+    SELECT child.relname
+    FROM pg_inherits
+    JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+    WHERE pg_inherits.inhparent = 'reels_raw_events'::regclass
+    ORDER BY child.relname
+    """
+)
+
+# `{partition}` is a name matched by _PARTITION_NAME, so it is safe to format in.
+ROLLUP_SQL = """
+INSERT INTO reels_daily_rollups (
+    reel_id, day, snapshots, first_scraped_at, last_scraped_at,
+    last_views, min_views, max_views, last_likes, min_likes, max_likes,
+    last_comments, min_comments, max_comments,
+    last_shares_or_saves, min_shares_or_saves, max_shares_or_saves,
+    platform, reel_url, publish_time, creator_id, caption_text, audio_id, audio_name,
+    duration_seconds, apify_run_id, source_surface, last_created_at
+)
+SELECT
+    last.reel_id, last.day, days.snapshots, days.first_scraped_at, last.scraped_at,
+    last.views, days.min_views, days.max_views, last.likes, days.min_likes, days.max_likes,
+    last.comments, days.min_comments, days.max_comments,
+    last.shares_or_saves, days.min_shares_or_saves, days.max_shares_or_saves,
+    last.platform, last.reel_url, last.publish_time, last.creator_id, last.caption_text, last.audio_id,
+    last.audio_name, last.duration_seconds, last.apify_run_id, last.source_surface, last.created_at
+FROM (
+    -- Same ordering as rebuild_latest_state, so a day's last row is the one a rebuild would pick.
+    SELECT DISTINCT ON (reel_id, day) r.*, (r.scraped_at AT TIME ZONE 'UTC')::date AS day
+    FROM {partition} r
+    ORDER BY reel_id, day, scraped_at DESC, created_at DESC
+) AS last
+JOIN (
+    SELECT
+        reel_id,
+        (scraped_at AT TIME ZONE 'UTC')::date AS day,
+        count(*) AS snapshots,
+        min(scraped_at) AS first_scraped_at,
+        min(views) AS min_views,
+        max(views) AS max_views,
+        min(likes) AS min_likes,
+        max(likes) AS max_likes,
+        min(comments) AS min_comments,
+        max(comments) AS max_comments,
+        min(shares_or_saves) AS min_shares_or_saves,
+        max(shares_or_saves) AS max_shares_or_saves
+    FROM {partition}
+    GROUP BY 1, 2
+) AS days USING (reel_id, day)
+"""
+
+
+def ensure_partitions(session: Session, now: Optional[datetime] = None, months_ahead: Optional[int] = None) -> int:
+    """Create any missing partitions from `now`'s month through `months_ahead` months later; commits."""
+    now = now or datetime.now(timezone.utc)
+    months_ahead = settings.raw_events_partition_months_ahead if months_ahead is None else months_ahead
+    created = session.execute(ENSURE_PARTITIONS_SQL, {"now": now, "months_ahead": months_ahead}).scalar() or 0
+    session.commit()
+    if created:
+        logger.info("Created %s reels_raw_events partition(s)", created)
+    return created
+
+
+def _month_end(partition: str) -> Optional[datetime]:
+    match = _PARTITION_NAME.match(partition)
+    if not match:
+        return None
+    year, month = int(match.group(1)), int(match.group(2))
+    return datetime(year + month // 12, month % 12 + 1, 1, tzinfo=timezone.utc)
+
+
+def expired_partitions(session: Session, cutoff: datetime) -> List[str]:
+    """Partitions whose whole month is older than `cutoff`, oldest first."""
+    expired = []
+    for name in session.execute(LIST_PARTITIONS_SQL).scalars():
+        month_end = _month_end(name)
+        if month_end is not None and month_end <= cutoff:
+            expired.append(name)
+    return expired
+
+
+def roll_up_partition(session: Session, partition: str) -> int:
+    """Write `partition`'s daily rollups and drop it, without committing; returns the rollup rows."""
+    if not _PARTITION_NAME.match(partition):
+        raise ValueError(f"Not a reels_raw_events partition: {partition!r}")
+    rows = session.execute(text(ROLLUP_SQL.format(partition=partition))).rowcount or 0
+    dropped = session.execute(text(f"SELECT count(*) FROM {partition}")).scalar() or 0
+    session.execute(text(f"DROP TABLE {partition}"))
+    add_counts(session, raw_events=-dropped)
+    return rows
+
+
+def apply_retention(session: Session, now: Optional[datetime] = None, retention_days: Optional[int] = None) -> int:
+    """Roll up and drop every partition older than RAW_EVENTS_RETENTION_DAYS (0 disables); returns rollup rows.
+
+    Each partition is committed on its own; a failure rolls that partition back and is raised,
+    so the raw rows are never dropped without their rollups.
+    """
+    retention_days = settings.raw_events_retention_days if retention_days is None else retention_days
+    if retention_days <= 0:
+        return 0
+    now = now or datetime.now(timezone.utc)
+    total = 0
+    for partition in expired_partitions(session, now - timedelta(days=retention_days)):
+        started = datetime.now(timezone.utc)
+        try:
+            rows = roll_up_partition(session, partition)
+            session.commit()
+        except Exception:
+            session.rollback()
+            logger.error("Rolling up %s failed; keeping its raw events", partition)
+            raise
+        total += rows
+        logger.info(
+            "Rolled %s into %s daily rollups in %.2fs",
+            partition,
+            rows,
+            (datetime.now(timezone.utc) - started).total_seconds(),
+        )
+    return total
+
+
+def main():
+    with SessionLocal() as session:
+        ensure_partitions(session)
+        apply_retention(session)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
@@ -1,85 +1,197 @@
+import argparse
 import logging
+import time
+from datetime import datetime, timezone
+from typing import Callable, Optional
 
-from sqlalchemy import func
-from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy import text
 from sqlalchemy.orm import Session
 
+from .cohort_windows import refresh_cohort_windows
+from .config import settings
+from .creators import recompute_creator_aggregates
 from .db import SessionLocal
-from .models import ReelLatestState, ReelRawEvent
+from .ingest_totals import recount_latest_states, refresh_published_count
+from .models import RebuildCheckpoint
+from .performance_view import refresh_performance_view
+from .snapshot_cache import performance_cache
 
 logger = logging.getLogger(__name__)
 
+JOB_NAME = "rebuild_latest_state"
 
-def rebuild_latest_state(session: Session) -> int:
-    """Rebuilds reels_latest_state from reels_raw_events (latest by scraped_at per reel)."""
-    latest_scrape_subq = (
-        session.query(
-            ReelRawEvent.reel_id.label("reel_id"),
-            func.max(ReelRawEvent.scraped_at).label("max_scraped_at"),
-        )
-        .group_by(ReelRawEvent.reel_id)
-        .subquery()
-    )
+# Upper reel_id of the next chunk of at most :chunk_size distinct reels after :after.
+NEXT_BOUNDARY_SQL = """
+SELECT max(reel_id) FROM (
+    SELECT DISTINCT reel_id
+    FROM reels_snapshot_history
+    WHERE reel_id > :after {touched}
+    ORDER BY reel_id
+    LIMIT :chunk_size
+) AS chunk
+"""
 
-    latest_rows = (
-        session.query(ReelRawEvent)
-        .join(
-            latest_scrape_subq,
-            (ReelRawEvent.reel_id == latest_scrape_subq.c.reel_id)
-            & (ReelRawEvent.scraped_at == latest_scrape_subq.c.max_scraped_at),
-        )
-        .all()
+# Runs entirely server-side: the newest snapshot per reel in (:after, :upper] is upserted directly,
+# with the snapshot before it as the previous one. reels_snapshot_history covers raw events and
+# the days retention has rolled up (see raw_event_retention.py).
+REBUILD_RANGE_SQL = """
+INSERT INTO reels_latest_state (
+    reel_id, platform, reel_url, publish_time, latest_views, latest_likes, latest_comments,
+    latest_shares_or_saves, latest_scraped_at, prev_views, prev_scraped_at, creator_id, caption_text,
+    audio_id, audio_name, duration_seconds, last_raw_event_at, updated_at
+)
+SELECT
+    reel_id, platform, reel_url, publish_time, views, likes, comments,
+    shares_or_saves, scraped_at, prev_views, prev_scraped_at, creator_id, caption_text,
+    audio_id, audio_name, duration_seconds, scraped_at, now()
+FROM (
+    SELECT
+        r.*,
+        row_number() OVER snapshots AS position,
+        lead(views) OVER snapshots AS prev_views,
+        lead(scraped_at) OVER snapshots AS prev_scraped_at
+    FROM reels_snapshot_history r
+    WHERE reel_id > :after AND reel_id <= :upper {touched_reels}
+    WINDOW snapshots AS (PARTITION BY reel_id ORDER BY scraped_at DESC, created_at DESC)
+) AS ranked
+WHERE position = 1
+ON CONFLICT (reel_id) DO UPDATE SET
+    platform = EXCLUDED.platform,
+    reel_url = EXCLUDED.reel_url,
+    publish_time = EXCLUDED.publish_time,
+    latest_views = EXCLUDED.latest_views,
+    latest_likes = EXCLUDED.latest_likes,
+    latest_comments = EXCLUDED.latest_comments,
+    latest_shares_or_saves = EXCLUDED.latest_shares_or_saves,
+    -- Suppressed (unchanged) snapshots can leave latest_scraped_at newer than the last raw row.
+    latest_scraped_at = GREATEST(EXCLUDED.latest_scraped_at, reels_latest_state.latest_scraped_at),
+    prev_views = EXCLUDED.prev_views,
+    prev_scraped_at = EXCLUDED.prev_scraped_at,
+    creator_id = COALESCE(EXCLUDED.creator_id, reels_latest_state.creator_id),
+    caption_text = EXCLUDED.caption_text,
+    audio_id = EXCLUDED.audio_id,
+    audio_name = EXCLUDED.audio_name,
+    duration_seconds = EXCLUDED.duration_seconds,
+    last_raw_event_at = EXCLUDED.last_raw_event_at,
+    updated_at = EXCLUDED.updated_at
+"""
+
+
+def _touched_filter(since: Optional[datetime]) -> str:
+    # A touched reel's newest snapshot is itself newer than `since`, so filtering rows is enough.
+    return "AND scraped_at >= :since" if since else ""
+
+
+def _touched_reels_filter(since: Optional[datetime]) -> str:
+    # The previous snapshot may predate `since`, so keep every row of the touched reels.
+    if not since:
+        return ""
+    return (
+        "AND reel_id IN (SELECT reel_id FROM reels_snapshot_history "
+        "WHERE reel_id > :after AND reel_id <= :upper AND scraped_at >= :since)"
     )
 
-    if not latest_rows:
-        logger.warning("No rows found in reels_raw_events to rebuild latest state.")
-        return 0
-
-    payload = []
-    for row in latest_rows:
-        payload.append(
-            {
-                "reel_id": row.reel_id,
-                "platform": row.platform,
-                "reel_url": row.reel_url,
-                "publish_time": row.publish_time,
-                "latest_views": row.views,
-                "latest_likes": row.likes,
-                "latest_comments": row.comments,
-                "latest_shares_or_saves": row.shares_or_saves,
-                "latest_scraped_at": row.scraped_at,
-                "caption_text": row.caption_text,
-                "audio_id": row.audio_id,
-                "audio_name": row.audio_name,
-                "duration_seconds": row.duration_seconds,
-            }
+
+def rebuild_latest_state(
+    session: Session,
+    chunk_size: Optional[int] = None,
+    since: Optional[datetime] = None,
+    resume: bool = False,
+    progress: Optional[Callable[[int, int, str], None]] = None,
+) -> int:
+    """Rebuilds reels_latest_state from reels_snapshot_history (latest by scraped_at per reel).
+
+    Works in reel_id key ranges of `chunk_size` reels, committing each range together with a
+    checkpoint row so an interrupted rebuild continues where it stopped when `resume` is set.
+    With `since`, only reels that have raw events scraped at or after it are rebuilt.
+    `progress(chunks, rows, last_reel_id)` is called after every committed chunk.
+    """
+    chunk_size = chunk_size or settings.rebuild_chunk_size
+    now = datetime.now(timezone.utc)
+    checkpoint = session.get(RebuildCheckpoint, JOB_NAME)
+    if resume and checkpoint is not None and checkpoint.finished_at is None:
+        since = checkpoint.touched_since
+        logger.info("Resuming rebuild after reel_id %r (%s rows done)", checkpoint.last_reel_id, checkpoint.rows_rebuilt)
+    else:
+        if checkpoint is None:
+            checkpoint = RebuildCheckpoint(job_name=JOB_NAME)
+            session.add(checkpoint)
+        checkpoint.last_reel_id = None
+        checkpoint.touched_since = since
+        checkpoint.rows_rebuilt = 0
+        checkpoint.started_at = now
+        checkpoint.updated_at = now
+        checkpoint.finished_at = None
+        session.commit()
+
+    touched = _touched_filter(since)
+    next_boundary = text(NEXT_BOUNDARY_SQL.format(touched=touched))
+    rebuild_range = text(REBUILD_RANGE_SQL.format(touched_reels=_touched_reels_filter(since)))
+    params = {"since": since} if since else {}
+
+    chunks = 0
+    started = time.monotonic()
+    after = checkpoint.last_reel_id or ""
+    while True:
+        upper = session.execute(next_boundary, {**params, "after": after, "chunk_size": chunk_size}).scalar()
+        if upper is None:
+            break
+        rows = session.execute(rebuild_range, {**params, "after": after, "upper": upper}).rowcount or 0
+
+        checkpoint.last_reel_id = upper
+        checkpoint.rows_rebuilt += rows
+        checkpoint.updated_at = datetime.now(timezone.utc)
+        session.commit()
+        performance_cache.invalidate()
+
+        chunks += 1
+        after = upper
+        elapsed = time.monotonic() - started
+        logger.info(
+            "Rebuild chunk %s: %s rows through reel_id %r (%s total, %.0f rows/s)",
+            chunks,
+            rows,
+            upper,
+            checkpoint.rows_rebuilt,
+            checkpoint.rows_rebuilt / elapsed if elapsed else 0,
         )
+        if progress:
+            progress(chunks, checkpoint.rows_rebuilt, upper)
 
-    insert_stmt = insert(ReelLatestState).values(payload)
-    upsert_stmt = insert_stmt.on_conflict_do_update(
-        index_elements=[ReelLatestState.reel_id],
-        set_={
-            "platform": insert_stmt.excluded.platform,
-            "reel_url": insert_stmt.excluded.reel_url,
-            "publish_time": insert_stmt.excluded.publish_time,
-            "latest_views": insert_stmt.excluded.latest_views,
-            "latest_likes": insert_stmt.excluded.latest_likes,
-            "latest_comments": insert_stmt.excluded.latest_comments,
-            "latest_shares_or_saves": insert_stmt.excluded.latest_shares_or_saves,
-            "latest_scraped_at": insert_stmt.excluded.latest_scraped_at,
-            "caption_text": insert_stmt.excluded.caption_text,
-            "audio_id": insert_stmt.excluded.audio_id,
-            "audio_name": insert_stmt.excluded.audio_name,
-            "duration_seconds": insert_stmt.excluded.duration_seconds,
-        },
-    )
-    session.execute(upsert_stmt)
+    # Chunks bypass the incremental creator deltas and ingest_totals, so both are recomputed once at the end.
+    recompute_creator_aggregates(session)
+    recount_latest_states(session)
+    refresh_published_count(session)
+    session.commit()
+    refresh_performance_view(session)
+    refresh_cohort_windows(session)
+    checkpoint.finished_at = datetime.now(timezone.utc)
+    checkpoint.updated_at = checkpoint.finished_at
     session.commit()
-    logger.info("Rebuilt latest_state with %s rows", len(payload))
-    return len(payload)
+    performance_cache.invalidate()
+    if not checkpoint.rows_rebuilt:
+        logger.warning("No rows found in reels_snapshot_history to rebuild latest state.")
+    logger.info("Rebuilt latest_state with %s rows", checkpoint.rows_rebuilt)
+    return checkpoint.rows_rebuilt
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild reels_latest_state from reels_raw_events.")
+    parser.add_argument("--chunk-size", type=int, default=settings.rebuild_chunk_size, help="Reels per chunk.")
+    parser.add_argument(
+        "--since",
+        type=datetime.fromisoformat,
+        help="Only rebuild reels with raw events scraped at or after this ISO timestamp.",
+    )
+    parser.add_argument("--resume", action="store_true", help="Continue an interrupted rebuild from its checkpoint.")
+    args = parser.parse_args()
+    since = args.since
+    if since and since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    with SessionLocal() as session:
+        rebuild_latest_state(session, chunk_size=args.chunk_size, since=since, resume=args.resume)
 
 
 if __name__ == "__main__":
     logging.basicConfig(level=logging.INFO)
-    with SessionLocal() as session:
-        rebuild_latest_state(session)
+    main()
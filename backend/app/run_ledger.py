@@ -0,0 +1,111 @@
+"""Per-run ingestion ledger backed by the ingestion_runs table."""
+
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from .models import IngestionRun
+
+STAGES = ("fetch", "map", "insert_raw", "upsert_latest", "retention")
+
+
+@dataclass
+class IngestionStats:
+    """Counters and wall-clock stage durations accumulated across one run."""
+
+    items_received: int = 0
+    items_mapped: int = 0
+    events_inserted: int = 0
+    events_suppressed: int = 0
+    response_bytes: int = 0
+    fetch_seconds: float = 0.0
+    map_seconds: float = 0.0
+    insert_raw_seconds: float = 0.0
+    upsert_latest_seconds: float = 0.0
+    retention_seconds: float = 0.0
+
+    @property
+    def items_dropped(self) -> int:
+        return self.items_received - self.items_mapped
+
+    @contextmanager
+    def timed(self, stage: str):
+        """Add the wall-clock time spent in the block to `<stage>_seconds`."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            attr = f"{stage}_seconds"
+            setattr(self, attr, getattr(self, attr) + time.perf_counter() - started)
+
+
+def start_run(session: Session, platforms: Iterable[str]) -> IngestionRun:
+    """Insert and commit a `running` ledger row so in-flight runs are visible."""
+    run = IngestionRun(
+        platform=", ".join(sorted(set(platforms))),
+        started_at=datetime.now(timezone.utc),
+        status="running",
+    )
+    session.add(run)
+    session.commit()
+    return run
+
+
+def finish_run(
+    session: Session,
+    run: IngestionRun,
+    stats: IngestionStats,
+    status: str,
+    apify_run_id: Optional[str] = None,
+    error: Optional[str] = None,
+) -> None:
+    run.status = status
+    run.apify_run_id = apify_run_id
+    run.error_message = error
+    run.finished_at = datetime.now(timezone.utc)
+    run.events_ingested = stats.events_inserted
+    run.events_suppressed = stats.events_suppressed
+    run.items_received = stats.items_received
+    run.items_mapped = stats.items_mapped
+    run.items_dropped = stats.items_dropped
+    run.response_bytes = stats.response_bytes
+    for stage in STAGES:
+        setattr(run, f"{stage}_seconds", round(getattr(stats, f"{stage}_seconds"), 4))
+    session.commit()
+
+
+def recent_runs(session: Session, limit: int) -> List[IngestionRun]:
+    return list(session.scalars(select(IngestionRun).order_by(IngestionRun.started_at.desc()).limit(limit)))
+
+
+def stage_timings(session: Session, limit: int) -> Dict[str, Dict[str, Optional[float]]]:
+    """Return p50/p95 seconds per stage (and in total) over the last `limit` succeeded runs."""
+    recent = (
+        select(IngestionRun)
+        .where(IngestionRun.status == "succeeded")
+        .order_by(IngestionRun.started_at.desc())
+        .limit(limit)
+        .subquery()
+    )
+    columns = {stage: getattr(recent.c, f"{stage}_seconds") for stage in STAGES}
+    columns["total"] = func.extract("epoch", recent.c.finished_at - recent.c.started_at)
+
+    selected = []
+    for column in columns.values():
+        selected.append(func.percentile_cont(0.5).within_group(column))
+        selected.append(func.percentile_cont(0.95).within_group(column))
+    row = session.execute(select(*selected)).one()
+
+    timings = {}
+    for index, name in enumerate(columns):
+        p50, p95 = row[2 * index], row[2 * index + 1]
+        timings[name] = {
+            "p50": round(float(p50), 4) if p50 is not None else None,
+            "p95": round(float(p95), 4) if p95 is not None else None,
+        }
+    return timings
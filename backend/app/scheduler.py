@@ -2,9 +2,9 @@ import logging
 
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 
-from . import ingestion
 from .config import settings
-from .db import SessionLocal
+from .jobs import ingestion_jobs
+from .sources import configured_feeds
 
 logger = logging.getLogger(__name__)
 
@@ -15,19 +15,15 @@ class IngestionScheduler:
         self.started = False
 
     async def _run_ingestion(self):
-        session = SessionLocal()
-        try:
-            result = ingestion.run_ingestion(session)
-            logger.info("Scheduled ingestion complete: %s", result)
-        except Exception:
-            logger.exception("Scheduled ingestion failed")
-        finally:
-            session.close()
+        # Only enqueues: the job runs on the ingestion worker thread, not on the event loop.
+        job, created = ingestion_jobs.submit("scheduled")
+        if not created:
+            logger.info("Scheduled ingestion skipped; job %s is still %s", job.id, job.status)
 
     def start(self):
         if self.started:
             return
-        if not settings.apify_api_token or not settings.apify_actor_id:
+        if not settings.apify_api_token or not configured_feeds():
             logger.warning("Apify credentials missing; skipping scheduler start.")
             return
         self.scheduler.add_job(self._run_ingestion, "interval", hours=settings.ingestion_interval_hours)
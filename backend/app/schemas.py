@@ -1,5 +1,6 @@
 from datetime import datetime
-from typing import List, Optional
+from uuid import UUID
+from typing import Dict, List, Optional
 
 from pydantic import BaseModel, HttpUrl
 
@@ -21,15 +22,101 @@ class ReelPerformance(BaseModel):
     views_per_hour_percentile: float
     engagement_rate_percentile: float
     performance_score: float
+    # Views/hour between the previous and latest snapshots (from publish time until a reel has two).
+    momentum: float
+    momentum_percentile: float
+    creator_id: Optional[str] = None
+    # views / the creator's average views excluding this reel; null until the creator has two reels.
+    outlier_score: Optional[float] = None
+    outlier_tier: Optional[str] = None
+
+
+class CreatorReel(BaseModel):
+    reel_id: str
+    reel_url: HttpUrl
+    publish_time: datetime
+    views: int
+    outlier_score: Optional[float]
+    outlier_tier: Optional[str]
+
+
+class CreatorSummary(BaseModel):
+    creator_id: str
+    platform: str
+    video_count: int
+    total_views: int
+    average_views: float
+
+
+class CreatorList(BaseModel):
+    items: List[CreatorSummary]
+
+
+class CreatorDetail(CreatorSummary):
+    reels: List[CreatorReel]
 
 
 class IngestResult(BaseModel):
     ingested_count: int
+    suppressed_count: int = 0
     apify_run_id: str
 
 
+class IngestJobProgress(BaseModel):
+    items_received: int
+    items_mapped: int
+    events_inserted: int
+    events_suppressed: int
+
+
+class IngestJob(BaseModel):
+    id: str
+    trigger: str
+    status: str
+    created_at: datetime
+    started_at: Optional[datetime]
+    finished_at: Optional[datetime]
+    progress: IngestJobProgress
+    result: Optional[IngestResult]
+    error: Optional[str]
+
+    class Config:
+        orm_mode = True
+
+
 class ReelPerformanceList(BaseModel):
     items: List[ReelPerformance]
+    # Pass as `cursor` to get the next page; null on the last page and when `limit` is not set.
+    next_cursor: Optional[str] = None
+
+
+class IngestionRunSummary(BaseModel):
+    id: UUID
+    apify_run_id: Optional[str]
+    platform: Optional[str]
+    status: str
+    started_at: datetime
+    finished_at: Optional[datetime]
+    events_ingested: int
+    events_suppressed: int
+    items_received: int
+    items_mapped: int
+    items_dropped: int
+    response_bytes: int
+    fetch_seconds: Optional[float]
+    map_seconds: Optional[float]
+    insert_raw_seconds: Optional[float]
+    upsert_latest_seconds: Optional[float]
+    retention_seconds: Optional[float]
+    error_message: Optional[str]
+
+    class Config:
+        orm_mode = True
+
+
+class StageTiming(BaseModel):
+    p50: Optional[float]
+    p95: Optional[float]
 
 
 class IngestStatus(BaseModel):
@@ -39,3 +126,13 @@ class IngestStatus(BaseModel):
     total_raw_events: int
     latest_state_count: int
     reels_published_last_7d: int
+    # When reels_published_last_7d was counted (end of the last run or rebuild); it lags until the next one.
+    published_counted_at: Optional[datetime] = None
+    # "maintained" (ingest_totals) or "estimated" (planner statistics) totals, see INGEST_STATUS_COUNTS.
+    totals_source: str = "maintained"
+    totals_updated_at: Optional[datetime] = None
+
+
+class IngestRuns(BaseModel):
+    recent_runs: List[IngestionRunSummary]
+    stage_timings: Dict[str, StageTiming]
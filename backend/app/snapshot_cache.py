@@ -0,0 +1,169 @@
+"""In-process cache of serialized API responses keyed to the latest ingestion.
+
+A snapshot is reused until one of these happens:
+- this process commits new data (`invalidate()`, called by the persist and rebuild paths);
+- the data version read from the database changes, which covers commits by other processes;
+- it is older than `max_staleness_seconds`, which bounds drift in time-dependent fields such
+  as `hours_since_publish`.
+
+Besides serialized bodies, `get_or_compute` caches intermediate results (the computed cohort
+that every page of /reels/performance is cut from) under the same rules.
+"""
+
+import asyncio
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+# Changes whenever an ingestion run finishes or a rebuild commits a chunk.
+DATA_VERSION_SQL = text(
+    """
+    SELECT concat_ws('/',
+        (SELECT max(finished_at) FROM ingestion_runs),
+        (SELECT max(updated_at) FROM rebuild_checkpoints)
+    )
+    """
+)
+
+
+@dataclass
+class Snapshot:
+    body: Any  # response bytes, or the object cached by get_or_compute
+    etag: Optional[str]
+    data_version: str
+    generation: int
+    built_at: float
+
+
+@dataclass
+class _Entry:
+    # The lock lives with the entry, so it is evicted with it.
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+    snapshot: Optional[Snapshot] = None
+
+
+async def data_version(session: AsyncSession) -> str:
+    return await session.scalar(DATA_VERSION_SQL) or ""
+
+
+# The refresh each precomputed source was last reported stale for.
+_reported_stale: Dict[str, datetime] = {}
+
+
+def precomputed_max_age_seconds() -> float:
+    return settings.performance_precomputed_max_age_seconds or 2 * settings.ingestion_interval_hours * 3600
+
+
+def precomputed_is_stale(source: str, computed_at: datetime) -> bool:
+    """Whether `source`, refreshed at `computed_at`, is older than PERFORMANCE_PRECOMPUTED_MAX_AGE_SECONDS.
+
+    The data only changes with ingestion, which refreshes it, so the budget follows the ingestion
+    interval. A stale refresh is logged by the first request that finds it, not by every request.
+    """
+    if (datetime.now(timezone.utc) - computed_at).total_seconds() <= precomputed_max_age_seconds():
+        return False
+    if _reported_stale.get(source) != computed_at:
+        _reported_stale[source] = computed_at
+        logger.warning("%s was refreshed at %s; computing per request until the next refresh", source, computed_at)
+    return True
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against `etag`, as RFC 9110 requires for GET."""
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in (tag[2:] if tag.startswith("W/") else tag for tag in candidates)
+
+
+def encoding_etag(etag: str, coding: str) -> str:
+    """The strong ETag of one content coding of a representation, e.g. `"abc-gzip"`."""
+    return f'{etag[:-1]}-{coding}"'
+
+
+def accepts_encoding(accept_encoding: Optional[str], coding: str) -> bool:
+    """Whether an Accept-Encoding header allows `coding`; `q=0` refuses it, `*` stands for unlisted codings."""
+    qualities = {}
+    for item in (accept_encoding or "").split(","):
+        name, _, params = item.partition(";")
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if name.strip():
+            qualities[name.strip().lower()] = quality
+    return qualities.get(coding, qualities.get("*", 0.0)) > 0
+
+
+class SnapshotCache:
+    def __init__(self, max_staleness_seconds: int, max_entries: int = 256):
+        self.max_staleness_seconds = max_staleness_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._generation = 0
+
+    def invalidate(self) -> None:
+        # Called from ingestion worker threads; a plain int bump is safe under the GIL.
+        self._generation += 1
+
+    def _fresh(self, snapshot: Optional[Snapshot], version: str) -> bool:
+        return (
+            snapshot is not None
+            and snapshot.generation == self._generation
+            and snapshot.data_version == version
+            and time.monotonic() - snapshot.built_at < self.max_staleness_seconds
+        )
+
+    async def _make(self, version: str, make: Callable[[], Awaitable[Any]], etag: bool) -> Snapshot:
+        generation = self._generation
+        body = await make()
+        return Snapshot(
+            body=body,
+            etag=f'"{hashlib.sha1(body).hexdigest()}"' if etag else None,
+            data_version=version,
+            generation=generation,
+            built_at=time.monotonic(),
+        )
+
+    async def _get_or_make(self, key: str, version: str, make: Callable[[], Awaitable[Any]], etag: bool) -> Snapshot:
+        if self.max_staleness_seconds <= 0:
+            return await self._make(version, make, etag)
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = self._entries[key] = _Entry()
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        self._entries.move_to_end(key)
+        if self._fresh(entry.snapshot, version):
+            return entry.snapshot
+        # One lock per key, so a page build can itself wait on the cohort entry.
+        async with entry.lock:
+            if not self._fresh(entry.snapshot, version):
+                entry.snapshot = await self._make(version, make, etag)
+            return entry.snapshot
+
+    async def get_or_build(self, key: str, version: str, build: Callable[[], Awaitable[bytes]]) -> Snapshot:
+        """Return the cached snapshot for `key`, rebuilding it once (not once per waiter) when stale."""
+        return await self._get_or_make(key, version, build, etag=True)
+
+    async def get_or_compute(self, key: str, version: str, compute: Callable[[], Awaitable[Any]]) -> Any:
+        """Like `get_or_build`, for a value that is not a response body; returns the value itself."""
+        return (await self._get_or_make(key, version, compute, etag=False)).body
+
+
+performance_cache = SnapshotCache(settings.performance_cache_max_staleness_seconds)
@@ -0,0 +1,319 @@
+"""Source adapters: one per platform, each owning its Apify fetch and field mapping.
+
+Adapters register themselves in `SOURCE_ADAPTERS` keyed by platform. Feeds (an actor plus its
+input and surface) are configured with `APIFY_FEEDS_JSON`, e.g.
+
+    [{"platform": "instagram", "actor_id": "apify~instagram-reel-scraper"},
+     {"platform": "tiktok", "actor_id": "clockworks~tiktok-scraper",
+      "input": {"hashtags": ["fyp"]}, "source_surface": "hashtag_fyp"}]
+
+Without it, a single Instagram feed is built from `APIFY_ACTOR_ID` / `APIFY_INPUT_JSON`.
+"""
+
+import json
+import logging
+import os
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import requests
+
+from . import apify
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Feed:
+    platform: str
+    actor_id: str
+    actor_input: Dict[str, object]
+    source_surface: str
+
+
+def _parse_datetime(value: Optional[object]) -> Optional[datetime]:
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return datetime.fromtimestamp(value, tz=timezone.utc)
+    if isinstance(value, str):
+        for fmt in ("%Y-%m-%dT%H:%M:%S.%fZ", "%Y-%m-%dT%H:%M:%SZ", "%Y-%m-%d %H:%M:%S", "%Y-%m-%dT%H:%M:%S"):
+            try:
+                return datetime.strptime(value, fmt).replace(tzinfo=timezone.utc)
+            except ValueError:
+                continue
+        try:
+            return datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except Exception:
+            logger.debug("Unable to parse datetime: %s", value)
+    return None
+
+
+def _parse_duration(value: Optional[object]) -> Optional[float]:
+    """Accept seconds as a number or an `[HH:]MM:SS` string."""
+    if value is None or isinstance(value, (int, float)):
+        return value
+    seconds = 0.0
+    try:
+        for part in str(value).split(":"):
+            seconds = seconds * 60 + float(part)
+    except ValueError:
+        return None
+    return seconds
+
+
+def _canonical_url(item: Dict[str, object]) -> Optional[str]:
+    url = item.get("url") or item.get("link")
+    if url:
+        return url
+    shortcode = item.get("shortCode") or item.get("code")
+    if shortcode:
+        return f"https://www.instagram.com/reel/{shortcode}/"
+    return None
+
+
+def _map_apify_item(
+    item: Dict[str, object], scraped_at: datetime, apify_run_id: str, source_surface: str = "reels_feed"
+) -> Optional[Dict[str, object]]:
+    reel_id = item.get("id") or item.get("itemId") or item.get("shortCode")
+    if not reel_id:
+        return None
+
+    reel_url = _canonical_url(item)
+    if not reel_url:
+        return None
+
+    publish_time = (
+        _parse_datetime(item.get("publishDate"))
+        or _parse_datetime(item.get("takenAt"))
+        or _parse_datetime(item.get("takenAtTimestamp"))
+        or _parse_datetime(item.get("timestamp"))
+    )
+    if not publish_time:
+        return None
+
+    views = item.get("playsCount") or item.get("playCount") or item.get("views") or 0
+    likes = item.get("likesCount") or item.get("likeCount") or item.get("likes") or 0
+    comments = item.get("commentsCount") or item.get("commentCount") or item.get("comments") or 0
+    shares = item.get("savesCount") or item.get("shareCount") or item.get("shares") or None
+    creator_id = item.get("ownerId") or item.get("ownerUsername")
+
+    mapped = {
+        "reel_id": str(reel_id),
+        "platform": "instagram",
+        "reel_url": reel_url,
+        "scraped_at": scraped_at,
+        "publish_time": publish_time,
+        "views": int(views),
+        "likes": int(likes),
+        "comments": int(comments),
+        "shares_or_saves": int(shares) if shares is not None else None,
+        "creator_id": str(creator_id) if creator_id else None,
+        "caption_text": item.get("caption") or item.get("title"),
+        "audio_id": item.get("musicId") or item.get("audioId"),
+        "audio_name": item.get("musicTitle") or item.get("audioName"),
+        "duration_seconds": item.get("duration") or item.get("videoDuration"),
+        "apify_run_id": apify_run_id,
+        "source_surface": source_surface,
+    }
+    return mapped
+
+
+class SourceAdapter:
+    """Base adapter. Subclasses set `platform`/`default_surface` and implement `map_item`."""
+
+    platform: str = ""
+    default_surface: str = ""
+
+    def default_input(self) -> Dict[str, object]:
+        return {"resultsLimit": settings.apify_max_results, "proxy": {"useApifyProxy": True}}
+
+    def map_item(
+        self, item: Dict[str, object], scraped_at: datetime, apify_run_id: str, source_surface: str
+    ) -> Optional[Dict[str, object]]:
+        raise NotImplementedError
+
+    def map_items(
+        self, items: List[Dict[str, object]], scraped_at: datetime, apify_run_id: str, source_surface: str
+    ) -> List[Dict[str, object]]:
+        events = []
+        for item in items:
+            mapped = self.map_item(item, scraped_at, apify_run_id, source_surface)
+            if mapped:
+                events.append(mapped)
+        return events
+
+    def iter_pages(
+        self, http: requests.Session, feed: Feed, stream: bool
+    ) -> Iterator[Tuple[str, List[Dict[str, object]], int]]:
+        """Yield (apify_run_id, items, response_bytes) pages; sync mode yields the whole dataset as one page."""
+        if stream:
+            run = apify.start_run(http, feed.actor_id, feed.actor_input)
+            for page, response_bytes in apify.iter_dataset_pages(http, run):
+                yield run["id"], page, response_bytes
+        else:
+            items, run_id, response_bytes = apify.run_actor_sync(http, feed.actor_id, feed.actor_input)
+            yield run_id, items, response_bytes
+
+
+SOURCE_ADAPTERS: Dict[str, SourceAdapter] = {}
+
+
+def register_adapter(cls):
+    """Class decorator that registers an adapter instance under its platform."""
+    SOURCE_ADAPTERS[cls.platform] = cls()
+    return cls
+
+
+def get_adapter(platform: str) -> SourceAdapter:
+    try:
+        return SOURCE_ADAPTERS[platform]
+    except KeyError:
+        raise ValueError(f"No source adapter registered for platform '{platform}'.") from None
+
+
+@register_adapter
+class InstagramReelsAdapter(SourceAdapter):
+    platform = "instagram"
+    default_surface = "reels_feed"
+
+    def __init__(self):
+        # Learned mappers for the most recent runs, so every streamed page of a run reuses one.
+        self._run_mappers: "OrderedDict[str, object]" = OrderedDict()
+
+    def default_input(self) -> Dict[str, object]:
+        return {
+            "resultsLimit": settings.apify_max_results,
+            "scrapeType": "RECOMMENDED",
+            "maxRequestRetries": 2,
+            "maxConcurrency": 10,
+            "proxy": {"useApifyProxy": True},
+        }
+
+    def map_item(self, item, scraped_at, apify_run_id, source_surface):
+        return _map_apify_item(item, scraped_at, apify_run_id, source_surface)
+
+    def map_items(self, items, scraped_at, apify_run_id, source_surface):
+        if settings.mapper_sample_size <= 0:
+            return super().map_items(items, scraped_at, apify_run_id, source_surface)
+
+        from .compiled_mapper import learn_item_mapper
+
+        if apify_run_id == apify.UNKNOWN_RUN_ID:
+            # Responses without a run id cannot be told apart, so nothing learned from one is reused.
+            return learn_item_mapper(items[: settings.mapper_sample_size]).map_items(
+                items, scraped_at, apify_run_id, source_surface
+            )
+        mapper = self._run_mappers.get(apify_run_id)
+        if mapper is None:
+            mapper = learn_item_mapper(items[: settings.mapper_sample_size])
+            self._run_mappers[apify_run_id] = mapper
+            while len(self._run_mappers) > 16:
+                self._run_mappers.popitem(last=False)
+        return mapper.map_items(items, scraped_at, apify_run_id, source_surface)
+
+
+@register_adapter
+class TikTokAdapter(SourceAdapter):
+    """Maps clockworks/tiktok-scraper style items."""
+
+    platform = "tiktok"
+    default_surface = "for_you_feed"
+
+    def map_item(self, item, scraped_at, apify_run_id, source_surface):
+        video_id = item.get("id")
+        reel_url = item.get("webVideoUrl") or item.get("url")
+        publish_time = _parse_datetime(item.get("createTimeISO")) or _parse_datetime(item.get("createTime"))
+        if not video_id or not reel_url or not publish_time:
+            return None
+        music = item.get("musicMeta") or {}
+        video = item.get("videoMeta") or {}
+        author = item.get("authorMeta") or {}
+        creator_id = author.get("id") or author.get("name")
+        shares = item.get("shareCount")
+        return {
+            # Prefixed so ids cannot collide with Instagram reel ids in reels_latest_state.
+            "reel_id": f"tiktok:{video_id}",
+            "platform": self.platform,
+            "reel_url": reel_url,
+            "scraped_at": scraped_at,
+            "publish_time": publish_time,
+            "views": int(item.get("playCount") or 0),
+            "likes": int(item.get("diggCount") or 0),
+            "comments": int(item.get("commentCount") or 0),
+            "shares_or_saves": int(shares) if shares is not None else None,
+            "creator_id": f"tiktok:{creator_id}" if creator_id else None,
+            "caption_text": item.get("text"),
+            "audio_id": music.get("musicId"),
+            "audio_name": music.get("musicName"),
+            "duration_seconds": _parse_duration(video.get("duration")),
+            "apify_run_id": apify_run_id,
+            "source_surface": source_surface,
+        }
+
+
+@register_adapter
+class YouTubeShortsAdapter(SourceAdapter):
+    """Maps streamers/youtube-shorts-scraper style items."""
+
+    platform = "youtube"
+    default_surface = "shorts_feed"
+
+    def map_item(self, item, scraped_at, apify_run_id, source_surface):
+        video_id = item.get("id")
+        publish_time = _parse_datetime(item.get("date")) or _parse_datetime(item.get("uploadDate"))
+        if not video_id or not publish_time:
+            return None
+        channel_id = item.get("channelId") or item.get("channelName")
+        return {
+            "reel_id": f"youtube:{video_id}",
+            "platform": self.platform,
+            "reel_url": item.get("url") or f"https://www.youtube.com/shorts/{video_id}",
+            "scraped_at": scraped_at,
+            "publish_time": publish_time,
+            "views": int(item.get("viewCount") or 0),
+            "likes": int(item.get("likes") or 0),
+            "comments": int(item.get("commentsCount") or 0),
+            "shares_or_saves": None,
+            "creator_id": f"youtube:{channel_id}" if channel_id else None,
+            "caption_text": item.get("title"),
+            "audio_id": None,
+            "audio_name": None,
+            "duration_seconds": _parse_duration(item.get("duration")),
+            "apify_run_id": apify_run_id,
+            "source_surface": source_surface,
+        }
+
+
+def configured_feeds() -> List[Feed]:
+    """Return the feeds a run should fan out over."""
+    if settings.apify_feeds_json:
+        feeds = []
+        for entry in json.loads(settings.apify_feeds_json):
+            adapter = get_adapter(entry["platform"])
+            feeds.append(
+                Feed(
+                    platform=adapter.platform,
+                    actor_id=entry["actor_id"],
+                    actor_input=entry.get("input") or adapter.default_input(),
+                    source_surface=entry.get("source_surface") or adapter.default_surface,
+                )
+            )
+        return feeds
+
+    if not settings.apify_actor_id:
+        return []
+    adapter = get_adapter("instagram")
+    # Allow override via APIFY_INPUT_JSON for quick iteration.
+    custom_input = os.getenv("APIFY_INPUT_JSON")
+    return [
+        Feed(
+            platform=adapter.platform,
+            actor_id=settings.apify_actor_id,
+            actor_input=json.loads(custom_input) if custom_input else adapter.default_input(),
+            source_surface=adapter.default_surface,
+        )
+    ]
@@ -0,0 +1,153 @@
+"""Prometheus metrics for the API process, served at /metrics.
+
+- `shortpulse_http_request_duration_seconds{method,route,status}`: latency per route template,
+  measured until the last body chunk is sent (so streamed responses count in full).
+- `shortpulse_db_pool_*{engine}`: live checked-out, idle, overflow and size of the sync
+  (`db.engine`, ingestion), async (read endpoints) and replica connection pools, read at scrape
+  time; with READ_REPLICA_URL, also `shortpulse_db_replica_healthy` and `_lag_seconds`.
+- `shortpulse_ingestion_*`: runs by status, stage durations, rows and response bytes, recorded
+  when a run's ledger row is finished.
+- `shortpulse_precomputed_refresh_failures_total{target}`: failed refreshes of the cohort window
+  distributions and the performance view, which keep serving their previous contents.
+
+Each uvicorn worker keeps its own values. With several workers, point
+PROMETHEUS_MULTIPROC_DIR at an empty directory (cleared before start) so every scrape
+aggregates the counters and histograms of all of them; the pool gauges then describe only the
+worker that answered.
+"""
+
+import os
+import time
+from typing import Iterator, Tuple
+
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Histogram, generate_latest
+from prometheus_client.core import GaugeMetricFamily
+from prometheus_client.multiprocess import MultiProcessCollector
+from sqlalchemy.pool import QueuePool
+
+from .db import async_engine, engine, read_router, replica_async_engine
+from .run_ledger import STAGES, IngestionStats
+
+REQUEST_SECONDS = Histogram(
+    "shortpulse_http_request_duration_seconds",
+    "HTTP request latency by route template.",
+    ("method", "route", "status"),
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+)
+INGESTION_RUNS = Counter("shortpulse_ingestion_runs_total", "Finished ingestion runs.", ("status",))
+INGESTION_STAGE_SECONDS = Histogram(
+    "shortpulse_ingestion_stage_duration_seconds",
+    "Seconds spent per ingestion stage in one run.",
+    ("stage",),
+    buckets=(0.1, 0.5, 1.0, 5.0, 15.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1800.0),
+)
+INGESTION_ROWS = Counter(
+    "shortpulse_ingestion_rows_total",
+    "Items received, mapped and dropped, and raw events inserted and suppressed.",
+    ("kind",),
+)
+INGESTION_RESPONSE_BYTES = Counter("shortpulse_ingestion_response_bytes_total", "Apify response bytes read.")
+RETENTION_FAILURES = Counter(
+    "shortpulse_raw_event_retention_failures_total", "Raw event retention passes that failed after an ingestion."
+)
+PRECOMPUTED_REFRESH_FAILURES = Counter(
+    "shortpulse_precomputed_refresh_failures_total",
+    "Failed refreshes of precomputed performance data.",
+    ("target",),
+)
+
+# Requests that match no route share one label value, so unknown paths can't grow the series.
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+def observe_ingestion(status: str, stats: IngestionStats) -> None:
+    INGESTION_RUNS.labels(status).inc()
+    for stage in STAGES:
+        INGESTION_STAGE_SECONDS.labels(stage).observe(getattr(stats, f"{stage}_seconds"))
+    for kind in ("items_received", "items_mapped", "items_dropped", "events_inserted", "events_suppressed"):
+        INGESTION_ROWS.labels(kind).inc(getattr(stats, kind))
+    INGESTION_RESPONSE_BYTES.inc(stats.response_bytes)
+
+
+def observe_retention_failure() -> None:
+    RETENTION_FAILURES.inc()
+
+
+def observe_refresh_failure(target: str) -> None:
+    PRECOMPUTED_REFRESH_FAILURES.labels(target).inc()
+
+
+class PoolCollector:
+    """Connection pool gauges, read from the pools whenever /metrics is scraped."""
+
+    def collect(self) -> Iterator[GaugeMetricFamily]:
+        gauges = {
+            "checked_out": GaugeMetricFamily("shortpulse_db_pool_checked_out", "Connections in use.", labels=["engine"]),
+            "checked_in": GaugeMetricFamily("shortpulse_db_pool_checked_in", "Idle pooled connections.", labels=["engine"]),
+            "overflow": GaugeMetricFamily(
+                "shortpulse_db_pool_overflow", "Connections beyond pool_size (negative while below it).", labels=["engine"]
+            ),
+            "size": GaugeMetricFamily("shortpulse_db_pool_size", "Configured pool_size.", labels=["engine"]),
+        }
+        pools = [("sync", engine.pool), ("async", async_engine.sync_engine.pool)]
+        if replica_async_engine is not None:
+            pools.append(("replica", replica_async_engine.sync_engine.pool))
+        for name, pool in pools:
+            if not isinstance(pool, QueuePool):
+                continue
+            gauges["checked_out"].add_metric([name], pool.checkedout())
+            gauges["checked_in"].add_metric([name], pool.checkedin())
+            gauges["overflow"].add_metric([name], pool.overflow())
+            gauges["size"].add_metric([name], pool.size())
+        yield from gauges.values()
+
+        if replica_async_engine is not None:
+            yield GaugeMetricFamily(
+                "shortpulse_db_replica_healthy", "1 while reads are routed to the replica.", value=int(bool(read_router.healthy))
+            )
+            if read_router.lag_seconds is not None:
+                yield GaugeMetricFamily(
+                    "shortpulse_db_replica_lag_seconds", "Replica lag at the last health check.", value=read_router.lag_seconds
+                )
+
+
+REGISTRY.register(PoolCollector())
+
+
+def render_metrics() -> Tuple[bytes, str]:
+    """The exposition body and its content type."""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        MultiProcessCollector(registry)
+        registry.register(PoolCollector())
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
+
+
+class PrometheusMiddleware:
+    """Times every HTTP request into REQUEST_SECONDS (plain ASGI, so streaming is left alone)."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        started = time.perf_counter()
+        status = 500
+
+        async def send_and_record(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_and_record)
+        finally:
+            # The router stores the matched route in the scope; its path is the template.
+            route = scope.get("route")
+            REQUEST_SECONDS.labels(
+                scope["method"], route.path if route is not None else UNMATCHED_ROUTE, str(status)
+            ).observe(time.perf_counter() - started)
@@ -0,0 +1,123 @@
+"""Cohort loading for /reels/performance: ORM `.all()` vs column-projected, streamed batches.
+
+Seeds `bench-` rows into reels_latest_state with COPY (captions included, as in production),
+then times each loader and measures its peak Python allocation with tracemalloc in a
+separate pass. Seeded rows are removed afterwards.
+
+    python -m benchmarks.bench_cohort_load --rows 200000
+"""
+
+import argparse
+import asyncio
+import gc
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import text
+
+from app.cohort_loader import load_cohort, load_cohort_sync
+from app.db import AsyncSessionLocal, SessionLocal, async_engine
+from app.metrics_engine import CohortColumns, compute_performance
+from app.models import ReelLatestState
+
+CAPTION = "Weekend reset routine with three small habits that changed everything " * 4
+
+
+def _seed(count: int, now: datetime) -> None:
+    columns = (
+        "reel_id, platform, reel_url, publish_time, latest_views, latest_likes, latest_comments, "
+        "latest_shares_or_saves, latest_scraped_at, caption_text, audio_name, updated_at"
+    )
+    with SessionLocal() as session:
+        dbapi_connection = session.connection().connection.driver_connection
+        with dbapi_connection.cursor() as cursor:
+            with cursor.copy(f"COPY reels_latest_state ({columns}) FROM STDIN") as copy:
+                for index in range(count):
+                    copy.write_row(
+                        (
+                            f"bench-{index}",
+                            "instagram",
+                            f"https://www.instagram.com/reel/bench-{index}/",
+                            now - timedelta(seconds=index % (6 * 86_400)),
+                            index * 7 % 1_000_000,
+                            index % 5_000,
+                            index % 300,
+                            None if index % 3 else index % 1_000,
+                            now,
+                            CAPTION,
+                            "Original audio",
+                            now,
+                        )
+                    )
+        session.commit()
+
+
+def _cleanup() -> None:
+    with SessionLocal() as session:
+        session.execute(text("DELETE FROM reels_latest_state WHERE reel_id LIKE 'bench-%'"))
+        session.commit()
+
+
+def _orm_all(since: datetime) -> CohortColumns:
+    with SessionLocal() as session:
+        states = session.query(ReelLatestState).filter(ReelLatestState.publish_time >= since).all()
+        return CohortColumns.from_states(states)
+
+
+def _streamed(since: datetime) -> CohortColumns:
+    with SessionLocal() as session:
+        return load_cohort_sync(session, since)
+
+
+def _streamed_async(since: datetime) -> CohortColumns:
+    async def load():
+        try:
+            async with AsyncSessionLocal() as session:
+                return await load_cohort(session, since)
+        finally:
+            # Pooled asyncpg connections are bound to this event loop.
+            await async_engine.dispose()
+
+    return asyncio.run(load())
+
+
+LOADERS = {"orm .all()": _orm_all, "projected sync": _streamed, "projected async": _streamed_async}
+
+
+def run(count: int) -> None:
+    now = datetime.now(timezone.utc)
+    since = now - timedelta(days=7)
+    _seed(count, now)
+    try:
+        print(f"{'loader':>16} {'rows':>8} {'load s':>8} {'metrics s':>10} {'peak MiB':>9}")
+        for name, loader in LOADERS.items():
+            gc.collect()
+            started = time.perf_counter()
+            cohort = loader(since)
+            loaded = time.perf_counter()
+            compute_performance(cohort, now)
+            computed = time.perf_counter()
+            del cohort
+            gc.collect()
+
+            tracemalloc.start()
+            loader(since)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print(
+                f"{name:>16} {count:>8} {loaded - started:>8.2f} {computed - loaded:>10.2f} {peak / 2**20:>9.1f}"
+            )
+    finally:
+        _cleanup()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=200_000)
+    args = parser.parse_args()
+    run(args.rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""Benchmark: payload size and parse time of row objects vs the columnar scatter payload.
+
+Compares, for one computed cohort, the full /reels/performance rows (orjson) with
+/reels/performance/columns for the default scatter fields, each raw and gzipped, plus the
+time `json.loads` takes to parse each (a stand-in for the browser's JSON.parse).
+
+    python -m benchmarks.bench_columns --rows 200000
+"""
+
+import argparse
+import gzip
+import json
+import time
+from datetime import datetime, timezone
+
+from app.config import settings
+from app.metrics_engine import CohortColumns, compute_performance
+from app.performance_encoding import DEFAULT_COLUMN_FIELDS, encode_columns, encode_performance
+from benchmarks.generators import latest_states
+
+
+def _timed(fn):
+    started = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - started
+
+
+def run(count: int) -> None:
+    now = datetime.now(timezone.utc)
+    # Three platforms, so the dictionary column has something to encode.
+    states = latest_states(count, now)
+    for index, state in enumerate(states):
+        state.platform = ("instagram", "tiktok", "youtube")[index % 3]
+    performance = compute_performance(CohortColumns.from_states(states), now)
+    settings.performance_encoder = "orjson"
+    print(f"rows: {count}, columns: {', '.join(DEFAULT_COLUMN_FIELDS)}")
+
+    for name, encode in (
+        ("rows", lambda: encode_performance(performance)),
+        ("columns", lambda: encode_columns(performance, DEFAULT_COLUMN_FIELDS)),
+    ):
+        body, encode_seconds = _timed(encode)
+        compressed, gzip_seconds = _timed(lambda: gzip.compress(body, settings.performance_gzip_level))
+        _, parse_seconds = _timed(lambda: json.loads(body))
+        print(
+            f"{name:>8}: {len(body) / 1e6:7.2f} MB raw, {len(compressed) / 1e6:6.2f} MB gzip | "
+            f"encode {encode_seconds * 1000:7.1f} ms, gzip {gzip_seconds * 1000:7.1f} ms, "
+            f"parse {parse_seconds * 1000:7.1f} ms"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=200_000)
+    args = parser.parse_args()
+    run(args.rows)
+
+
+if __name__ == "__main__":
+    main()
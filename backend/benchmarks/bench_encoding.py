@@ -0,0 +1,74 @@
+"""Benchmark: encoding a computed /reels/performance cohort with each response mode.
+
+- pydantic: ReelPerformanceList(items=rows).json() (PERFORMANCE_ENCODER=pydantic, the default);
+- orjson: the same document from the trusted rows (PERFORMANCE_ENCODER=orjson);
+- ndjson: the format=ndjson stream, consumed chunk by chunk as a socket would.
+
+Latency is timed without tracing; peak memory is the tracemalloc peak of a second run, on
+top of the already computed cohort (which every mode shares).
+
+    python -m benchmarks.bench_encoding --rows 200000
+"""
+
+import argparse
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+from app.config import settings
+from app.metrics_engine import CohortColumns, compute_performance
+from app.performance_encoding import encode_performance, iter_ndjson
+from benchmarks.generators import latest_states
+
+
+def _encode(encoder):
+    def run(performance):
+        settings.performance_encoder = encoder
+        body = encode_performance(performance)
+        return len(body), None
+
+    return run
+
+
+def _stream(performance):
+    size, first = 0, None
+    started = time.perf_counter()
+    for chunk in iter_ndjson(performance):
+        if first is None:
+            first = time.perf_counter() - started
+        size += len(chunk)
+    return size, first
+
+
+MODES = {"pydantic": _encode("pydantic"), "orjson": _encode("orjson"), "ndjson": _stream}
+
+
+def run(count: int) -> None:
+    now = datetime.now(timezone.utc)
+    performance = compute_performance(CohortColumns.from_states(latest_states(count, now)), now)
+    print(f"rows: {count}")
+    for name, mode in MODES.items():
+        started = time.perf_counter()
+        size, first = mode(performance)
+        seconds = time.perf_counter() - started
+
+        tracemalloc.start()
+        mode(performance)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        first_bytes = f", first chunk {first * 1000:.1f} ms" if first is not None else ""
+        print(
+            f"{name:>8}: {seconds * 1000:9.1f} ms{first_bytes} | {size / 1e6:7.1f} MB | "
+            f"peak {peak / 1e6:8.1f} MB"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=200_000)
+    args = parser.parse_args()
+    run(args.rows)
+
+
+if __name__ == "__main__":
+    main()
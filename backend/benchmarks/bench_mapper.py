@@ -0,0 +1,44 @@
+"""Micro-benchmark: generic `_map_apify_item` vs the schema-learning compiled mapper.
+
+    python -m benchmarks.bench_mapper --items 100000
+"""
+
+import argparse
+import time
+from datetime import datetime, timezone
+
+from app.compiled_mapper import learn_item_mapper
+from app.sources import _map_apify_item
+from tools.fake_apify import make_item
+
+
+def run(count: int, sample_size: int) -> None:
+    now = datetime.now(timezone.utc)
+    items = [make_item(index, now) for index in range(count)]
+
+    started = time.perf_counter()
+    generic = [_map_apify_item(item, now, "bench", "reels_feed") for item in items]
+    generic_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    mapper = learn_item_mapper(items[:sample_size])
+    compiled = mapper.map_items(items, now, "bench", "reels_feed")
+    compiled_seconds = time.perf_counter() - started
+
+    assert compiled == generic
+    print(f"items: {count}")
+    print(f"generic:  {generic_seconds:.3f}s ({count / generic_seconds:,.0f} items/s)")
+    print(f"compiled: {compiled_seconds:.3f}s ({count / compiled_seconds:,.0f} items/s), fallbacks: {mapper.fallbacks}")
+    print(f"speedup:  {generic_seconds / compiled_seconds:.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=100_000)
+    parser.add_argument("--sample-size", type=int, default=200)
+    args = parser.parse_args()
+    run(args.items, args.sample_size)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""Micro-benchmark: reference metrics (`compute_derived_metrics` + `attach_percentiles`) vs the NumPy engine.
+
+Uses the plain attribute objects of `benchmarks.generators.latest_states` instead of ORM
+instances so the timing covers the metrics only.
+
+    python -m benchmarks.bench_metrics --rows 1000000
+"""
+
+import argparse
+import time
+from datetime import datetime, timezone
+
+from app.metrics import attach_percentiles, compute_derived_metrics
+from app.metrics_engine import CohortColumns, compute_performance
+from benchmarks.generators import latest_states
+
+
+def run(count: int, check: bool) -> None:
+    now = datetime.now(timezone.utc)
+    states = latest_states(count, now)
+
+    started = time.perf_counter()
+    reference = attach_percentiles(compute_derived_metrics(states, now))
+    reference_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    cohort = CohortColumns.from_states(states)
+    columns_seconds = time.perf_counter() - started
+    performance = compute_performance(cohort, now)
+    compute_seconds = time.perf_counter() - started - columns_seconds
+    rows = performance.rows()
+    vectorized_seconds = time.perf_counter() - started
+
+    if check:
+        assert rows == reference, "vectorized rows differ from the reference implementation"
+    print(f"rows: {count}")
+    print(f"reference:  {reference_seconds:.3f}s")
+    print(
+        f"vectorized: {vectorized_seconds:.3f}s "
+        f"(columns {columns_seconds:.3f}s, compute {compute_seconds:.3f}s, "
+        f"rows {vectorized_seconds - columns_seconds - compute_seconds:.3f}s)"
+    )
+    print(f"speedup:    {reference_seconds / vectorized_seconds:.1f}x end to end, "
+          f"{reference_seconds / compute_seconds:.0f}x for the metrics alone")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--no-check", dest="check", action="store_false", help="Skip the row-by-row parity check.")
+    args = parser.parse_args()
+    run(args.rows, args.check)
+
+
+if __name__ == "__main__":
+    main()
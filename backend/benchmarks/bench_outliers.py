@@ -0,0 +1,160 @@
+"""Benchmark: creator-relative outlier scores for creators with 10k+ videos.
+
+1. In memory: the naive leave-one-out mean (a pass over the creator's other videos per video,
+   O(n^2) per creator) vs the O(1)-per-video baseline from a creator's (total, count).
+2. In Postgres (DATABASE_URL): seeds `bench-` reels for the creators with copy_events, then
+   times applying one ingestion batch incrementally to creator_aggregates vs recomputing the
+   whole table, and checks both give the same totals. The seeded rows are removed afterwards.
+
+    python -m benchmarks.bench_outliers --creators 3 --videos 12000 --batch 1000
+"""
+
+import argparse
+import random
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import text
+
+from app import bulk_load
+from app.creators import outlier_score, recompute_creator_aggregates
+from app.db import SessionLocal
+
+
+def _naive_scores(views):
+    scores = []
+    for i, own in enumerate(views):
+        others = [v for j, v in enumerate(views) if j != i]
+        average = sum(others) / len(others)
+        scores.append(round(own / average, 2) if average else None)
+    return scores
+
+
+def _aggregate_scores(views):
+    total, count = sum(views), len(views)
+    return [outlier_score(v, total, count) for v in views]
+
+
+def run_in_memory(creators: int, videos: int, naive_videos: int) -> None:
+    rng = random.Random(1)
+    print(f"in memory: {creators} creators x {videos} videos")
+    for creator in range(creators):
+        views = [int(rng.paretovariate(1.2) * 1_000) for _ in range(videos)]
+        started = time.perf_counter()
+        fast = _aggregate_scores(views)
+        fast_seconds = time.perf_counter() - started
+
+        # The naive pass is quadratic; time it on a prefix and scale by (n / prefix)^2.
+        sample = views[: min(naive_videos, videos)]
+        started = time.perf_counter()
+        naive = _naive_scores(sample)
+        naive_seconds = time.perf_counter() - started
+        estimated = naive_seconds * (videos / len(sample)) ** 2
+        assert naive == _aggregate_scores(sample)
+        print(
+            f"  creator {creator}: aggregate {fast_seconds * 1000:8.1f} ms for {len(fast)} videos | "
+            f"naive {naive_seconds:6.2f} s for {len(sample)} videos (~{estimated:,.0f} s for all {videos})"
+        )
+
+
+def _event(reel: int, creator: int, views: int, scraped_at: datetime, run: str):
+    return {
+        "reel_id": f"bench-outlier-{reel}",
+        "platform": "instagram",
+        "reel_url": f"https://www.instagram.com/reel/bench{reel}/",
+        "scraped_at": scraped_at,
+        "publish_time": scraped_at - timedelta(days=30),
+        "views": views,
+        "likes": 0,
+        "comments": 0,
+        "shares_or_saves": None,
+        "creator_id": f"bench-creator-{creator}",
+        "caption_text": None,
+        "audio_id": None,
+        "audio_name": None,
+        "duration_seconds": None,
+        "apify_run_id": run,
+        "source_surface": "reels_feed",
+    }
+
+
+def _totals(session):
+    return session.execute(
+        text(
+            "SELECT creator_id, video_count, total_views FROM creator_aggregates "
+            "WHERE creator_id LIKE 'bench-creator-%' ORDER BY creator_id"
+        )
+    ).all()
+
+
+def _cleanup(session) -> None:
+    session.rollback()
+    session.execute(text("DELETE FROM reels_raw_events WHERE reel_id LIKE 'bench-outlier-%'"))
+    session.execute(text("DELETE FROM reels_latest_state WHERE reel_id LIKE 'bench-outlier-%'"))
+    session.execute(text("DELETE FROM creator_aggregates WHERE creator_id LIKE 'bench-creator-%'"))
+    session.commit()
+
+
+def run_in_postgres(creators: int, videos: int, batch: int) -> None:
+    rng = random.Random(2)
+    now = datetime.now(timezone.utc)
+    total = creators * videos
+    with SessionLocal() as session:
+        _cleanup(session)
+        try:
+            seed = [_event(i, i % creators, rng.randint(0, 1_000_000), now, "bench-seed") for i in range(total)]
+            started = time.perf_counter()
+            bulk_load.copy_events(session, seed, 5000)
+            session.commit()
+            print(f"postgres: seeded {total} reels in {time.perf_counter() - started:.1f} s")
+
+            updates = [
+                _event(i, i % creators, rng.randint(0, 2_000_000), now + timedelta(hours=1), "bench-update")
+                for i in rng.sample(range(total), batch)
+            ]
+            delta_seconds = []
+            apply_deltas = bulk_load.apply_staged_creator_deltas
+
+            def timed_deltas(*args, **kwargs):
+                delta_started = time.perf_counter()
+                apply_deltas(*args, **kwargs)
+                delta_seconds.append(time.perf_counter() - delta_started)
+
+            bulk_load.apply_staged_creator_deltas = timed_deltas
+            try:
+                started = time.perf_counter()
+                bulk_load.copy_events(session, updates, 5000)
+                session.commit()
+            finally:
+                bulk_load.apply_staged_creator_deltas = apply_deltas
+            print(
+                f"  batch of {batch} updates: {(time.perf_counter() - started) * 1000:.1f} ms, "
+                f"of which incremental aggregates {sum(delta_seconds) * 1000:.1f} ms"
+            )
+            incremental = _totals(session)
+
+            started = time.perf_counter()
+            recompute_creator_aggregates(session)
+            session.commit()
+            print(f"  full recompute of creator_aggregates: {(time.perf_counter() - started) * 1000:.1f} ms")
+            assert incremental == _totals(session), "incremental aggregates differ from the recompute"
+            print("  incremental totals match the recompute")
+        finally:
+            _cleanup(session)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--creators", type=int, default=3)
+    parser.add_argument("--videos", type=int, default=12_000, help="Videos per creator.")
+    parser.add_argument("--naive-videos", type=int, default=4_000, help="Prefix timed with the O(n^2) baseline.")
+    parser.add_argument("--batch", type=int, default=1_000, help="Reels updated by the incremental batch.")
+    parser.add_argument("--no-db", dest="db", action="store_false", help="Skip the Postgres part.")
+    args = parser.parse_args()
+    run_in_memory(args.creators, args.videos, args.naive_videos)
+    if args.db:
+        run_in_postgres(args.creators, args.videos, args.batch)
+
+
+if __name__ == "__main__":
+    main()
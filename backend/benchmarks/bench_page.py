@@ -0,0 +1,60 @@
+"""Micro-benchmark: serializing the whole /reels/performance cohort vs one keyset page of it.
+
+Both start from an already computed cohort (what the snapshot cache holds), so the timing
+covers selection and serialization only.
+
+    python -m benchmarks.bench_page --rows 1000000 --limit 50
+"""
+
+import argparse
+import time
+from datetime import datetime, timezone
+
+from app.metrics_engine import CohortColumns, compute_performance
+from app.performance_page import SORT_KEYS, PageRequest, decode_cursor, select_page
+from app.schemas import ReelPerformanceList
+from benchmarks.generators import latest_states
+
+
+def _timed(fn):
+    started = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - started
+
+
+def run(count: int, limit: int) -> None:
+    now = datetime.now(timezone.utc)
+    performance = compute_performance(CohortColumns.from_states(latest_states(count, now)), now)
+    print(f"rows: {count}, limit: {limit}")
+
+    body, seconds = _timed(lambda: ReelPerformanceList(items=performance.rows()).json().encode())
+    print(f"{'full cohort':>32}: {seconds * 1000:9.1f} ms {len(body) / 1e6:9.2f} MB")
+
+    for sort in sorted(SORT_KEYS):
+        for label, page in (
+            (f"{sort}", PageRequest(sort=sort, limit=limit)),
+            (f"{sort} >= p90", PageRequest(sort=sort, limit=limit, min_percentile=90)),
+        ):
+            (indices, cursor), select_seconds = _timed(lambda: select_page(performance, page))
+            body, seconds = _timed(
+                lambda: ReelPerformanceList(items=performance.rows(indices), next_cursor=cursor).json().encode()
+            )
+            # A later page, to show cursors cost the same as the first page.
+            page.after = decode_cursor(cursor, sort)
+            _, next_seconds = _timed(lambda: select_page(performance, page))
+            print(
+                f"{label:>32}: {(select_seconds + seconds) * 1000:9.1f} ms {len(body) / 1e6:9.2f} MB "
+                f"(select {select_seconds * 1000:.1f} ms, next page select {next_seconds * 1000:.1f} ms)"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--limit", type=int, default=50)
+    args = parser.parse_args()
+    run(args.rows, args.limit)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Compare persist_events write paths (chunked multi-VALUES vs COPY + set-based merge).
+
+Writes to the database in DATABASE_URL; point it at a scratch database. Rows created by the
+benchmark are tagged with a `bench-` reel_id prefix and removed afterwards.
+
+    python -m benchmarks.bench_persist --sizes 1000 10000 100000
+"""
+
+import argparse
+import time
+import uuid
+from datetime import datetime, timezone
+
+from sqlalchemy import text
+
+from app import ingestion
+from app.config import settings
+from app.db import SessionLocal
+from tools.fake_apify import make_item
+
+
+def _items(count: int):
+    items = []
+    for index in range(count):
+        item = make_item(index)
+        item["id"] = f"bench-{index}"
+        items.append(item)
+    return items
+
+
+def _cleanup(session) -> None:
+    session.execute(text("DELETE FROM reels_raw_events WHERE reel_id LIKE 'bench-%'"))
+    session.execute(text("DELETE FROM reels_latest_state WHERE reel_id LIKE 'bench-%'"))
+    session.commit()
+
+
+def run(sizes, chunk_size: int) -> None:
+    settings.persist_chunk_size = chunk_size
+    print(f"{'rows':>8} {'mode':>7} {'seconds':>9} {'rows/sec':>10}")
+    for size in sizes:
+        items = _items(size)
+        for mode in ("values", "copy"):
+            settings.persist_mode = mode
+            with SessionLocal() as session:
+                _cleanup(session)
+                started = time.perf_counter()
+                inserted = ingestion.persist_events(
+                    session, items, f"bench-{uuid.uuid4().hex[:8]}", scraped_at=datetime.now(timezone.utc)
+                )
+                elapsed = time.perf_counter() - started
+                assert inserted == size, f"{mode} inserted {inserted} of {size}"
+                print(f"{size:>8} {mode:>7} {elapsed:>9.3f} {size / elapsed:>10.0f}")
+                _cleanup(session)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--chunk-size", type=int, default=settings.persist_chunk_size)
+    args = parser.parse_args()
+    run(args.sizes, args.chunk_size)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""Requests/sec for the read endpoints at increasing client concurrency, sync vs async DB path.
+
+Serves `legacy_app` (the previous handlers: `async def` endpoints on the sync session) and then
+`app.main:app` (async engine) from a single uvicorn worker each, and drives them with N
+concurrent keep-alive clients. Reads the database in DATABASE_URL; pass --seed to add
+`bench-` reels published within the last 7 days (removed afterwards).
+
+    python -m benchmarks.bench_read_concurrency --clients 1 10 50 --seconds 5 --seed 500
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from statistics import median
+
+import requests
+from fastapi import Depends, FastAPI
+from sqlalchemy import func, text
+from sqlalchemy.orm import Session
+
+from app import ingestion
+from app.db import SessionLocal, get_session
+from app.metrics import attach_percentiles, compute_derived_metrics
+from app.models import ReelLatestState, ReelRawEvent
+from app.schemas import IngestStatus, ReelPerformanceList
+from tools.fake_apify import make_item
+
+legacy_app = FastAPI()
+
+
+@legacy_app.get("/reels/performance", response_model=ReelPerformanceList)
+async def legacy_reels_performance(session: Session = Depends(get_session)):
+    now = datetime.now(timezone.utc)
+    states = session.query(ReelLatestState).filter(ReelLatestState.publish_time >= now - timedelta(days=7)).all()
+    return {"items": attach_percentiles(compute_derived_metrics(states, now))}
+
+
+@legacy_app.get("/ingest/status", response_model=IngestStatus)
+async def legacy_ingest_status(session: Session = Depends(get_session)):
+    last_scraped_at = session.query(func.max(ReelRawEvent.scraped_at)).scalar()
+    latest_run = (
+        session.query(ReelRawEvent.apify_run_id, func.count(ReelRawEvent.id))
+        .filter(ReelRawEvent.scraped_at == last_scraped_at)
+        .group_by(ReelRawEvent.apify_run_id)
+        .order_by(func.count(ReelRawEvent.id).desc())
+        .first()
+    )
+    seven_days_ago = datetime.now(timezone.utc) - timedelta(days=7)
+    return {
+        "last_scraped_at": last_scraped_at,
+        "last_apify_run_id": latest_run[0] if latest_run else None,
+        "events_last_run": latest_run[1] if latest_run else 0,
+        "total_raw_events": session.query(func.count(ReelRawEvent.id)).scalar() or 0,
+        "latest_state_count": session.query(func.count(ReelLatestState.reel_id)).scalar() or 0,
+        "reels_published_last_7d": session.query(func.count(ReelLatestState.reel_id))
+        .filter(ReelLatestState.publish_time >= seven_days_ago)
+        .scalar(),
+    }
+
+
+TARGETS = {"sync session": "benchmarks.bench_read_concurrency:legacy_app", "async engine": "app.main:app"}
+
+
+def _seed(count: int) -> None:
+    items = []
+    for index in range(count):
+        item = make_item(index)
+        item["id"] = f"bench-{index}"
+        items.append(item)
+    with SessionLocal() as session:
+        ingestion.persist_events(session, items, "bench-read", scraped_at=datetime.now(timezone.utc))
+
+
+def _cleanup() -> None:
+    with SessionLocal() as session:
+        session.execute(text("DELETE FROM reels_raw_events WHERE reel_id LIKE 'bench-%'"))
+        session.execute(text("DELETE FROM reels_latest_state WHERE reel_id LIKE 'bench-%'"))
+        session.commit()
+
+
+def _serve(target: str, port: int) -> subprocess.Popen:
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", target, "--port", str(port), "--log-level", "warning", "--no-access-log"],
+        env={**os.environ, "APIFY_API_TOKEN": ""},
+        stderr=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + 20
+    while time.monotonic() < deadline:
+        try:
+            requests.get(f"http://127.0.0.1:{port}/reels/performance", timeout=5)
+            return process
+        except requests.RequestException:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError(f"{target} did not start")
+
+
+def _load(url: str, clients: int, seconds: float):
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+    deadline = time.monotonic() + seconds
+
+    def client():
+        own = []
+        failed = 0
+        with requests.Session() as http:
+            while time.monotonic() < deadline:
+                started = time.perf_counter()
+                try:
+                    http.get(url, timeout=30).raise_for_status()
+                except requests.RequestException:
+                    failed += 1
+                    continue
+                own.append(time.perf_counter() - started)
+        with lock:
+            latencies.extend(own)
+            errors.append(failed)
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    started = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - started
+    return len(latencies) / elapsed, median(latencies) * 1000 if latencies else 0.0, sum(errors)
+
+
+def run(clients, seconds: float, port: int, path: str) -> None:
+    print(f"{'path':>13} {'clients':>8} {'req/s':>8} {'p50 ms':>8} {'errors':>7}")
+    for name, target in TARGETS.items():
+        process = _serve(target, port)
+        try:
+            for count in clients:
+                rps, p50, errors = _load(f"http://127.0.0.1:{port}{path}", count, seconds)
+                print(f"{name:>13} {count:>8} {rps:>8.1f} {p50:>8.1f} {errors:>7}")
+        finally:
+            process.terminate()
+            process.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 10, 50])
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--path", default="/reels/performance")
+    parser.add_argument("--seed", type=int, default=0, help="Insert this many bench- reels first.")
+    args = parser.parse_args()
+    if args.seed:
+        _seed(args.seed)
+    try:
+        run(args.clients, args.seconds, args.port, args.path)
+    finally:
+        if args.seed:
+            _cleanup()
+
+
+if __name__ == "__main__":
+    main()
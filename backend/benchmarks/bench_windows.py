@@ -0,0 +1,116 @@
+"""Benchmark: ranking the 7d/30d/90d cohorts per request vs binary searches into pre-aggregated distributions.
+
+Publishes are spread evenly over 90 days at `--per-day` reels a day (the default gives a
+~1.35M-reel 90-day population). For each window it times:
+- full: compute_performance ranking every metric within the cohort (argsort per metric);
+- windowed: the same with percentiles looked up in the window's sorted columns;
+- percentiles only, for both, and one reel's four lookups;
+plus the refresh (sorting every window's columns once, after ingestion) and decoding a
+stored distribution. Rows are checked to be identical.
+
+    python -m benchmarks.bench_windows --per-day 15000
+"""
+
+import argparse
+import time
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+from app.cohort_windows import WINDOWS, window_distributions
+from app.metrics_engine import (
+    RANKED_METRICS,
+    CohortColumns,
+    _epoch_micros,
+    _max_rank_percentiles,
+    compute_performance,
+    derived_columns,
+)
+
+
+def _cohort(per_day: int, now: datetime) -> CohortColumns:
+    rng = np.random.default_rng(7)
+    n = per_day * max(WINDOWS.values())
+    now_micros = _epoch_micros(now)
+    publish = now_micros - rng.integers(0, max(WINDOWS.values()) * 86_400 * 1_000_000, n)
+    views = rng.pareto(1.2, n).astype(np.int64) * 1_000
+    has_prev = rng.random(n) < 0.8
+    return CohortColumns(
+        reel_id=[f"r{index}" for index in range(n)],
+        platform=["instagram"] * n,
+        reel_url=[""] * n,
+        publish_time=[None] * n,  # only needed to serialize rows
+        latest_scraped_at=[None] * n,
+        views=views,
+        likes=rng.integers(0, views // 10 + 1),
+        comments=rng.integers(0, 5_000, n),
+        shares_or_saves=rng.integers(0, 10_000, n).tolist(),
+        publish_micros=publish,
+        scraped_micros=np.full(n, now_micros),
+        base_views=np.where(has_prev, np.maximum(views - rng.integers(0, 50_000, n), 0), 0),
+        base_micros=np.where(has_prev, now_micros - 6 * 3600 * 1_000_000, publish),
+    )
+
+
+def _subset(cohort: CohortColumns, mask: np.ndarray) -> CohortColumns:
+    positions = np.flatnonzero(mask).tolist()
+    fields = {}
+    for name, values in vars(cohort).items():
+        if values is None:
+            fields[name] = None
+        elif isinstance(values, np.ndarray):
+            fields[name] = values[mask]
+        else:
+            fields[name] = [values[i] for i in positions]
+    return CohortColumns(**fields)
+
+
+def _timed(fn):
+    started = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - started
+
+
+def run(per_day: int, check: bool) -> None:
+    now = datetime.now(timezone.utc)
+    population = _cohort(per_day, now)
+    print(f"90-day population: {len(population)} reels ({per_day} a day)")
+
+    distributions, seconds = _timed(lambda: window_distributions(population, now))
+    print(f"refresh (sort all windows' columns): {seconds * 1000:.1f} ms")
+    blobs = {metric: values.tobytes() for metric, values in distributions[90].sorted_values.items()}
+    _, seconds = _timed(lambda: {metric: np.frombuffer(blob, dtype="<f8") for metric, blob in blobs.items()})
+    print(f"decode stored 90d distribution ({sum(map(len, blobs.values())) / 1e6:.1f} MB): {seconds * 1000:.2f} ms")
+
+    for window, days in WINDOWS.items():
+        cohort = _subset(population, population.publish_micros >= _epoch_micros(now - timedelta(days=days)))
+        lookup = distributions[days].percentiles
+        full, full_seconds = _timed(lambda: compute_performance(cohort, now))
+        windowed, windowed_seconds = _timed(lambda: compute_performance(cohort, now, lookup))
+        if check:
+            for field in ("views_percentile", "views_per_hour_percentile", "engagement_rate_percentile",
+                          "momentum_percentile", "performance_score"):
+                assert np.array_equal(getattr(full, field), getattr(windowed, field)), field
+
+        columns = derived_columns(cohort, now)
+        _, rank_seconds = _timed(lambda: [_max_rank_percentiles(columns[metric]) for metric in RANKED_METRICS])
+        _, search_seconds = _timed(lambda: [lookup(metric, columns[metric]) for metric in RANKED_METRICS])
+        one = {metric: float(columns[metric][0]) for metric in RANKED_METRICS}
+        _, one_seconds = _timed(lambda: [distributions[days].percentile(metric, one[metric]) for metric in RANKED_METRICS])
+        print(
+            f"{window:>4} ({len(cohort):>9} reels): full {full_seconds * 1000:8.1f} ms | windowed "
+            f"{windowed_seconds * 1000:8.1f} ms | percentiles: rank {rank_seconds * 1000:7.1f} ms, "
+            f"binary search {search_seconds * 1000:7.1f} ms | one reel {one_seconds * 1e6:6.1f} us"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--per-day", type=int, default=15_000, help="Reels published per day.")
+    parser.add_argument("--no-check", dest="check", action="store_false")
+    args = parser.parse_args()
+    run(args.per_day, args.check)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""Deterministic synthetic inputs for the benchmarks.
+
+- `apify_items`: Apify dataset items covering the key variants `_map_apify_item` accepts (id,
+  URL, publish-time and counter key spellings) and every datetime format `_parse_datetime`
+  handles, plus a small share of items the mapper drops.
+- `latest_states`: `ReelLatestState`-shaped cohorts (plain attribute objects, so timings
+  cover the metrics rather than the ORM) of any size.
+
+The same arguments always produce the same data, so timings are comparable across runs.
+"""
+
+import random
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Optional
+
+from app.compiled_mapper import PUBLISH_KEYS
+
+# Fixed clock, so generated timestamps (and everything derived from them) never drift.
+FIXED_NOW = datetime(2025, 12, 11, 12, 0, tzinfo=timezone.utc)
+
+# Every representation of a publish time the mapper understands, by name.
+DATETIME_FORMATS: Dict[str, Callable[[datetime], object]] = {
+    "iso_millis_z": lambda moment: f"{moment:%Y-%m-%dT%H:%M:%S}.{moment.microsecond // 1000:03d}Z",
+    "iso_z": lambda moment: f"{moment:%Y-%m-%dT%H:%M:%S}Z",
+    "space": lambda moment: f"{moment:%Y-%m-%d %H:%M:%S}",
+    "naive_t": lambda moment: f"{moment:%Y-%m-%dT%H:%M:%S}",
+    # Only fromisoformat reads an offset, after the four strptime formats have failed.
+    "iso_offset": lambda moment: moment.astimezone(timezone(timedelta(hours=2))).isoformat(timespec="seconds"),
+    "epoch_int": lambda moment: int(moment.timestamp()),
+    "epoch_float": lambda moment: moment.timestamp(),
+}
+
+# (views, likes, comments, shares) key spellings, Instagram's first.
+COUNTER_KEYS = (
+    ("playsCount", "likesCount", "commentsCount", "savesCount"),
+    ("playCount", "likeCount", "commentCount", "shareCount"),
+    ("views", "likes", "comments", "shares"),
+)
+
+
+def datetime_values(count: int, fmt: str, now: datetime = FIXED_NOW, seed: int = 3) -> List[object]:
+    """`count` publish times within the last week, rendered in DATETIME_FORMATS[fmt]."""
+    rng = random.Random(seed)
+    render = DATETIME_FORMATS[fmt]
+    values = []
+    for _ in range(count):
+        values.append(render(now - timedelta(seconds=rng.randint(0, 7 * 86_400), milliseconds=rng.randint(0, 999))))
+    return values
+
+
+def apify_items(
+    count: int,
+    now: datetime = FIXED_NOW,
+    seed: int = 7,
+    mixed: bool = True,
+    invalid_ratio: float = 0.01,
+) -> List[Dict[str, object]]:
+    """`count` dataset items; with `mixed`, key spellings and datetime formats vary per item.
+
+    Without `mixed` every item has the Instagram reel scraper's shape (the layout the compiled
+    mapper learns). `invalid_ratio` of the items lack an id or have an unparseable publish time.
+    """
+    rng = random.Random(seed)
+    formats = list(DATETIME_FORMATS)
+    items = []
+    for index in range(count):
+        publish_time = now - timedelta(seconds=rng.randint(60, 7 * 86_400), milliseconds=rng.randint(0, 999))
+        views = rng.randint(0, 5_000_000)
+        likes = rng.randint(0, views // 10 + 1)
+        comments = rng.randint(0, 5_000)
+        shares: Optional[int] = rng.choice([None, rng.randint(1, 10_000)])
+        shortcode = f"SYN{seed}x{index}"
+
+        if not mixed:
+            items.append(
+                {
+                    "id": f"syn-{seed}-{index}",
+                    "shortCode": shortcode,
+                    "url": f"https://www.instagram.com/reel/{shortcode}/",
+                    "timestamp": DATETIME_FORMATS["iso_millis_z"](publish_time),
+                    "playsCount": views,
+                    "likesCount": likes,
+                    "commentsCount": comments,
+                    "caption": f"Synthetic reel {index}",
+                    "ownerId": f"owner-{index % 500}",
+                    "ownerUsername": f"owner_{index % 500}",
+                    "musicId": f"audio-{index % 97}",
+                    "musicTitle": f"Track {index % 97}",
+                    "videoDuration": 5.0 + index % 55,
+                }
+            )
+            continue
+
+        item: Dict[str, object] = {}
+        id_key = rng.choice(("id", "id", "itemId", None))
+        if id_key:
+            item[id_key] = f"syn-{seed}-{index}"
+        item["shortCode"] = shortcode
+        # Without an id the shortCode is the reel id, so only items with one may spell it "code".
+        url_key = rng.choice(("url", "link", "code", None) if id_key else ("url", "link", None))
+        if url_key == "code":
+            item.pop("shortCode")
+            item["code"] = shortcode
+        elif url_key:
+            item[url_key] = f"https://www.instagram.com/reel/{shortcode}/"
+        item[rng.choice(PUBLISH_KEYS)] = DATETIME_FORMATS[rng.choice(formats)](publish_time)
+
+        views_key, likes_key, comments_key, shares_key = rng.choice(COUNTER_KEYS)
+        item[views_key] = views
+        item[likes_key] = likes
+        item[comments_key] = comments
+        if shares is not None:
+            item[shares_key] = shares
+        item["caption" if rng.random() < 0.7 else "title"] = f"Synthetic reel {index}"
+        if rng.random() < 0.8:
+            item["ownerId" if rng.random() < 0.5 else "ownerUsername"] = f"owner-{index % 500}"
+        if rng.random() < 0.6:
+            item["musicId" if rng.random() < 0.5 else "audioId"] = f"audio-{index % 97}"
+        item["videoDuration" if rng.random() < 0.5 else "duration"] = 5.0 + index % 55
+
+        if rng.random() < invalid_ratio:
+            if rng.random() < 0.5:
+                for key in ("id", "itemId", "shortCode", "code"):
+                    item.pop(key, None)
+            else:
+                for key in PUBLISH_KEYS:
+                    item.pop(key, None)
+                item["timestamp"] = "not a date"
+        items.append(item)
+    return items
+
+
+class CohortState:
+    """The attributes of `ReelLatestState` that the metrics read."""
+
+    __slots__ = (
+        "reel_id",
+        "platform",
+        "reel_url",
+        "publish_time",
+        "latest_scraped_at",
+        "latest_views",
+        "latest_likes",
+        "latest_comments",
+        "latest_shares_or_saves",
+        "prev_views",
+        "prev_scraped_at",
+    )
+
+    def __init__(self, **fields):
+        for name, value in fields.items():
+            setattr(self, name, value)
+
+
+def latest_states(count: int, now: datetime, seed: int = 42) -> List[CohortState]:
+    """A 7-day cohort of `count` reels scraped at `now`, the previous scrape six hours earlier."""
+    rng = random.Random(seed)
+    states = []
+    for index in range(count):
+        views = rng.randint(0, 5_000_000)
+        states.append(
+            CohortState(
+                reel_id=f"r{index}",
+                platform="instagram",
+                reel_url=f"https://www.instagram.com/reel/r{index}/",
+                publish_time=now - timedelta(seconds=rng.randint(0, 7 * 86_400)),
+                latest_scraped_at=now,
+                latest_views=views,
+                latest_likes=rng.randint(0, views // 10 + 1),
+                latest_comments=rng.randint(0, 5_000),
+                latest_shares_or_saves=rng.choice([None, rng.randint(0, 10_000)]),
+                prev_views=max(views - rng.randint(0, 50_000), 0),
+                prev_scraped_at=now - timedelta(hours=6),
+            )
+        )
+    return states
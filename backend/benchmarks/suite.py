@@ -0,0 +1,283 @@
+"""Micro-benchmark suite with JSON baselines and a regression check.
+
+Times the hot paths of ingestion and /reels/performance on deterministic inputs from
+`benchmarks.generators`: datetime parsing per format, item mapping (generic and compiled),
+the reference metrics (`compute_derived_metrics`, `attach_percentiles`), the NumPy engine and
+each response encoding, over cohorts of 1k to 1M reels. Each case runs at least
+`--min-runs` times (and up to `--repeat` while it fits in `--budget` seconds) after the inputs
+are built, and records the median and fastest run. Comparisons use the fastest run by
+default: scheduler and allocator noise only ever adds time, so the minimum is the most
+repeatable figure on a shared or single-core host.
+
+    python -m benchmarks.suite list
+    python -m benchmarks.suite run --output baseline.json               # on main
+    python -m benchmarks.suite run --output current.json --baseline baseline.json
+    python -m benchmarks.suite compare baseline.json current.json --threshold 0.15
+
+`run --baseline` and `compare` exit with status 1 when any case is slower than the
+baseline's by more than `--threshold` (a fraction). Baselines are machine-specific, so compare
+results recorded on the same host. `--max-rows 10000` keeps a run under a minute; the full run takes about ten minutes on one core.
+"""
+
+import argparse
+import fnmatch
+import gc
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from app.compiled_mapper import learn_item_mapper
+from app.config import settings
+from app.metrics import attach_percentiles, compute_derived_metrics
+from app.metrics_engine import CohortColumns, compute_performance
+from app.performance_encoding import DEFAULT_COLUMN_FIELDS, encode_columns, encode_performance, iter_ndjson
+from app.sources import _map_apify_item, _parse_datetime
+from benchmarks.generators import DATETIME_FORMATS, FIXED_NOW, apify_items, datetime_values, latest_states
+
+COHORT_SIZES = (1_000, 10_000, 100_000, 1_000_000)
+ITEM_SIZES = (10_000, 100_000)
+DEFAULT_THRESHOLD = 0.15
+
+
+@dataclass
+class Case:
+    """`prepare(n)` builds the inputs (untimed) and returns the call that is timed."""
+
+    name: str
+    prepare: Callable[[int], Callable[[], Any]]
+    sizes: Sequence[int]
+
+
+CASES: Dict[str, Case] = {}
+
+
+def case(name: str, sizes: Sequence[int]):
+    def register(prepare):
+        CASES[name] = Case(name, prepare, sizes)
+        return prepare
+
+    return register
+
+
+def _register_datetime_cases():
+    for fmt in DATETIME_FORMATS:
+
+        def prepare(n, fmt=fmt):
+            values = datetime_values(n, fmt)
+            return lambda: [_parse_datetime(value) for value in values]
+
+        case(f"parse_datetime.{fmt}", ITEM_SIZES)(prepare)
+
+
+_register_datetime_cases()
+
+
+@case("map_apify_item.mixed", ITEM_SIZES)
+def _map_mixed(n):
+    items = apify_items(n)
+    return lambda: [_map_apify_item(item, FIXED_NOW, "bench") for item in items]
+
+
+@case("map_apify_item.instagram", ITEM_SIZES)
+def _map_instagram(n):
+    items = apify_items(n, mixed=False)
+    return lambda: [_map_apify_item(item, FIXED_NOW, "bench") for item in items]
+
+
+@case("compiled_mapper.instagram", ITEM_SIZES)
+def _map_compiled(n):
+    items = apify_items(n, mixed=False)
+    return lambda: learn_item_mapper(items[: settings.mapper_sample_size]).map_items(
+        items, FIXED_NOW, "bench", "reels_feed"
+    )
+
+
+@case("compute_derived_metrics", COHORT_SIZES)
+def _derived(n):
+    states = latest_states(n, FIXED_NOW)
+    return lambda: compute_derived_metrics(states, FIXED_NOW)
+
+
+@case("attach_percentiles", COHORT_SIZES)
+def _percentiles(n):
+    derived = compute_derived_metrics(latest_states(n, FIXED_NOW), FIXED_NOW)
+    return lambda: attach_percentiles(derived)
+
+
+@case("cohort_columns.from_states", COHORT_SIZES)
+def _columns(n):
+    states = latest_states(n, FIXED_NOW)
+    return lambda: CohortColumns.from_states(states)
+
+
+@case("compute_performance", COHORT_SIZES)
+def _engine(n):
+    cohort = CohortColumns.from_states(latest_states(n, FIXED_NOW))
+    return lambda: compute_performance(cohort, FIXED_NOW)
+
+
+def _performance(n):
+    return compute_performance(CohortColumns.from_states(latest_states(n, FIXED_NOW)), FIXED_NOW)
+
+
+def _encoder(name):
+    def prepare(n):
+        performance = _performance(n)
+
+        def encode():
+            settings.performance_encoder = name
+            return encode_performance(performance)
+
+        return encode
+
+    return prepare
+
+
+# ~100 µs a row; 1M rows would take minutes per run.
+case("encode.pydantic", COHORT_SIZES[:3])(_encoder("pydantic"))
+case("encode.orjson", COHORT_SIZES)(_encoder("orjson"))
+
+
+@case("encode.ndjson", COHORT_SIZES)
+def _ndjson(n):
+    performance = _performance(n)
+    return lambda: sum(len(chunk) for chunk in iter_ndjson(performance))
+
+
+@case("encode.columns", COHORT_SIZES)
+def _encode_columns(n):
+    performance = _performance(n)
+    return lambda: encode_columns(performance, DEFAULT_COLUMN_FIELDS)
+
+
+def measure(call: Callable[[], Any], min_runs: int, repeat: int, budget: float) -> List[float]:
+    """Seconds per run: at least `min_runs`, then more up to `repeat` while under `budget` seconds."""
+    seconds: List[float] = []
+    while len(seconds) < min_runs or (len(seconds) < repeat and sum(seconds) < budget):
+        gc.collect()
+        started = time.perf_counter()
+        call()
+        seconds.append(time.perf_counter() - started)
+    return seconds
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suite(
+    patterns: Sequence[str], max_rows: Optional[int], min_runs: int, repeat: int, budget: float
+) -> Dict[str, Any]:
+    results: Dict[str, Dict[str, Any]] = {}
+    for bench in CASES.values():
+        if patterns and not any(fnmatch.fnmatch(bench.name, pattern) for pattern in patterns):
+            continue
+        for n in bench.sizes:
+            if max_rows and n > max_rows:
+                continue
+            key = f"{bench.name}[{n}]"
+            call = bench.prepare(n)
+            seconds = measure(call, min_runs, repeat, budget)
+            del call
+            median = statistics.median(seconds)
+            results[key] = {"n": n, "median_s": median, "min_s": min(seconds), "runs": len(seconds)}
+            print(f"{key:<42} {median * 1000:11.2f} ms  {median / n * 1e9:10.0f} ns/item  ({len(seconds)} runs)")
+    return {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "git_commit": _git_commit(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "results": results,
+    }
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any], threshold: float, stat: str = "min_s") -> bool:
+    """Print every case's change against the baseline; True when any slowed down by more than `threshold`."""
+    regressed = False
+    base_results, current_results = baseline["results"], current["results"]
+    print(f"{'case':<42} {'baseline':>12} {'current':>12} {'change':>8}")
+    for key in sorted(set(base_results) | set(current_results)):
+        before, after = base_results.get(key), current_results.get(key)
+        if before is None or after is None:
+            status = "new" if before is None else "missing"
+            value = after or before
+            print(f"{key:<42} {'':>12} {value[stat] * 1000:9.2f} ms {'':>8}  {status}")
+            continue
+        change = after[stat] / before[stat] - 1 if before[stat] else 0.0
+        status = ""
+        if change > threshold:
+            status = "REGRESSION"
+            regressed = True
+        elif change < -threshold:
+            status = "faster"
+        print(
+            f"{key:<42} {before[stat] * 1000:9.2f} ms {after[stat] * 1000:9.2f} ms {change:+8.1%}  {status}"
+        )
+    return regressed
+
+
+def _load(path: str) -> Dict[str, Any]:
+    with open(path) as handle:
+        return json.load(handle)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("list", help="List the cases and their sizes.")
+
+    run_parser = commands.add_parser("run", help="Run the suite and write its results as JSON.")
+    run_parser.add_argument("patterns", nargs="*", help="Only cases matching these glob patterns.")
+    run_parser.add_argument("--output", default="benchmark-results.json")
+    run_parser.add_argument("--max-rows", type=int, default=None, help="Skip sizes above this.")
+    run_parser.add_argument("--min-runs", type=int, default=5)
+    run_parser.add_argument("--repeat", type=int, default=7)
+    run_parser.add_argument("--budget", type=float, default=5.0, help="Seconds per case before stopping at --min-runs.")
+    run_parser.add_argument("--baseline", help="Compare against this results file afterwards.")
+    run_parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    run_parser.add_argument("--stat", choices=("min_s", "median_s"), default="min_s")
+
+    compare_parser = commands.add_parser("compare", help="Compare two results files.")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    compare_parser.add_argument("--stat", choices=("min_s", "median_s"), default="min_s")
+
+    args = parser.parse_args(argv)
+    if args.command == "list":
+        for bench in CASES.values():
+            print(f"{bench.name:<34} {', '.join(str(n) for n in bench.sizes)}")
+        return 0
+    if args.command == "compare":
+        return int(compare(_load(args.baseline), _load(args.current), args.threshold, args.stat))
+
+    results = run_suite(args.patterns, args.max_rows, args.min_runs, args.repeat, args.budget)
+    with open(args.output, "w") as handle:
+        json.dump(results, handle, indent=2, sort_keys=True)
+    print(f"wrote {len(results['results'])} results to {args.output}")
+    if args.baseline:
+        return int(compare(_load(args.baseline), results, args.threshold, args.stat))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
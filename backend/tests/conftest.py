@@ -0,0 +1,26 @@
+from pathlib import Path
+
+import pytest
+from alembic.script import ScriptDirectory
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.db import SessionLocal
+
+ALEMBIC_HEAD = ScriptDirectory(str(Path(__file__).resolve().parents[1] / "alembic")).get_current_head()
+
+
+@pytest.fixture
+def session():
+    """A session on DATABASE_URL migrated to head; whatever a test leaves uncommitted is rolled back."""
+    db = SessionLocal()
+    try:
+        version = db.execute(text("SELECT version_num FROM alembic_version")).scalar()
+    except SQLAlchemyError:
+        version = None
+    if version != ALEMBIC_HEAD:
+        db.close()
+        pytest.skip("needs a Postgres database migrated to head in DATABASE_URL")
+    yield db
+    db.rollback()
+    db.close()
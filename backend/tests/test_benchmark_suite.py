@@ -0,0 +1,33 @@
+from datetime import timedelta, timezone
+
+from app.sources import _map_apify_item, _parse_datetime
+from benchmarks.generators import DATETIME_FORMATS, FIXED_NOW, apify_items
+from benchmarks.suite import compare
+
+
+def test_every_datetime_format_parses_to_the_same_instant():
+    moment = FIXED_NOW - timedelta(hours=5, milliseconds=250)
+    for fmt, render in DATETIME_FORMATS.items():
+        parsed = _parse_datetime(render(moment))
+        expected = moment if fmt in ("iso_millis_z", "epoch_float") else moment.replace(microsecond=0)
+        assert parsed.astimezone(timezone.utc) == expected, fmt
+
+
+def test_generated_items_are_deterministic_and_mostly_valid():
+    items = apify_items(2000)
+    assert items == apify_items(2000)
+    assert items != apify_items(2000, seed=8)
+    mapped = [_map_apify_item(item, FIXED_NOW, "test") for item in items]
+    dropped = sum(event is None for event in mapped)
+    assert 0 < dropped < 60
+    assert {event["publish_time"] <= FIXED_NOW for event in mapped if event} == {True}
+
+
+def test_compare_flags_only_slowdowns_beyond_the_threshold(capsys):
+    baseline = {"results": {"a[10]": {"min_s": 1.0}, "b[10]": {"min_s": 1.0}, "gone[10]": {"min_s": 1.0}}}
+    current = {"results": {"a[10]": {"min_s": 1.1}, "b[10]": {"min_s": 0.5}, "new[10]": {"min_s": 1.0}}}
+    assert not compare(baseline, current, threshold=0.15)
+    current["results"]["a[10]"]["min_s"] = 1.2
+    assert compare(baseline, current, threshold=0.15)
+    output = capsys.readouterr().out
+    assert "REGRESSION" in output and "faster" in output and "missing" in output and "new" in output
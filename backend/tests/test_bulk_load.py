@@ -0,0 +1,71 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import text
+
+from app import bulk_load
+
+RAW_SQL = text(
+    "SELECT reel_id, scraped_at, views, likes, comments, shares_or_saves, reel_url, apify_run_id "
+    "FROM reels_raw_events WHERE reel_id LIKE 'parity-test-%' ORDER BY reel_id, scraped_at, apify_run_id"
+)
+LATEST_SQL = text(
+    "SELECT reel_id, reel_url, latest_views, latest_likes, latest_comments, latest_shares_or_saves, "
+    "latest_scraped_at, prev_views, prev_scraped_at, last_raw_event_at "
+    "FROM reels_latest_state WHERE reel_id LIKE 'parity-test-%' ORDER BY reel_id"
+)
+
+
+def _event(reel, scraped_at, views, run="parity-test-run"):
+    return {
+        "reel_id": f"parity-test-{reel}",
+        "platform": "instagram",
+        "reel_url": f"https://www.instagram.com/reel/parity{reel}/",
+        "scraped_at": scraped_at,
+        "publish_time": scraped_at - timedelta(days=1),
+        "views": views,
+        "likes": views // 10,
+        "comments": reel,
+        "shares_or_saves": reel if reel % 2 else None,
+        "creator_id": None,
+        "caption_text": None,
+        "audio_id": None,
+        "audio_name": None,
+        "duration_seconds": None,
+        "apify_run_id": run,
+        "source_surface": "reels_feed",
+    }
+
+
+def _batch(now):
+    events = [_event(reel, now, 100 + reel) for reel in range(10)]
+    # Duplicate reel_ids within and across chunks of 4: a later scrape, an exact repeat and an
+    # older scrape arriving last.
+    events.insert(2, _event(1, now - timedelta(hours=1), 50))
+    events.append(_event(3, now + timedelta(minutes=5), 300))
+    events.append(_event(5, now, 105))
+    events.append(_event(7, now - timedelta(hours=2), 70, run="parity-test-late"))
+    return events
+
+
+def _load(session, load, now, heartbeat_hours):
+    # The same known state before either path: reels 0-5 scraped an hour earlier, 0-2 unchanged since.
+    seed = [_event(reel, now - timedelta(hours=3), 100 + reel if reel < 3 else 90) for reel in range(6)]
+    bulk_load.insert_events(session, seed, 4)
+    counts = load(session, _batch(now), 4, heartbeat_hours=heartbeat_hours)
+    result = counts, session.execute(RAW_SQL).all(), session.execute(LATEST_SQL).all()
+    session.execute(text("DELETE FROM reels_raw_events WHERE reel_id LIKE 'parity-test-%'"))
+    session.execute(text("DELETE FROM reels_latest_state WHERE reel_id LIKE 'parity-test-%'"))
+    return result
+
+
+@pytest.mark.parametrize("heartbeat_hours", [None, 24])
+def test_copy_and_values_paths_write_the_same_rows(session, heartbeat_hours):
+    now = datetime.now(timezone.utc).replace(microsecond=0)
+    values = _load(session, bulk_load.insert_events, now, heartbeat_hours)
+    copied = _load(session, bulk_load.copy_events, now, heartbeat_hours)
+
+    assert copied[0] == values[0]
+    assert copied[1] == values[1]
+    assert copied[2] == values[2]
+    assert len(values[2]) == 10
@@ -0,0 +1,81 @@
+import asyncio
+import random
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app import cohort_windows
+from app.cohort_windows import WINDOWS, window_distributions
+from app.config import settings
+from app.metrics_engine import CohortColumns, compute_performance
+from app.snapshot_cache import precomputed_is_stale
+
+
+def _rows(count=2000, seed=17):
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc)
+    rows = []
+    for index in range(count):
+        # Few distinct counters, so every metric has ties across the window boundaries.
+        views = rng.choice([0, 10, 250, 1000, rng.randint(0, 5_000_000)])
+        rows.append(
+            (
+                f"r{index}",
+                "instagram",
+                f"https://example.com/{index}",
+                now - timedelta(hours=rng.choice([1, 100, rng.randint(0, 100 * 24)]), microseconds=rng.randint(0, 999)),
+                now,
+                views,
+                rng.choice([0, 5, views // 10]),
+                rng.choice([0, 2]),
+                rng.choice([None, 3]),
+                rng.choice([None, max(views - 100, 0)]),
+                rng.choice([None, now - timedelta(hours=6)]),
+            )
+        )
+    return rows, now
+
+
+@pytest.mark.parametrize("window", sorted(WINDOWS))
+def test_binary_search_percentiles_match_ranking_within_the_window(window):
+    rows, now = _rows()
+    days = WINDOWS[window]
+    distributions = window_distributions(CohortColumns.from_rows(rows), now)[days]
+    cohort = CohortColumns.from_rows([row for row in rows if row[3] >= now - timedelta(days=days)])
+    assert compute_performance(cohort, now, distributions.percentiles).rows() == compute_performance(cohort, now).rows()
+
+    reel = compute_performance(cohort, now).rows()[0]
+    assert distributions.percentile("views", reel["views"]) == reel["views_percentile"]
+
+
+@pytest.mark.parametrize("age_seconds, ranked_live", [(60, False), (600, True)])
+def test_stale_distributions_fall_back_to_ranking_per_request(monkeypatch, age_seconds, ranked_live):
+    rows, now = _rows(count=200)
+    computed_at = now - timedelta(seconds=age_seconds)
+    distributions = window_distributions(CohortColumns.from_rows(rows), computed_at)[7]
+
+    async def stored(session, days):
+        return distributions
+
+    async def cohort(session, published_after):
+        return CohortColumns.from_rows([row for row in rows if row[3] >= published_after])
+
+    monkeypatch.setattr(settings, "performance_precomputed_max_age_seconds", 300)
+    monkeypatch.setattr(cohort_windows, "load_window_distributions", stored)
+    monkeypatch.setattr(cohort_windows, "load_cohort", cohort)
+    performance = asyncio.run(cohort_windows.load_window_performance(None, "7d"))
+    # Ranked against the distributions, rows are evaluated at their refresh; ranked live, at request time.
+    assert (performance.computed_at == computed_at) is not ranked_live
+
+
+def test_precomputed_budget_defaults_to_two_ingestion_intervals(monkeypatch, caplog):
+    monkeypatch.setattr(settings, "performance_precomputed_max_age_seconds", 0)
+    monkeypatch.setattr(settings, "ingestion_interval_hours", 6)
+    now = datetime.now(timezone.utc)
+    assert not precomputed_is_stale("test source", now - timedelta(hours=11))
+
+    # A stale refresh is reported once, however many requests find it.
+    refreshed_at = now - timedelta(hours=13)
+    assert precomputed_is_stale("test source", refreshed_at)
+    assert precomputed_is_stale("test source", refreshed_at)
+    assert len([record for record in caplog.records if "test source" in record.getMessage()]) == 1
@@ -0,0 +1,113 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from app.apify import UNKNOWN_RUN_ID
+from app.compiled_mapper import learn_item_mapper
+from app.sources import InstagramReelsAdapter, _map_apify_item
+from tools.fake_apify import make_item
+
+SCRAPED_AT = datetime(2025, 12, 11, tzinfo=timezone.utc)
+
+
+def _with_publish(item, key, value):
+    item = dict(item)
+    item.pop("timestamp")
+    item[key] = value
+    return item
+
+
+@pytest.mark.parametrize(
+    "key, value",
+    [
+        ("timestamp", "2025-12-10T05:00:00.000Z"),
+        ("publishDate", "2025-12-10T05:00:00Z"),
+        ("takenAt", "2025-12-10 05:00:00"),
+        ("takenAt", "2025-12-10T05:00:00"),
+        ("publishDate", "2025-12-10T05:00:00+02:00"),
+        ("takenAtTimestamp", 1765342800),
+    ],
+)
+def test_learned_mapper_matches_generic_mapper(key, value):
+    items = [_with_publish(make_item(i), key, value) for i in range(50)]
+    mapper = learn_item_mapper(items[:10])
+
+    assert mapper.fast_map is not None
+    for item in items:
+        assert mapper.map_item(item, SCRAPED_AT, "run", "reels_feed") == _map_apify_item(
+            item, SCRAPED_AT, "run", "reels_feed"
+        )
+    assert mapper.fallbacks == 0
+
+
+def test_items_off_the_learned_shape_fall_back_to_generic():
+    items = [make_item(i) for i in range(20)]
+    mapper = learn_item_mapper(items)
+    odd_items = [
+        _with_publish(make_item(100), "takenAtTimestamp", 1765342800),  # different key
+        dict(make_item(101), publishDate="not a date"),  # earlier key present
+        dict(make_item(102), timestamp="2025-12-10T05:00:00.000000Z"),  # different layout
+        dict(make_item(103), timestamp="2025-1-9T05:00:00.000Z"),  # strptime-only layout
+        dict(make_item(104), timestamp=None),  # unmappable
+    ]
+
+    for item in odd_items:
+        assert mapper.map_item(item, SCRAPED_AT, "run", "reels_feed") == _map_apify_item(
+            item, SCRAPED_AT, "run", "reels_feed"
+        )
+    assert mapper.fallbacks == len(odd_items)
+
+
+def test_mixed_sample_uses_generic_mapper():
+    items = [make_item(0), _with_publish(make_item(1), "takenAtTimestamp", 1765342800)]
+    assert learn_item_mapper(items).fast_map is None
+
+
+def _renamed(item, renames):
+    return {renames.get(key, key): value for key, value in item.items()}
+
+
+ALTERNATIVE_KEYS = {"id": "itemId", "url": "link", "playsCount": "playCount", "likesCount": "likes"}
+
+
+def test_learned_alternative_keys_match_generic_mapper():
+    items = [_renamed(make_item(i), ALTERNATIVE_KEYS) for i in range(50)]
+    items[7]["likes"] = 0  # a falsy learned value falls through to the (absent) later keys
+    mapper = learn_item_mapper(items[:10])
+
+    assert mapper.fast_map is not None
+    for item in items:
+        assert mapper.map_item(item, SCRAPED_AT, "run", "reels_feed") == _map_apify_item(
+            item, SCRAPED_AT, "run", "reels_feed"
+        )
+    assert mapper.fallbacks == 0
+
+    # An item carrying a key the generic mapper prefers over a learned one takes the generic path.
+    preferred = dict(items[0], playsCount=123, id="preferred-id")
+    assert mapper.map_item(preferred, SCRAPED_AT, "run", "reels_feed") == _map_apify_item(
+        preferred, SCRAPED_AT, "run", "reels_feed"
+    )
+    assert mapper.fallbacks == 1
+
+
+def test_keys_the_sample_disagrees_on_keep_the_whole_chain():
+    items = [make_item(i) if i % 2 else _renamed(make_item(i), ALTERNATIVE_KEYS) for i in range(20)]
+    mapper = learn_item_mapper(items[:10])
+
+    for item in items:
+        assert mapper.map_item(item, SCRAPED_AT, "run", "reels_feed") == _map_apify_item(
+            item, SCRAPED_AT, "run", "reels_feed"
+        )
+    assert mapper.fallbacks == 0
+
+
+def test_batches_without_a_run_id_do_not_share_a_mapper():
+    adapter = InstagramReelsAdapter()
+    first = [make_item(i) for i in range(20)]
+    second = [_with_publish(make_item(i), "takenAtTimestamp", 1765342800) for i in range(20, 40)]
+
+    for items in (first, second):
+        assert adapter.map_items(items, SCRAPED_AT, UNKNOWN_RUN_ID, "reels_feed") == [
+            _map_apify_item(item, SCRAPED_AT, UNKNOWN_RUN_ID, "reels_feed") for item in items
+        ]
+    assert not adapter._run_mappers
@@ -0,0 +1,91 @@
+import random
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import text
+
+from app import bulk_load
+from app.creators import outlier_score, outlier_tier
+from app.metrics_engine import CohortColumns, compute_performance
+
+
+def test_outlier_scores_and_tiers_follow_the_source_of_truth():
+    # Creator average excluding the video = 10,000 over 4 other videos.
+    assert outlier_score(50_000, 90_000, 5) == 5.0
+    assert outlier_tier(5.0) == "Strong"
+    assert outlier_tier(2.5) == "Strong"
+    assert outlier_tier(20.0) == "Major Outlier"
+    assert outlier_tier(150.0) == "Explosive"
+    assert outlier_tier(1.0) == "Typical"
+    # Deferred until a second video (with views) exists.
+    assert outlier_score(1_000, 1_000, 1) is None
+    assert outlier_score(1_000, 1_000, 3) is None
+    assert outlier_score(1_000, None, None) is None
+
+
+def test_vectorized_outliers_match_scalar_helpers():
+    rng = random.Random(11)
+    now = datetime.now(timezone.utc)
+    rows = []
+    for index in range(3000):
+        views = rng.choice([0, 1, rng.randint(0, 10_000_000)])
+        count = rng.choice([None, 1, 2, rng.randint(2, 20_000)])
+        total = None if count is None else views + rng.choice([0, rng.randint(0, 10**10)])
+        rows.append(
+            (f"r{index}", "tiktok", f"https://example.com/{index}", now - timedelta(hours=1), now, views, 0, 0, None)
+            + (None, None, f"c{index % 7}", count, total)
+        )
+    performance = compute_performance(CohortColumns.from_rows(rows), now)
+    for row, out in zip(rows, performance.rows()):
+        expected = outlier_score(row[5], row[13], row[12])
+        assert (out["outlier_score"], out["outlier_tier"]) == (expected, outlier_tier(expected))
+
+
+def _events(batch, rng, scraped_at):
+    events = []
+    for _ in range(200):
+        index = rng.randint(0, 150)
+        events.append(
+            {
+                "reel_id": f"agg-test-{index}",
+                "platform": "instagram",
+                "reel_url": f"https://www.instagram.com/reel/agg{index}/",
+                "scraped_at": scraped_at,
+                "publish_time": scraped_at - timedelta(days=1),
+                "views": rng.randint(0, 100_000),
+                "likes": 0,
+                "comments": 0,
+                "shares_or_saves": None,
+                # Reels mostly keep their creator, sometimes move, sometimes arrive without one.
+                "creator_id": rng.choice([f"agg-test-c{index % 4}"] * 6 + [f"agg-test-c{batch % 5}", None]),
+                "caption_text": None,
+                "audio_id": None,
+                "audio_name": None,
+                "duration_seconds": None,
+                "apify_run_id": f"agg-test-{batch}",
+                "source_surface": "reels_feed",
+            }
+        )
+    return events
+
+
+@pytest.mark.parametrize("load", [bulk_load.insert_events, bulk_load.copy_events])
+def test_incremental_aggregates_match_a_full_recompute(session, load):
+    rng = random.Random(5)
+    scraped_at = datetime.now(timezone.utc)
+    for batch in range(6):
+        load(session, _events(batch, rng, scraped_at + timedelta(minutes=batch)), 64, None)
+
+    incremental = session.execute(
+        text(
+            "SELECT creator_id, video_count, total_views FROM creator_aggregates "
+            "WHERE creator_id LIKE 'agg-test-%' AND video_count > 0 ORDER BY creator_id"
+        )
+    ).all()
+    recomputed = session.execute(
+        text(
+            "SELECT creator_id, count(*), sum(latest_views) FROM reels_latest_state "
+            "WHERE creator_id LIKE 'agg-test-%' GROUP BY creator_id ORDER BY creator_id"
+        )
+    ).all()
+    assert incremental and [tuple(row) for row in incremental] == [tuple(row) for row in recomputed]
@@ -0,0 +1,59 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import text
+
+from app import bulk_load
+from app.ingest_totals import RECOUNT_SQL, record_scrape
+from app.models import IngestTotals
+
+TOTALS_SQL = text("SELECT total_raw_events, latest_state_count FROM ingest_totals WHERE id = 1")
+EXACT_SQL = text("SELECT (SELECT count(*) FROM reels_raw_events), (SELECT count(*) FROM reels_latest_state)")
+
+
+def _events(count, scraped_at, views):
+    return [
+        {
+            "reel_id": f"totals-test-{index}",
+            "platform": "instagram",
+            "reel_url": f"https://www.instagram.com/reel/totals{index}/",
+            "scraped_at": scraped_at,
+            "publish_time": scraped_at - timedelta(days=1),
+            "views": views,
+            "likes": 0,
+            "comments": 0,
+            "shares_or_saves": None,
+            "creator_id": None,
+            "caption_text": None,
+            "audio_id": None,
+            "audio_name": None,
+            "duration_seconds": None,
+            "apify_run_id": f"totals-test-{scraped_at.isoformat()}",
+            "source_surface": "reels_feed",
+        }
+        for index in range(count)
+    ]
+
+
+@pytest.mark.parametrize("load", [bulk_load.insert_events, bulk_load.copy_events])
+def test_loads_keep_totals_equal_to_exact_counts(session, load):
+    session.execute(RECOUNT_SQL)
+    now = datetime.now(timezone.utc)
+    load(session, _events(30, now - timedelta(hours=2), 10), 7)
+    # 20 known reels plus 15 new ones; one chunk both inserts and updates latest state.
+    load(session, _events(50, now - timedelta(hours=1), 20)[15:], 7)
+    # Unchanged snapshots are suppressed and counted nowhere.
+    load(session, _events(50, now, 20), 7, heartbeat_hours=24)
+    assert session.execute(TOTALS_SQL).one() == session.execute(EXACT_SQL).one()
+
+
+def test_record_scrape_tracks_the_newest_scrape(session):
+    session.execute(RECOUNT_SQL)
+    later = datetime.now(timezone.utc) + timedelta(days=1)
+    record_scrape(session, later, "run-a", 40)
+    record_scrape(session, later, "run-b", 10)
+    # An older scrape landing late does not replace the last run.
+    record_scrape(session, later - timedelta(hours=6), "run-c", 99)
+    totals = session.get(IngestTotals, 1)
+    session.refresh(totals)
+    assert (totals.last_scraped_at, totals.last_apify_run_id, totals.events_last_run) == (later, "run-b", 50)
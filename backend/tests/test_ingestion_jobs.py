@@ -0,0 +1,102 @@
+import threading
+import time
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+
+from app import ingestion, jobs
+from app.config import settings
+from app.db import engine
+
+
+@pytest.fixture
+def queue(monkeypatch):
+    @contextmanager
+    def always_acquired():
+        yield True
+
+    monkeypatch.setattr(jobs, "advisory_lock", always_acquired)
+    job_queue = jobs.IngestionJobQueue(history=2)
+    yield job_queue
+    job_queue.shutdown()
+
+
+def _wait(job, timeout=5):
+    deadline = time.monotonic() + timeout
+    while job.finished_at is None and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert job.finished_at is not None, f"job still {job.status}"
+
+
+def test_submit_is_single_flight_and_reports_progress(queue, monkeypatch):
+    release = threading.Event()
+
+    def fake_run(session, stats):
+        stats.items_received = 7
+        release.wait(5)
+        stats.events_inserted = 7
+        return {"ingested_count": 7, "suppressed_count": 0, "apify_run_id": "run-1"}
+
+    monkeypatch.setattr(ingestion, "run_ingestion", fake_run)
+    job, created = queue.submit("manual")
+    again, created_again = queue.submit("scheduled")
+    assert created and not created_again
+    assert again is job
+    assert job.status in jobs.ACTIVE_STATUSES
+
+    release.set()
+    _wait(job)
+    assert job.status == "succeeded"
+    assert job.progress["events_inserted"] == 7
+    assert job.result["apify_run_id"] == "run-1"
+
+    # Once finished, the next submission starts a new job.
+    next_job, created = queue.submit("manual")
+    assert created and next_job.id != job.id
+    _wait(next_job)
+
+
+def test_failed_job_records_error_and_history_is_bounded(queue, monkeypatch):
+    def failing_run(session, stats):
+        raise RuntimeError("Apify run abc finished with status FAILED.")
+
+    monkeypatch.setattr(ingestion, "run_ingestion", failing_run)
+    submitted = []
+    for _ in range(3):
+        job, _ = queue.submit("manual")
+        _wait(job)
+        submitted.append(job)
+
+    assert submitted[-1].status == "failed"
+    assert "FAILED" in submitted[-1].error
+    assert queue.get(submitted[0].id) is None
+    assert queue.get(submitted[-1].id) is submitted[-1]
+
+
+LOCK_HOLDER_SQL = text(
+    "SELECT a.state FROM pg_locks l JOIN pg_stat_activity a USING (pid) "
+    "WHERE l.locktype = 'advisory' AND l.granted AND l.objid = :key"
+)
+
+
+@pytest.mark.parametrize("pooler_mode, state", [("session", "idle"), ("transaction", "idle in transaction")])
+def test_advisory_lock_is_exclusive_and_released(monkeypatch, pooler_mode, state):
+    try:
+        with engine.connect() as probe:
+            probe.execute(text("SELECT 1"))
+    except SQLAlchemyError:
+        pytest.skip("needs a Postgres database in DATABASE_URL")
+    monkeypatch.setattr(settings, "db_pooler_mode", pooler_mode)
+
+    def holder_states():
+        with engine.connect() as probe:
+            return probe.execute(LOCK_HOLDER_SQL, {"key": jobs.INGESTION_LOCK_KEY}).scalars().all()
+
+    with jobs.advisory_lock() as acquired:
+        assert acquired
+        with jobs.advisory_lock() as acquired_again:
+            assert not acquired_again
+        assert holder_states() == [state]
+    assert holder_states() == []
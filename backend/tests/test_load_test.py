@@ -0,0 +1,19 @@
+from tools.load_test import percentile, summarize
+
+
+def test_percentile_is_nearest_rank():
+    values = [float(value) for value in range(1, 101)]
+    assert (percentile(values, 0.5), percentile(values, 0.95), percentile(values, 0.99)) == (50.0, 95.0, 99.0)
+    assert percentile([7.0], 0.99) == 7.0
+    assert percentile([], 0.5) == 0.0
+
+
+def test_summarize_groups_by_phase_and_excludes_failures_from_latency():
+    samples = [("ingesting", "/a", 0.010 * index, True) for index in range(1, 20)]
+    samples += [("ingesting", "/a", 30.0, False), ("before", "/b", 0.002, True)]
+    rows = summarize(samples, {"before": 2.0, "ingesting": 4.0})
+    assert [(row["phase"], row["path"]) for row in rows] == [("before", "/b"), ("ingesting", "/a")]
+    ingesting = rows[1]
+    assert ingesting["requests"] == 20 and ingesting["rps"] == 5.0
+    assert ingesting["error_rate"] == 0.05
+    assert round(ingesting["p99_ms"]) == 190
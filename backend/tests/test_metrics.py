@@ -1,9 +1,25 @@
+import random
 from datetime import datetime, timedelta, timezone
 
+import numpy as np
+import pytest
+
 from app.metrics import attach_percentiles, compute_derived_metrics
+from app.metrics_engine import CohortColumns, _round_like_python, compute_performance
 from app.models import ReelLatestState
 
 
+def reference_engine(states, now=None):
+    return attach_percentiles(compute_derived_metrics(states, now))
+
+
+def vectorized_engine(states, now=None):
+    return compute_performance(CohortColumns.from_states(states), now).rows()
+
+
+ENGINES = [reference_engine, vectorized_engine]
+
+
 def make_state(reel_id: str, views: int, likes: int, comments: int, publish_hours_ago: int):
     return ReelLatestState(
         reel_id=reel_id,
@@ -18,14 +34,14 @@ def make_state(reel_id: str, views: int, likes: int, comments: int, publish_hour
     )
 
 
-def test_percentile_ranks_and_score_ordering():
+@pytest.mark.parametrize("engine", ENGINES)
+def test_percentile_ranks_and_score_ordering(engine):
     states = [
         make_state("a", views=1000, likes=100, comments=20, publish_hours_ago=10),  # strong
         make_state("b", views=500, likes=20, comments=5, publish_hours_ago=20),  # weaker
         make_state("c", views=1500, likes=80, comments=10, publish_hours_ago=5),  # high views/hr
     ]
-    derived = compute_derived_metrics(states)
-    enriched = attach_percentiles(derived)
+    enriched = engine(states)
 
     # Expect all required fields present
     for item in enriched:
@@ -38,3 +54,44 @@ def test_percentile_ranks_and_score_ordering():
     # Reel with highest views/hr should be near the top
     top_reel = max(enriched, key=lambda x: x["views_per_hour_percentile"])
     assert top_reel["reel_id"] == "c"
+
+
+def _random_states(count, seed):
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc)
+    states = []
+    for index in range(count):
+        views = rng.choice([0, 1, 7, 250, 1000]) if index % 5 == 0 else rng.randint(0, 5_000_000)
+        state = make_state(
+            f"r{index}",
+            views=views,
+            likes=rng.randint(0, max(views, 1)),
+            comments=rng.randint(0, 5000),
+            publish_hours_ago=0,
+        )
+        state.publish_time = now - timedelta(microseconds=rng.randint(0, 7 * 86_400_000_000))
+        state.latest_shares_or_saves = rng.choice([None, 0, rng.randint(0, 10_000)])
+        state.latest_scraped_at = now - timedelta(microseconds=rng.randint(0, 3_600_000_000))
+        if index % 3:
+            # Previous snapshot: sometimes seconds before the latest one, sometimes with more views or none recorded.
+            state.prev_views = rng.choice([views, max(views - rng.randint(0, 50_000), 0), views + 10, None])
+            state.prev_scraped_at = state.latest_scraped_at - timedelta(microseconds=rng.randint(1, 86_400_000_000))
+        states.append(state)
+    return states, now
+
+
+@pytest.mark.parametrize("count", [0, 1, 2, 5000])
+def test_vectorized_engine_matches_reference_exactly(count):
+    states, now = _random_states(count, seed=count)
+    assert vectorized_engine(states, now) == reference_engine(states, now)
+
+
+def test_round_like_python_on_near_ties():
+    rng = np.random.default_rng(7)
+    ties = (np.arange(-20_000, 20_000) + 0.5) / 100
+    values = np.concatenate(
+        [ties, np.nextafter(ties, np.inf), np.nextafter(ties, -np.inf), rng.uniform(0, 1e7, 100_000), [0.0, 1.005, 2.675]]
+    )
+    for ndigits in (2, 4):
+        expected = [round(value, ndigits) for value in values.tolist()]
+        assert _round_like_python(values, ndigits).tolist() == expected
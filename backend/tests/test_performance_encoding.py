@@ -0,0 +1,62 @@
+import json
+from datetime import datetime, timedelta, timezone
+
+from app.config import settings
+from app.metrics_engine import CohortColumns, compute_performance
+from app.performance_encoding import COLUMN_FIELDS, encode_columns, encode_performance, iter_ndjson
+
+
+def _performance(count=250):
+    now = datetime.now(timezone.utc)
+    rows = [
+        (
+            f"r{index}",
+            "tiktok" if index % 3 else "instagram",
+            f"https://example.com/reel/{index}/",
+            now - timedelta(hours=index % 48 + 1, microseconds=index),
+            now,
+            index * 37,
+            index % 11,
+            index % 5,
+            None if index % 4 else index,
+            None if index % 2 else index * 30,
+            None if index % 2 else now - timedelta(hours=3),
+            f"c{index % 9}" if index % 7 else None,
+            index % 9 + 1,
+            index * 900,
+        )
+        for index in range(count)
+    ]
+    return compute_performance(CohortColumns.from_rows(rows), now)
+
+
+def test_orjson_encoder_matches_the_validated_document(monkeypatch):
+    performance = _performance()
+    monkeypatch.setattr(settings, "performance_encoder", "pydantic")
+    validated = encode_performance(performance, [5, 2, 9], "cursor")
+    monkeypatch.setattr(settings, "performance_encoder", "orjson")
+    fast = encode_performance(performance, [5, 2, 9], "cursor")
+    assert json.loads(fast) == json.loads(validated)
+
+    monkeypatch.setattr(settings, "performance_encoder", "pydantic")
+    full = json.loads(encode_performance(performance))
+    chunks = list(iter_ndjson(performance, chunk_rows=100))
+    assert len(chunks) == 3
+    assert [json.loads(line) for line in b"".join(chunks).splitlines()] == full["items"]
+
+
+def test_columns_decode_to_the_rows():
+    performance = _performance()
+    indices = [7, 3, 200, 3]
+    payload = json.loads(encode_columns(performance, COLUMN_FIELDS, indices, "next"))
+    assert payload["count"] == len(indices) and payload["next_cursor"] == "next"
+    columns = payload["columns"]
+    for field in ("platform", "outlier_tier"):
+        column = columns.pop(field)
+        columns[field] = [column["dictionary"][code] for code in column["codes"]]
+    assert len(payload["columns"]["platform"]) == len(indices)
+    for position, row in enumerate(performance.rows(indices)):
+        assert columns["publish_time"][position] == int(row.pop("publish_time").timestamp() * 1000)
+        assert {field: columns[field][position] for field in row if field in columns} == {
+            field: value for field, value in row.items() if field in columns
+        }
@@ -0,0 +1,65 @@
+import random
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.metrics_engine import CohortColumns, compute_performance
+from app.performance_page import SORT_KEYS, PageRequest, decode_cursor, encode_cursor, select_page
+
+
+def _performance(count=400, seed=3):
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc)
+    rows = []
+    for index in range(count):
+        # Few distinct view counts, so every sort key has long runs of ties.
+        views = rng.choice([0, 10, 250, 1000, 5000])
+        rows.append(
+            (
+                f"r{index:04d}",
+                rng.choice(["instagram", "tiktok"]),
+                f"https://example.com/{index}",
+                now - timedelta(hours=rng.choice([1, 24, 48])),
+                now,
+                views,
+                rng.choice([0, 5, 50]),
+                rng.choice([0, 2]),
+                None,
+                rng.choice([None, 0, 250]),
+                rng.choice([None, now - timedelta(hours=6)]),
+            )
+        )
+    return compute_performance(CohortColumns.from_rows(rows), now)
+
+
+def _expected(performance, sort, min_percentile=None, platform=None):
+    rows = performance.rows()
+    rows = [row for row in rows if platform is None or row["platform"] == platform]
+    rows = [row for row in rows if min_percentile is None or row[SORT_KEYS[sort]] >= min_percentile]
+    return [row["reel_id"] for row in sorted(rows, key=lambda row: (-row[sort], row["reel_id"]))]
+
+
+@pytest.mark.parametrize("sort", sorted(SORT_KEYS))
+@pytest.mark.parametrize("limit", [1, 7, 1000])
+def test_pages_walk_the_sorted_filtered_cohort(sort, limit):
+    performance = _performance()
+    for min_percentile, platform in [(None, None), (50.0, "tiktok")]:
+        page = PageRequest(sort=sort, limit=limit, min_percentile=min_percentile, platform=platform)
+        seen = []
+        while True:
+            indices, cursor = select_page(performance, page)
+            assert len(indices) <= limit
+            seen.extend(performance.cohort.reel_id[i] for i in indices)
+            if cursor is None:
+                break
+            page.after = decode_cursor(cursor, sort)
+        assert seen == _expected(performance, sort, min_percentile, platform)
+
+
+def test_cursor_is_tied_to_its_sort_key():
+    cursor = encode_cursor("views", 250, "r0001")
+    assert decode_cursor(cursor, "views") == (250, "r0001")
+    with pytest.raises(ValueError):
+        decode_cursor(cursor, "performance_score")
+    with pytest.raises(ValueError):
+        decode_cursor("not-a-cursor", "views")
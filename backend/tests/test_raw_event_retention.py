@@ -0,0 +1,77 @@
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import text
+from sqlalchemy.dialects.postgresql import insert
+
+from app.models import ReelRawEvent
+from app.raw_event_retention import ENSURE_PARTITIONS_SQL, expired_partitions, roll_up_partition
+from app.rebuild_latest_state import REBUILD_RANGE_SQL
+
+OLD_MONTH = datetime(2024, 3, 1, tzinfo=timezone.utc)
+PARTITION = "reels_raw_events_p2024_03"
+LATEST_SQL = text(
+    "SELECT reel_id, latest_views, latest_likes, latest_scraped_at, prev_views, prev_scraped_at, reel_url "
+    "FROM reels_latest_state WHERE reel_id LIKE 'ret-test-%' ORDER BY reel_id"
+)
+
+
+def _event(reel, scraped_at, views):
+    return {
+        "reel_id": f"ret-test-{reel}",
+        "platform": "instagram",
+        "reel_url": f"https://www.instagram.com/reel/ret{reel}/{views}",
+        "scraped_at": scraped_at,
+        "publish_time": OLD_MONTH - timedelta(days=1),
+        "views": views,
+        "likes": views // 10,
+        "comments": 0,
+        "apify_run_id": f"ret-test-{scraped_at.isoformat()}",
+        "source_surface": "reels_feed",
+    }
+
+
+def _rebuild(session):
+    session.execute(text("DELETE FROM reels_latest_state WHERE reel_id LIKE 'ret-test-%'"))
+    session.execute(text(REBUILD_RANGE_SQL.format(touched_reels="")), {"after": "ret-test-", "upper": "ret-test-~"})
+    return session.execute(LATEST_SQL).all()
+
+
+def test_rolled_up_partition_rebuilds_the_same_latest_state(session):
+    now = datetime.now(timezone.utc)
+    for month in (OLD_MONTH, now):
+        session.execute(ENSURE_PARTITIONS_SQL, {"now": month, "months_ahead": 0})
+    events = []
+    for reel in range(6):
+        for day in range(3):
+            # Three snapshots a day, views rising; the last one is not the day's maximum.
+            for hour, views in ((1, 100 * day + reel), (9, 100 * day + reel + 50), (20, 100 * day + reel + 20)):
+                events.append(_event(reel, OLD_MONTH + timedelta(days=day, hours=hour), views))
+        if reel % 2:
+            events.append(_event(reel, now - timedelta(hours=1), 1_000 + reel))
+    session.execute(insert(ReelRawEvent).values(events))
+    before = _rebuild(session)
+    raw_total = session.execute(text("SELECT total_raw_events FROM ingest_totals")).scalar()
+
+    assert PARTITION in expired_partitions(session, OLD_MONTH + timedelta(days=31))
+    assert PARTITION not in expired_partitions(session, OLD_MONTH + timedelta(days=30))
+    assert roll_up_partition(session, PARTITION) == 6 * 3
+    assert session.execute(text("SELECT to_regclass(:name)"), {"name": PARTITION}).scalar() is None
+    assert session.execute(text("SELECT total_raw_events FROM ingest_totals")).scalar() == raw_total - 6 * 3 * 3
+    day = session.execute(
+        text(
+            "SELECT snapshots, last_views, min_views, max_views, first_scraped_at, last_scraped_at "
+            "FROM reels_daily_rollups WHERE reel_id = 'ret-test-2' AND day = '2024-03-02'"
+        )
+    ).one()
+    assert tuple(day) == (3, 122, 102, 152, OLD_MONTH + timedelta(days=1, hours=1), OLD_MONTH + timedelta(days=1, hours=20))
+
+    after = _rebuild(session)
+    for old, new in zip(before, after):
+        if int(old.reel_id.rsplit("-", 1)[1]) % 2:
+            # The newest snapshot is still raw; its previous one was the last of a rolled-up day.
+            assert new == old
+        else:
+            # Fully rolled up: same latest snapshot, previous one is now the prior day's last.
+            assert new[:4] + new[6:] == old[:4] + old[6:]
+            assert new.prev_scraped_at == OLD_MONTH + timedelta(days=1, hours=20)
+    assert len(after) == len(before) == 6
@@ -0,0 +1,118 @@
+import asyncio
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import OperationalError, SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import db
+from app.config import settings
+from app.db import ReadRouter, _async_url, _create_async_engine, _engine_options
+
+
+@pytest.fixture
+def primary_url():
+    probe = create_engine(settings.database_url)
+    try:
+        with probe.connect() as connection:
+            connection.execute(text("SELECT 1"))
+    except SQLAlchemyError:
+        pytest.skip("needs a Postgres database in DATABASE_URL")
+    finally:
+        probe.dispose()
+    return _async_url(settings.database_url)
+
+
+def _route(replica_url, max_lag_seconds, primary_url):
+    async def run():
+        primary = _create_async_engine(primary_url)
+        replica = _create_async_engine(replica_url)
+        router = ReadRouter(primary, replica, max_lag_seconds, check_seconds=60)
+        try:
+            return (await router.engine()) is replica, router.lag_seconds
+        finally:
+            await primary.dispose()
+            await replica.dispose()
+
+    return asyncio.run(run())
+
+
+def test_reads_use_a_caught_up_replica(primary_url):
+    # The primary stands in for the replica: not in recovery, so it reports no lag.
+    assert _route(primary_url, 30, primary_url) == (True, 0.0)
+
+
+def test_reads_fall_back_to_the_primary(primary_url):
+    unreachable = make_url(primary_url).set(host="127.0.0.1", port=1).render_as_string(hide_password=False)
+    assert _route(unreachable, 30, primary_url) == (False, None)
+    # Reachable but behind by more than the allowed lag.
+    assert _route(primary_url, -1, primary_url) == (False, 0.0)
+
+
+def test_transaction_pooler_mode_disables_prepared_statements(monkeypatch, primary_url):
+    monkeypatch.setattr(settings, "db_pooler_mode", "transaction")
+    assert _engine_options(settings.database_url)["connect_args"] == {"prepare_threshold": None}
+    asyncpg_args = _engine_options(primary_url)["connect_args"]
+    assert asyncpg_args["statement_cache_size"] == asyncpg_args["prepared_statement_cache_size"] == 0
+    assert asyncpg_args["prepared_statement_name_func"]() != asyncpg_args["prepared_statement_name_func"]()
+
+    async def query_twice():
+        pooled = _create_async_engine(primary_url)
+        try:
+            async with pooled.connect() as connection:
+                for _ in range(2):
+                    assert (await connection.execute(text("SELECT 1"))).scalar() == 1
+                prepared = await connection.execute(text("SELECT count(*) FROM pg_prepared_statements"))
+                return prepared.scalar()
+        finally:
+            await pooled.dispose()
+
+    # Only the statement counting them is prepared; nothing is left cached on the connection.
+    assert asyncio.run(query_twice()) == 1
+
+
+UNREACHABLE = "postgresql+asyncpg://postgres@127.0.0.1:1/shortpulse"
+
+
+def _healthy_router(monkeypatch):
+    primary, replica = _create_async_engine(UNREACHABLE), _create_async_engine(UNREACHABLE, pool_pre_ping=True)
+    router = ReadRouter(primary, replica, max_lag_seconds=30, check_seconds=60)
+    # As if the last health check had just passed.
+    router._set_health(True, 0.0, "test")
+    monkeypatch.setattr(db, "read_router", router)
+    return router
+
+
+def test_replica_down_since_the_last_check_falls_back_to_the_primary(monkeypatch):
+    router = _healthy_router(monkeypatch)
+
+    async def first_session():
+        sessions = db.get_read_session()
+        session = await sessions.__anext__()
+        bind = session.bind
+        await sessions.aclose()
+        return bind
+
+    assert asyncio.run(first_session()) is router.primary
+    assert router.healthy is False
+
+
+def test_replica_failing_mid_request_routes_later_reads_to_the_primary(monkeypatch):
+    router = _healthy_router(monkeypatch)
+
+    async def checkout(self, *args, **kwargs):
+        return None
+
+    # The checkout succeeds; the failure comes from a statement inside the endpoint.
+    monkeypatch.setattr(AsyncSession, "connection", checkout)
+
+    async def failing_request():
+        sessions = db.get_read_session()
+        session = await sessions.__anext__()
+        assert session.bind is router.replica
+        with pytest.raises(OperationalError):
+            await sessions.athrow(OperationalError("SELECT 1", {}, OSError("connection reset")))
+        return await router.engine()
+
+    assert asyncio.run(failing_request()) is router.primary
@@ -0,0 +1,111 @@
+from datetime import timedelta
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.dialects.postgresql import insert
+
+from app.creators import recompute_creator_aggregates
+from app.ingest_totals import recount_latest_states, refresh_published_count
+from app.models import ReelRawEvent
+from app.raw_event_retention import ensure_partitions
+from app.rebuild_latest_state import rebuild_latest_state
+
+LATEST_SQL = text(
+    "SELECT reel_id, reel_url, latest_views, latest_likes, latest_scraped_at, prev_views, prev_scraped_at, "
+    "last_raw_event_at, updated_at FROM reels_latest_state WHERE reel_id LIKE 'rebuild-test-%' ORDER BY reel_id"
+)
+
+
+class Interrupted(Exception):
+    pass
+
+
+@pytest.fixture
+def session(session):
+    # The rebuild commits, so the test reels are deleted and the derived tables recounted afterwards.
+    session.info["started"] = session.execute(text("SELECT now()")).scalar()
+    ensure_partitions(session, session.info["started"] - timedelta(days=2), months_ahead=1)
+    yield session
+    session.rollback()
+    session.execute(text("DELETE FROM reels_raw_events WHERE reel_id LIKE 'rebuild-test-%'"))
+    session.execute(text("DELETE FROM reels_latest_state WHERE reel_id LIKE 'rebuild-test-%'"))
+    recompute_creator_aggregates(session)
+    recount_latest_states(session)
+    refresh_published_count(session)
+    session.commit()
+
+
+def _add_reels(session, reels, touched):
+    """Two snapshots per reel, the second after the fixture started only for `touched` reels."""
+    started = session.info["started"]
+    events = []
+    for reel in reels:
+        times = [started - timedelta(days=2)] + ([started + timedelta(seconds=1)] if reel in touched else [])
+        for views, scraped_at in enumerate(times, start=1):
+            events.append(
+                {
+                    "reel_id": f"rebuild-test-{reel}",
+                    "platform": "instagram",
+                    "reel_url": f"https://www.instagram.com/reel/rebuild{reel}/{views}",
+                    "scraped_at": scraped_at,
+                    "publish_time": started - timedelta(days=3),
+                    "views": 100 * reel + views,
+                    "likes": reel,
+                    "comments": 0,
+                    "apify_run_id": "rebuild-test",
+                    "source_surface": "reels_feed",
+                }
+            )
+    session.execute(insert(ReelRawEvent).values(events))
+    session.commit()
+
+
+def _latest(session):
+    session.expire_all()
+    return session.execute(LATEST_SQL).all()
+
+
+def _interrupt_after_first_chunk(chunks, rows, last_reel_id):
+    raise Interrupted(last_reel_id)
+
+
+def test_resumed_rebuild_matches_a_full_rebuild(session):
+    _add_reels(session, range(5), touched=range(5))
+    since = session.info["started"]
+
+    with pytest.raises(Interrupted):
+        rebuild_latest_state(session, chunk_size=2, since=since, progress=_interrupt_after_first_chunk)
+    assert [row.reel_id for row in _latest(session)] == ["rebuild-test-0", "rebuild-test-1"]
+
+    # The checkpoint remembers `since`, so the resumed run only needs `resume`.
+    assert rebuild_latest_state(session, chunk_size=2, resume=True) == 5
+    resumed = _latest(session)
+
+    session.execute(text("DELETE FROM reels_latest_state WHERE reel_id LIKE 'rebuild-test-%'"))
+    session.commit()
+    rebuild_latest_state(session, chunk_size=100, since=since)
+    full = _latest(session)
+
+    assert len(resumed) == 5
+    assert [row[:-1] for row in resumed] == [row[:-1] for row in full]
+    assert resumed[0].prev_views == 1 and resumed[0].latest_views == 2
+
+
+def test_since_leaves_untouched_reels_alone(session):
+    _add_reels(session, range(4), touched={1, 3})
+    rebuild_latest_state(session, chunk_size=100, since=session.info["started"] - timedelta(days=3))
+    # Mark the untouched reels, so a rewrite would show.
+    session.execute(
+        text("UPDATE reels_latest_state SET latest_views = -1 WHERE reel_id IN ('rebuild-test-0', 'rebuild-test-2')")
+    )
+    session.commit()
+    before = {row.reel_id: row for row in _latest(session)}
+
+    assert rebuild_latest_state(session, chunk_size=1, since=session.info["started"]) == 2
+    after = {row.reel_id: row for row in _latest(session)}
+
+    for reel_id in ("rebuild-test-0", "rebuild-test-2"):
+        assert after[reel_id] == before[reel_id]
+        assert after[reel_id].latest_views == -1
+    for reel_id in ("rebuild-test-1", "rebuild-test-3"):
+        assert after[reel_id].updated_at > before[reel_id].updated_at
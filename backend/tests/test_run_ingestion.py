@@ -0,0 +1,72 @@
+import pytest
+from prometheus_client import REGISTRY
+from sqlalchemy import select, text
+
+from app import ingestion
+from app.config import settings
+from app.models import IngestionRun
+
+
+@pytest.fixture
+def session(session, monkeypatch):
+    monkeypatch.setattr(settings, "apify_api_token", "test-token")
+    monkeypatch.setattr(settings, "apify_actor_id", "test~actor")
+    monkeypatch.setattr(settings, "apify_feeds_json", None)
+    # Nothing is fetched or loaded; only the steps around the load run.
+    monkeypatch.setattr(ingestion, "_run_feeds", lambda session, feeds, stats: "run-test")
+    started = session.execute(text("SELECT now()")).scalar()
+    session.commit()
+    yield session
+    session.rollback()
+    session.execute(text("DELETE FROM ingestion_runs WHERE started_at >= :started"), {"started": started})
+    session.commit()
+
+
+def _last_run(session):
+    session.expire_all()
+    return session.scalars(select(IngestionRun).order_by(IngestionRun.started_at.desc()).limit(1)).one()
+
+
+def _fail(*args, **kwargs):
+    raise RuntimeError("boom")
+
+
+def _runs(status):
+    return REGISTRY.get_sample_value("shortpulse_ingestion_runs_total", {"status": status}) or 0
+
+
+def test_failure_after_the_load_marks_the_run_failed(session, monkeypatch):
+    monkeypatch.setattr(ingestion, "refresh_published_count", _fail)
+    failed = _runs("failed")
+    with pytest.raises(RuntimeError, match="boom"):
+        ingestion.run_ingestion(session)
+    run = _last_run(session)
+    assert (run.status, run.error_message) == ("failed", "boom")
+    assert run.finished_at is not None
+    assert _runs("failed") == failed + 1
+
+
+def test_failing_to_record_a_failure_keeps_the_original_error(session, monkeypatch):
+    finish_run = ingestion.finish_run
+
+    def finish_run_unless_failed(session, run, stats, status, **kwargs):
+        if status == "failed":
+            raise ConnectionError("database gone")
+        finish_run(session, run, stats, status, **kwargs)
+
+    monkeypatch.setattr(ingestion, "refresh_published_count", _fail)
+    monkeypatch.setattr(ingestion, "finish_run", finish_run_unless_failed)
+    failed = _runs("failed")
+    with pytest.raises(RuntimeError, match="boom"):
+        ingestion.run_ingestion(session)
+    assert _runs("failed") == failed + 1
+
+
+def test_retention_failure_is_reported_on_a_succeeded_run(session, monkeypatch):
+    monkeypatch.setattr(ingestion, "apply_retention", _fail)
+    failures = REGISTRY.get_sample_value("shortpulse_raw_event_retention_failures_total") or 0
+    assert ingestion.run_ingestion(session)["apify_run_id"] == "run-test"
+    run = _last_run(session)
+    assert (run.status, run.error_message) == ("succeeded", "retention: boom")
+    assert run.retention_seconds is not None
+    assert REGISTRY.get_sample_value("shortpulse_raw_event_retention_failures_total") == failures + 1
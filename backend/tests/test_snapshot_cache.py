@@ -0,0 +1,85 @@
+import asyncio
+
+from app.snapshot_cache import SnapshotCache, accepts_encoding, encoding_etag, etag_matches
+
+
+def _counting_build(calls):
+    async def build():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return b'{"items": []}'
+
+    return build
+
+
+def test_snapshot_is_reused_until_invalidated_or_version_changes():
+    cache = SnapshotCache(max_staleness_seconds=60)
+    calls = []
+    build = _counting_build(calls)
+
+    async def scenario():
+        first = await cache.get_or_build("perf", "v1", build)
+        # Concurrent misses share a single build.
+        await asyncio.gather(*(cache.get_or_build("perf", "v1", build) for _ in range(5)))
+        assert len(calls) == 1
+
+        cache.invalidate()
+        second = await cache.get_or_build("perf", "v1", build)
+        assert len(calls) == 2
+        # Same content, same ETag.
+        assert second.etag == first.etag
+
+        await cache.get_or_build("perf", "v2", build)
+        assert len(calls) == 3
+
+    asyncio.run(scenario())
+
+
+def test_max_staleness_forces_rebuild():
+    calls = []
+    build = _counting_build(calls)
+
+    async def scenario(cache):
+        await cache.get_or_build("perf", "v1", build)
+        await cache.get_or_build("perf", "v1", build)
+
+    asyncio.run(scenario(SnapshotCache(max_staleness_seconds=0)))
+    assert len(calls) == 2
+
+
+def test_entries_and_their_locks_stay_bounded():
+    build = _counting_build([])
+
+    async def scenario(cache):
+        for index in range(10):
+            await cache.get_or_build(f"perf-{index}", "v1", build)
+
+    disabled, bounded = SnapshotCache(max_staleness_seconds=0), SnapshotCache(max_staleness_seconds=60, max_entries=3)
+    asyncio.run(scenario(disabled))
+    asyncio.run(scenario(bounded))
+    assert len(disabled._entries) == 0
+    assert list(bounded._entries) == ["perf-7", "perf-8", "perf-9"]
+
+
+def test_etag_matching():
+    assert etag_matches('"abc"', '"abc"')
+    assert etag_matches('W/"abc", "def"', '"abc"')
+    assert etag_matches("*", '"abc"')
+    assert not etag_matches('"def"', '"abc"')
+    assert not etag_matches(None, '"abc"')
+
+
+def test_encoding_etag_differs_per_coding():
+    assert encoding_etag('"abc"', "gzip") == '"abc-gzip"'
+    assert not etag_matches('"abc"', encoding_etag('"abc"', "gzip"))
+
+
+def test_accept_encoding_quality_values():
+    assert accepts_encoding("gzip, deflate, br", "gzip")
+    assert accepts_encoding("br;q=1.0, GZIP;q=0.5", "gzip")
+    assert accepts_encoding("*", "gzip")
+    assert not accepts_encoding("gzip;q=0", "gzip")
+    assert not accepts_encoding("gzip; q=0.000, *", "gzip")
+    assert not accepts_encoding("*;q=0", "gzip")
+    assert not accepts_encoding("x-gzip", "gzip")
+    assert not accepts_encoding(None, "gzip")
@@ -0,0 +1,101 @@
+import json
+import time
+
+import pytest
+
+from app import apify, ingestion
+from app.config import settings
+from app.sources import configured_feeds
+from tools.fake_apify import FakeApifyServer
+
+
+@pytest.fixture
+def apify_settings(monkeypatch):
+    monkeypatch.setattr(settings, "apify_api_token", "test-token")
+    monkeypatch.setattr(settings, "apify_actor_id", "test~actor")
+    monkeypatch.setattr(settings, "apify_feeds_json", None)
+    monkeypatch.setattr(settings, "apify_max_results", 1000)
+    monkeypatch.setattr(settings, "apify_page_size", 10)
+    monkeypatch.setattr(settings, "apify_poll_interval_seconds", 1)
+    return settings
+
+
+@pytest.fixture
+def persisted(monkeypatch):
+    calls = []
+
+    def fake_persist(session, events, apify_run_id, stats=None):
+        calls.append((events, apify_run_id))
+        stats.events_inserted += len(events)
+        return len(events)
+
+    monkeypatch.setattr(ingestion, "persist_mapped_events", fake_persist)
+    return calls
+
+
+def _run_feeds():
+    stats = ingestion.IngestionStats()
+    apify_run_id = ingestion._run_feeds(None, configured_feeds(), stats)
+    return {"ingested_count": stats.events_inserted, "apify_run_id": apify_run_id}
+
+
+def test_streaming_ingestion_persists_each_page(apify_settings, persisted, monkeypatch):
+    monkeypatch.setattr(settings, "apify_ingest_mode", "stream")
+    with FakeApifyServer(item_count=35, run_seconds=0.5) as server:
+        monkeypatch.setattr(settings, "apify_base_url", server.url)
+        result = _run_feeds()
+
+    assert result["ingested_count"] == 35
+    assert sum(len(events) for events, _ in persisted) == 35
+    assert all(len(events) <= 10 for events, _ in persisted)
+    # Every page belongs to the same run snapshot.
+    assert {run_id for _, run_id in persisted} == {result["apify_run_id"]}
+    assert len({ev["scraped_at"] for events, _ in persisted for ev in events}) == 1
+
+
+def test_first_page_arrives_before_run_finishes(apify_settings, monkeypatch):
+    with FakeApifyServer(item_count=100, run_seconds=2.0) as server:
+        monkeypatch.setattr(settings, "apify_base_url", server.url)
+        with apify.apify_http_session(1) as http:
+            run = apify.start_run(http, settings.apify_actor_id, {})
+            pages = apify.iter_dataset_pages(http, run)
+            first_page, response_bytes = next(pages)
+            assert server.runs[run["id"]].status() == "RUNNING"
+            assert 0 < len(first_page) <= 10
+            assert response_bytes > 0
+            remaining = sum(len(page) for page, _ in pages)
+    assert len(first_page) + remaining == 100
+
+
+def test_failed_run_raises_after_draining(apify_settings, monkeypatch):
+    with FakeApifyServer(item_count=5, final_status="FAILED") as server:
+        monkeypatch.setattr(settings, "apify_base_url", server.url)
+        with apify.apify_http_session(1) as http:
+            run = apify.start_run(http, settings.apify_actor_id, {})
+            with pytest.raises(RuntimeError, match="FAILED"):
+                list(apify.iter_dataset_pages(http, run))
+
+
+def test_feeds_are_fetched_concurrently_and_merged(apify_settings, persisted, monkeypatch):
+    feeds = [
+        {"platform": "instagram", "actor_id": "apify~instagram-reel-scraper"},
+        {"platform": "tiktok", "actor_id": "clockworks~tiktok-scraper", "source_surface": "hashtag_fyp"},
+        {"platform": "youtube", "actor_id": "streamers~youtube-shorts-scraper"},
+    ]
+    monkeypatch.setattr(settings, "apify_feeds_json", json.dumps(feeds))
+    monkeypatch.setattr(settings, "apify_ingest_mode", "sync")
+    with FakeApifyServer(item_count=20, latency_seconds=0.5) as server:
+        monkeypatch.setattr(settings, "apify_base_url", server.url)
+        started = time.monotonic()
+        result = _run_feeds()
+        elapsed = time.monotonic() - started
+
+    # One merged persistence pass covering all three platforms.
+    assert len(persisted) == 1
+    events, run_label = persisted[0]
+    assert result["ingested_count"] == 60
+    assert len(run_label.split(", ")) == 3
+    assert {ev["platform"] for ev in events} == {"instagram", "tiktok", "youtube"}
+    assert {ev["source_surface"] for ev in events if ev["platform"] == "tiktok"} == {"hashtag_fyp"}
+    # Closer to the slowest feed (0.5s) than to the serial sum (1.5s).
+    assert elapsed < 1.2
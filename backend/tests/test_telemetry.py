@@ -0,0 +1,62 @@
+import asyncio
+import time
+
+from prometheus_client import REGISTRY
+
+from app.config import settings
+from app.profiling import ProfilingMiddleware
+from app.run_ledger import IngestionStats
+from app.telemetry import PrometheusMiddleware, observe_ingestion
+
+
+def _busy(seconds):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+async def _endpoint(scope, receive, send):
+    _busy(0.1)
+    await send({"type": "http.response.start", "status": 201, "headers": []})
+    await send({"type": "http.response.body", "body": b"computed"})
+
+
+def _call(app, path, headers=()):
+    messages = []
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {"type": "http", "method": "GET", "path": path, "headers": list(headers)}
+    asyncio.run(app(scope, None, send))
+    start, body = messages
+    return start["status"], dict(start["headers"]), body["body"]
+
+
+def test_profiled_request_returns_folded_stacks(monkeypatch):
+    monkeypatch.setattr(settings, "profiling_token", "secret")
+    monkeypatch.setattr(settings, "profiling_interval_ms", 2)
+    monkeypatch.setattr(settings, "profiling_dir", None)
+    app = ProfilingMiddleware(_endpoint)
+
+    status, headers, body = _call(app, "/reels/performance", [(b"x-profile", b"secret")])
+    assert (status, headers[b"x-profile-status"]) == (200, b"201")
+    assert int(headers[b"x-profile-samples"]) > 0
+    assert any("_busy (tests/test_telemetry.py" in line.rsplit(";", 1)[-1] for line in body.decode().splitlines())
+
+    # Wrong token, or a path that is not profiled: the response passes through untouched.
+    assert _call(app, "/reels/performance", [(b"x-profile", b"guess")])[::2] == (201, b"computed")
+    assert _call(app, "/ingest/status", [(b"x-profile", b"secret")])[::2] == (201, b"computed")
+
+
+def test_request_and_ingestion_metrics_are_recorded():
+    labels = {"method": "GET", "route": "<unmatched>", "status": "201"}
+    before = REGISTRY.get_sample_value("shortpulse_http_request_duration_seconds_count", labels) or 0
+    _call(PrometheusMiddleware(_endpoint), "/anything")
+    assert REGISTRY.get_sample_value("shortpulse_http_request_duration_seconds_count", labels) == before + 1
+
+    inserted = REGISTRY.get_sample_value("shortpulse_ingestion_rows_total", {"kind": "events_inserted"}) or 0
+    observe_ingestion("succeeded", IngestionStats(items_received=10, items_mapped=8, events_inserted=7, fetch_seconds=2.0))
+    assert REGISTRY.get_sample_value("shortpulse_ingestion_rows_total", {"kind": "events_inserted"}) == inserted + 7
+    assert REGISTRY.get_sample_value("shortpulse_ingestion_rows_total", {"kind": "items_dropped"}) >= 2
+    assert REGISTRY.get_sample_value("shortpulse_ingestion_stage_duration_seconds_sum", {"stage": "fetch"}) >= 2.0
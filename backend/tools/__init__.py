@@ -0,0 +1 @@
+"""Developer tooling for running ShortPulse offline."""
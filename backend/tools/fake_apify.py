@@ -0,0 +1,275 @@
+"""Local stand-in for the subset of the Apify v2 API that ingestion uses.
+
+Point `APIFY_BASE_URL` at a running instance to exercise both ingestion modes offline:
+
+    python -m tools.fake_apify --port 8081 --items 5000 --run-seconds 20
+
+Supported endpoints:
+- `POST /v2/acts/{actor}/run-sync-get-dataset-items`
+- `POST /v2/acts/{actor}/runs`
+- `GET /v2/actor-runs/{run_id}` (honours `waitForFinish`)
+- `GET /v2/datasets/{dataset_id}/items` (honours `offset`/`limit`)
+
+Async runs release their items linearly over `run_seconds`, so streamed pages arrive while
+the run is still `RUNNING`, like a real actor pushing to its dataset. Actor ids containing
+"tiktok" or "youtube" get items shaped like those platforms' scrapers. `--latency` delays every
+response and `--item-padding` adds that many bytes of unmapped filler to each item, to mimic
+slow networks and the nested comment/tag payloads real scrapers return.
+"""
+
+import argparse
+import json
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+
+# Items are spread round-robin over this many fake creators.
+CREATORS = 50
+
+
+def make_item(index: int, now: Optional[datetime] = None, platform: str = "instagram") -> Dict[str, object]:
+    """Return a deterministic dataset item shaped like the given platform's actor output."""
+    now = now or datetime.now(timezone.utc)
+    publish_time = now - timedelta(minutes=7 * (index % 10_000) + 30)
+    views = 1_000 + (index * 7919) % 500_000
+    likes = 50 + (index * 104_729) % 20_000
+    comments = (index * 31) % 900
+    if platform == "tiktok":
+        return {
+            "id": f"7{index:018d}",
+            "webVideoUrl": f"https://www.tiktok.com/@fake/video/7{index:018d}",
+            "createTime": int(publish_time.timestamp()),
+            "playCount": views,
+            "diggCount": likes,
+            "commentCount": comments,
+            "shareCount": index % 300,
+            "text": f"Fake tiktok {index}",
+            "authorMeta": {"id": f"author-{index % CREATORS}", "name": f"fake_author_{index % CREATORS}"},
+            "musicMeta": {"musicId": f"audio-{index % 97}", "musicName": f"Track {index % 97}"},
+            "videoMeta": {"duration": 5 + index % 55},
+        }
+    if platform == "youtube":
+        return {
+            "id": f"yt{index:09d}",
+            "url": f"https://www.youtube.com/shorts/yt{index:09d}",
+            "date": publish_time.strftime("%Y-%m-%dT%H:%M:%S.000Z"),
+            "viewCount": views,
+            "likes": likes,
+            "commentsCount": comments,
+            "title": f"Fake short {index}",
+            "channelId": f"channel-{index % CREATORS}",
+            "duration": f"00:{5 + index % 55:02d}",
+        }
+    return {
+        "id": f"fake-{index}",
+        "shortCode": f"FAKE{index}",
+        "url": f"https://www.instagram.com/reel/FAKE{index}/",
+        "timestamp": publish_time.strftime("%Y-%m-%dT%H:%M:%S.000Z"),
+        "playsCount": views,
+        "likesCount": likes,
+        "commentsCount": comments,
+        "caption": f"Fake reel {index}",
+        "ownerId": f"owner-{index % CREATORS}",
+        "ownerUsername": f"fake_owner_{index % CREATORS}",
+        "musicId": f"audio-{index % 97}",
+        "musicTitle": f"Track {index % 97}",
+        "videoDuration": 5.0 + index % 55,
+    }
+
+
+def _platform_for_actor(actor_id: str) -> str:
+    for platform in ("tiktok", "youtube"):
+        if platform in actor_id:
+            return platform
+    return "instagram"
+
+
+class FakeRun:
+    def __init__(
+        self, item_count: int, run_seconds: float, final_status: str, platform: str = "instagram", padding: int = 0
+    ):
+        self.id = uuid.uuid4().hex[:17]
+        self.dataset_id = uuid.uuid4().hex[:17]
+        self.item_count = item_count
+        self.run_seconds = run_seconds
+        self.final_status = final_status
+        self.started = time.monotonic()
+        now = datetime.now(timezone.utc)
+        self.items = [make_item(i, now, platform) for i in range(item_count)]
+        if padding:
+            filler = "x" * padding
+            for item in self.items:
+                item["padding"] = filler
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    def status(self) -> str:
+        return self.final_status if self.elapsed() >= self.run_seconds else "RUNNING"
+
+    def available(self) -> int:
+        if self.run_seconds <= 0 or self.elapsed() >= self.run_seconds:
+            return self.item_count
+        return int(self.item_count * self.elapsed() / self.run_seconds)
+
+    def as_dict(self) -> Dict[str, object]:
+        return {"id": self.id, "defaultDatasetId": self.dataset_id, "status": self.status()}
+
+
+class FakeApifyServer:
+    """Threaded fake Apify API; use as a context manager or call start()/stop()."""
+
+    def __init__(
+        self,
+        item_count: int = 200,
+        run_seconds: float = 0.0,
+        latency_seconds: float = 0.0,
+        final_status: str = "SUCCEEDED",
+        item_padding: int = 0,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ):
+        self.item_count = item_count
+        self.run_seconds = run_seconds
+        self.latency_seconds = latency_seconds
+        self.final_status = final_status
+        self.item_padding = item_padding
+        self.runs: Dict[str, FakeRun] = {}
+        self.datasets: Dict[str, FakeRun] = {}
+        self.requests: List[str] = []
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/v2"
+
+    def start(self) -> "FakeApifyServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self) -> "FakeApifyServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def _new_run(self, actor_id: str, run_seconds: float) -> FakeRun:
+        run = FakeRun(
+            self.item_count, run_seconds, self.final_status, _platform_for_actor(actor_id), self.item_padding
+        )
+        with self._lock:
+            self.runs[run.id] = run
+            self.datasets[run.dataset_id] = run
+        return run
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):  # noqa: A002 - signature fixed by BaseHTTPRequestHandler
+                pass
+
+            def _send_json(self, status: int, body: object, headers: Optional[Dict[str, str]] = None) -> None:
+                payload = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def _route(self, method: str) -> None:
+                parsed = urlparse(self.path)
+                query = {key: values[-1] for key, values in parse_qs(parsed.query).items()}
+                parts = [part for part in parsed.path.split("/") if part]
+                server.requests.append(f"{method} {parsed.path}")
+                if server.latency_seconds:
+                    time.sleep(server.latency_seconds)
+
+                if method == "POST" and len(parts) == 4 and parts[:2] == ["v2", "acts"]:
+                    length = int(self.headers.get("Content-Length") or 0)
+                    self.rfile.read(length)
+                    if parts[3] == "run-sync-get-dataset-items":
+                        run = server._new_run(parts[2], 0)
+                        limit = int(query.get("limit", run.item_count))
+                        return self._send_json(200, run.items[:limit], {"x-apify-run-id": run.id})
+                    if parts[3] == "runs":
+                        run = server._new_run(parts[2], server.run_seconds)
+                        return self._send_json(201, {"data": run.as_dict()})
+
+                if method == "GET" and len(parts) == 3 and parts[:2] == ["v2", "actor-runs"]:
+                    run = server.runs.get(parts[2])
+                    if not run:
+                        return self._send_json(404, {"error": {"type": "record-not-found"}})
+                    wait = float(query.get("waitForFinish", 0))
+                    remaining = run.run_seconds - run.elapsed()
+                    if wait and remaining > 0:
+                        time.sleep(min(wait, remaining))
+                    return self._send_json(200, {"data": run.as_dict()})
+
+                if method == "GET" and len(parts) == 4 and parts[:2] == ["v2", "datasets"] and parts[3] == "items":
+                    run = server.datasets.get(parts[2])
+                    if not run:
+                        return self._send_json(404, {"error": {"type": "record-not-found"}})
+                    offset = int(query.get("offset", 0))
+                    limit = int(query.get("limit", run.item_count))
+                    end = min(offset + limit, run.available())
+                    return self._send_json(200, run.items[offset:end])
+
+                self._send_json(404, {"error": {"type": "page-not-found"}})
+
+            def do_GET(self):
+                self._route("GET")
+
+            def do_POST(self):
+                self._route("POST")
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a fake Apify API for offline ingestion runs.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--items", type=int, default=200, help="Items produced per run.")
+    parser.add_argument("--run-seconds", type=float, default=10.0, help="Duration of async runs.")
+    parser.add_argument("--latency", type=float, default=0.0, help="Added latency per request in seconds.")
+    parser.add_argument("--final-status", default="SUCCEEDED")
+    parser.add_argument("--item-padding", type=int, default=0, help="Bytes of filler added to every item.")
+    args = parser.parse_args()
+
+    server = FakeApifyServer(
+        item_count=args.items,
+        run_seconds=args.run_seconds,
+        latency_seconds=args.latency,
+        final_status=args.final_status,
+        item_padding=args.item_padding,
+        host=args.host,
+        port=args.port,
+    )
+    print(f"Fake Apify listening on {server.url} (set APIFY_BASE_URL to this)")
+    try:
+        server._httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server._httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
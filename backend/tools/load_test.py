@@ -0,0 +1,356 @@
+"""End-to-end load test: the real app serving reads while an ingestion runs.
+
+Starts a disposable Postgres (`initdb`/`pg_ctl` from PATH or `--pg-bin`, migrated with alembic),
+a fake Apify (`tools.fake_apify`) with optional latency and item padding, and `app.main:app`
+under uvicorn with `--workers` processes pointed at both. A first ingestion seeds the database;
+then `--clients` keep-alive clients cycle through `--paths` for `--before` seconds, `/ingest/run`
+is triggered, traffic continues until the run has finished (per the ledger in /ingest/runs)
+and for `--after` seconds more.
+
+    python -m tools.load_test --workers 2 --clients 20 --items 20000
+    python -m tools.load_test --apify-latency 0.5 --item-padding 4000 --ingest-mode stream --apify-run-seconds 30
+    python -m tools.load_test --database-url postgresql+psycopg://postgres@localhost/loadtest  # migrated, disposable
+
+The report gives requests, req/s, p50/p95/p99 latency and error rate per path for each phase
+(`before`, `ingesting`, `after`); requests count towards the phase they started in. `--output`
+also writes it as JSON. The clients share the host with the server, so compare runs made on the
+same machine rather than reading the figures as capacity.
+"""
+
+import argparse
+import json
+import math
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import requests
+
+from tools.fake_apify import FakeApifyServer
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+DEFAULT_PATHS = ("/reels/performance", "/ingest/status")
+PHASES = ("before", "ingesting", "after")
+# Sync and async engines each hold up to DB_POOL_SIZE + DB_MAX_OVERFLOW connections per worker.
+CONNECTIONS_PER_WORKER = 2 * (5 + 10) + 5
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class TemporaryPostgres:
+    """A throwaway cluster in a temporary directory, trust auth, listening on 127.0.0.1 only."""
+
+    def __init__(self, pg_bin: Optional[str] = None, max_connections: int = 100):
+        self.pg_bin = pg_bin
+        self.max_connections = max_connections
+        self.port = _free_port()
+        self.directory = tempfile.mkdtemp(prefix="shortpulse-loadtest-")
+        self.data_dir = os.path.join(self.directory, "data")
+
+    def _bin(self, name: str) -> str:
+        return os.path.join(self.pg_bin, name) if self.pg_bin else name
+
+    @property
+    def url(self) -> str:
+        return f"postgresql+psycopg://postgres@127.0.0.1:{self.port}/shortpulse"
+
+    def start(self) -> "TemporaryPostgres":
+        quiet = {"stdout": subprocess.DEVNULL, "check": True}
+        subprocess.run(
+            [self._bin("initdb"), "-D", self.data_dir, "-U", "postgres", "--auth=trust", "--encoding=UTF8"], **quiet
+        )
+        options = (
+            f"-p {self.port} -k {self.directory} -c listen_addresses=127.0.0.1 "
+            f"-c max_connections={self.max_connections}"
+        )
+        subprocess.run(
+            [self._bin("pg_ctl"), "-D", self.data_dir, "-l", os.path.join(self.directory, "postgres.log"),
+             "-o", options, "-w", "start"],
+            **quiet,
+        )
+        subprocess.run(
+            [self._bin("createdb"), "-h", "127.0.0.1", "-p", str(self.port), "-U", "postgres", "shortpulse"], **quiet
+        )
+        return self
+
+    def stop(self) -> None:
+        if os.path.exists(os.path.join(self.data_dir, "postmaster.pid")):
+            subprocess.run(
+                [self._bin("pg_ctl"), "-D", self.data_dir, "-m", "fast", "-w", "stop"], stdout=subprocess.DEVNULL
+            )
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def __enter__(self) -> "TemporaryPostgres":
+        try:
+            return self.start()
+        except BaseException:
+            self.stop()
+            raise
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+def migrate(database_url: str) -> None:
+    subprocess.run(
+        [sys.executable, "-m", "alembic", "upgrade", "head"],
+        cwd=BACKEND_DIR,
+        env={**os.environ, "DATABASE_URL": database_url},
+        stdout=subprocess.DEVNULL,
+        check=True,
+    )
+
+
+def serve(env: Dict[str, str], workers: int, port: int) -> subprocess.Popen:
+    """Start `app.main:app` under uvicorn and wait for /health."""
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--workers", str(workers),
+         "--log-level", "warning", "--no-access-log"],
+        cwd=BACKEND_DIR,
+        env=env,
+    )
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("uvicorn exited during startup")
+        try:
+            requests.get(f"http://127.0.0.1:{port}/health", timeout=5).raise_for_status()
+            return process
+        except requests.RequestException:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("uvicorn did not become healthy within 60s")
+
+
+def _parse_time(value: str) -> datetime:
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+def run_ingestion(base_url: str, timeout: float) -> Dict[str, Any]:
+    """Trigger /ingest/run and wait until every ledger run it started has finished.
+
+    Jobs live in the worker that accepted them, so completion is read from the shared run ledger
+    in /ingest/runs rather than from /ingest/jobs/{id}.
+    """
+    triggered_at = datetime.now(timezone.utc)
+    response = requests.post(f"{base_url}/ingest/run", timeout=30)
+    response.raise_for_status()
+    deadline = time.monotonic() + timeout
+    with requests.Session() as http:
+        while time.monotonic() < deadline:
+            time.sleep(0.5)
+            ledger = http.get(f"{base_url}/ingest/runs", timeout=30).json()
+            runs = [run for run in ledger["recent_runs"] if _parse_time(run["started_at"]) >= triggered_at]
+            if runs and all(run["status"] != "running" for run in runs):
+                return {
+                    "job_id": response.json()["id"],
+                    "seconds": (datetime.now(timezone.utc) - triggered_at).total_seconds(),
+                    "runs": [
+                        {key: run[key] for key in ("platform", "status", "items_received", "events_ingested", "response_bytes")}
+                        for run in runs
+                    ],
+                }
+    raise TimeoutError(f"ingestion did not finish within {timeout:.0f}s")
+
+
+class Recorder:
+    """Collects (phase, path, seconds, ok) samples from the client threads."""
+
+    def __init__(self):
+        self.phase = PHASES[0]
+        self.samples: List[Tuple[str, str, float, bool]] = []
+        self.phase_seconds: Dict[str, float] = {}
+        self._phase_started = time.monotonic()
+        self._lock = threading.Lock()
+
+    def set_phase(self, phase: str) -> None:
+        now = time.monotonic()
+        with self._lock:
+            self.phase_seconds[self.phase] = now - self._phase_started
+            self.phase, self._phase_started = phase, now
+
+    def finish(self) -> None:
+        with self._lock:
+            self.phase_seconds[self.phase] = time.monotonic() - self._phase_started
+
+    def add(self, samples: List[Tuple[str, str, float, bool]]) -> None:
+        with self._lock:
+            self.samples.extend(samples)
+
+
+def _client(base_url: str, paths: Sequence[str], offset: int, recorder: Recorder, stop: threading.Event) -> None:
+    samples = []
+    with requests.Session() as http:
+        index = offset
+        while not stop.is_set():
+            path = paths[index % len(paths)]
+            index += 1
+            phase = recorder.phase
+            started = time.perf_counter()
+            try:
+                ok = http.get(f"{base_url}{path}", timeout=60).ok
+            except requests.RequestException:
+                ok = False
+            samples.append((phase, path, time.perf_counter() - started, ok))
+    recorder.add(samples)
+
+
+def percentile(sorted_values: Sequence[float], fraction: float) -> float:
+    """Nearest-rank percentile of already sorted values."""
+    if not sorted_values:
+        return 0.0
+    rank = min(max(math.ceil(fraction * len(sorted_values)), 1), len(sorted_values))
+    return sorted_values[rank - 1]
+
+
+def summarize(samples: Sequence[Tuple[str, str, float, bool]], phase_seconds: Dict[str, float]) -> List[Dict[str, Any]]:
+    """One row per (phase, path): requests, req/s, latency percentiles (ms) and error rate."""
+    groups: Dict[Tuple[str, str], List[Tuple[float, bool]]] = {}
+    for phase, path, seconds, ok in samples:
+        groups.setdefault((phase, path), []).append((seconds, ok))
+    rows = []
+    for (phase, path), values in sorted(groups.items(), key=lambda group: (PHASES.index(group[0][0]), group[0][1])):
+        # Latency percentiles cover successful requests; failures only count as errors.
+        latencies = sorted(seconds for seconds, ok in values if ok)
+        errors = sum(not ok for _, ok in values)
+        elapsed = phase_seconds.get(phase) or 0.0
+        rows.append(
+            {
+                "phase": phase,
+                "path": path,
+                "requests": len(values),
+                "rps": len(values) / elapsed if elapsed else 0.0,
+                "p50_ms": percentile(latencies, 0.50) * 1000,
+                "p95_ms": percentile(latencies, 0.95) * 1000,
+                "p99_ms": percentile(latencies, 0.99) * 1000,
+                "error_rate": errors / len(values),
+            }
+        )
+    return rows
+
+
+def print_report(rows: Sequence[Dict[str, Any]]) -> None:
+    print(f"{'phase':<10} {'path':<28} {'requests':>8} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    for row in rows:
+        print(
+            f"{row['phase']:<10} {row['path']:<28} {row['requests']:>8} {row['rps']:>8.1f} {row['p50_ms']:>8.1f} "
+            f"{row['p95_ms']:>8.1f} {row['p99_ms']:>8.1f} {row['error_rate']:>7.1%}"
+        )
+
+
+def run_load(args: argparse.Namespace, database_url: str) -> Dict[str, Any]:
+    fake = FakeApifyServer(
+        item_count=args.items,
+        run_seconds=args.apify_run_seconds,
+        latency_seconds=args.apify_latency,
+        item_padding=args.item_padding,
+    )
+    env = {key: value for key, value in os.environ.items() if key not in ("ASYNC_DATABASE_URL", "APIFY_FEEDS_JSON")}
+    env.update(
+        {
+            "DATABASE_URL": database_url,
+            "APIFY_BASE_URL": fake.url,
+            "APIFY_API_TOKEN": "load-test",
+            "APIFY_ACTOR_ID": "fake~instagram-reel-scraper",
+            "APIFY_MAX_RESULTS": str(args.items),
+            "APIFY_INGEST_MODE": args.ingest_mode,
+        }
+    )
+    base_url = f"http://127.0.0.1:{args.port}"
+    with fake:
+        server = serve(env, args.workers, args.port)
+        try:
+            seed = run_ingestion(base_url, args.ingest_timeout)
+            print(f"seeded: {seed['runs']} in {seed['seconds']:.1f}s")
+
+            recorder, stop = Recorder(), threading.Event()
+            clients = [
+                threading.Thread(target=_client, args=(base_url, args.paths, index, recorder, stop))
+                for index in range(args.clients)
+            ]
+            for client in clients:
+                client.start()
+            try:
+                time.sleep(args.before)
+                recorder.set_phase("ingesting")
+                ingestion = run_ingestion(base_url, args.ingest_timeout)
+                recorder.set_phase("after")
+                time.sleep(args.after)
+            finally:
+                stop.set()
+                for client in clients:
+                    client.join()
+                recorder.finish()
+        finally:
+            server.terminate()
+            server.wait()
+
+    return {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "workers": args.workers,
+            "clients": args.clients,
+            "paths": list(args.paths),
+            "items": args.items,
+            "item_padding": args.item_padding,
+            "apify_latency": args.apify_latency,
+            "ingest_mode": args.ingest_mode,
+            "cpu_count": os.cpu_count(),
+        },
+        "ingestion": ingestion,
+        "phase_seconds": recorder.phase_seconds,
+        "results": summarize(recorder.samples, recorder.phase_seconds),
+    }
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=2, help="uvicorn worker processes.")
+    parser.add_argument("--clients", type=int, default=20, help="Concurrent keep-alive clients.")
+    parser.add_argument("--paths", nargs="+", default=list(DEFAULT_PATHS), help="Paths each client cycles through.")
+    parser.add_argument("--before", type=float, default=10.0, help="Seconds of traffic before /ingest/run.")
+    parser.add_argument("--after", type=float, default=10.0, help="Seconds of traffic after the ingestion finished.")
+    parser.add_argument("--items", type=int, default=5000, help="Items per fake Apify run.")
+    parser.add_argument("--item-padding", type=int, default=0, help="Bytes of filler added to every item.")
+    parser.add_argument("--apify-latency", type=float, default=0.0, help="Seconds added to every fake Apify response.")
+    parser.add_argument("--apify-run-seconds", type=float, default=10.0, help="Duration of async (stream) runs.")
+    parser.add_argument("--ingest-mode", choices=("sync", "stream"), default="sync")
+    parser.add_argument("--ingest-timeout", type=float, default=600.0)
+    parser.add_argument("--port", type=int, default=8770)
+    parser.add_argument("--database-url", help="Use this migrated database instead of a temporary cluster.")
+    parser.add_argument("--pg-bin", help="Directory holding initdb/pg_ctl/createdb; defaults to PATH.")
+    parser.add_argument("--output", help="Also write the report as JSON.")
+    args = parser.parse_args(argv)
+
+    if args.database_url:
+        report = run_load(args, args.database_url)
+    else:
+        with TemporaryPostgres(args.pg_bin, max(100, CONNECTIONS_PER_WORKER * (args.workers + 1))) as postgres:
+            migrate(postgres.url)
+            report = run_load(args, postgres.url)
+
+    print(
+        f"ingestion: {report['ingestion']['seconds']:.1f}s, "
+        + ", ".join(f"{run['platform']} {run['status']} {run['events_ingested']} events" for run in report["ingestion"]["runs"])
+    )
+    print_report(report["results"])
+    if args.output:
+        with open(args.output, "w") as handle:
+            json.dump(report, handle, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
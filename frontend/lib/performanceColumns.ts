@@ -0,0 +1,51 @@
+// Client for GET /reels/performance/columns: one array per field instead of row objects.
+// The browser inflates the gzip transfer itself; numeric columns become typed arrays.
+
+const apiBase = process.env.NEXT_PUBLIC_API_BASE ?? "http://localhost:8000";
+
+export type DictionaryColumn = { dictionary: (string | null)[]; codes: number[] };
+
+type ColumnsPayload = {
+  count: number;
+  columns: Record<string, number[] | (string | null)[] | (number | null)[] | DictionaryColumn>;
+  next_cursor: string | null;
+};
+
+export type PerformanceColumns = {
+  count: number;
+  numbers: Record<string, Float64Array>;
+  strings: Record<string, (string | null)[]>;
+  nextCursor: string | null;
+};
+
+const isDictionary = (column: unknown): column is DictionaryColumn =>
+  typeof column === "object" && column !== null && "codes" in column;
+
+export const decodePerformanceColumns = (payload: ColumnsPayload): PerformanceColumns => {
+  const numbers: Record<string, Float64Array> = {};
+  const strings: Record<string, (string | null)[]> = {};
+  Object.keys(payload.columns).forEach((field) => {
+    const column = payload.columns[field];
+    if (isDictionary(column)) {
+      strings[field] = column.codes.map((code) => column.dictionary[code]);
+    } else if (column.length && typeof column.find((value) => value !== null) === "string") {
+      strings[field] = column as (string | null)[];
+    } else {
+      // Nullable numbers (outlier_score) become NaN.
+      numbers[field] = Float64Array.from(column as (number | null)[], (value) => (value === null ? NaN : value));
+    }
+  });
+  return { count: payload.count, numbers, strings, nextCursor: payload.next_cursor };
+};
+
+export const fetchPerformanceColumns = async (
+  fields: string[],
+  params: Record<string, string> = {},
+): Promise<PerformanceColumns> => {
+  const query = new URLSearchParams({ ...params, fields: fields.join(",") });
+  const response = await fetch(`${apiBase}/reels/performance/columns?${query.toString()}`);
+  if (!response.ok) {
+    throw new Error(`GET /reels/performance/columns failed: ${response.status}`);
+  }
+  return decodePerformanceColumns(await response.json());
+};
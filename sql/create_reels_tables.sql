@@ -1,6 +1,7 @@
 -- ShortPulse schema bootstrap for Supabase/Postgres
+-- Range-partitioned by UTC month of scraped_at; the app creates upcoming months before each run.
 create table if not exists reels_raw_events (
-    id uuid primary key default gen_random_uuid(),
+    id uuid not null default gen_random_uuid(),
     reel_id text not null,
     platform text not null default 'instagram',
     reel_url text not null,
@@ -10,6 +11,7 @@ create table if not exists reels_raw_events (
     likes integer not null,
     comments integer not null,
     shares_or_saves integer,
+    creator_id text,
     caption_text text,
     audio_id text,
     audio_name text,
@@ -17,12 +19,85 @@ create table if not exists reels_raw_events (
     apify_run_id text not null,
     source_surface text not null default 'reels_feed',
     created_at timestamptz not null default now(),
-    unique (reel_id, scraped_at, apify_run_id)
-);
+    primary key (id, scraped_at),
+    constraint uq_reel_scrape_run unique (reel_id, scraped_at, apify_run_id)
+) partition by range (scraped_at);
 
 create index if not exists ix_reels_raw_events_reel_id_publish on reels_raw_events (reel_id, publish_time);
 create index if not exists ix_reels_raw_events_scraped_at on reels_raw_events (scraped_at);
 create index if not exists ix_reels_raw_events_publish_time on reels_raw_events (publish_time);
+create index if not exists ix_reels_raw_events_reel_id_scraped_at on reels_raw_events (reel_id, scraped_at desc);
+
+create or replace function reels_raw_events_ensure_partitions(first_at timestamptz, last_at timestamptz)
+returns integer language plpgsql as $$
+declare
+    month timestamp := date_trunc('month', first_at at time zone 'UTC');
+    partition_name text;
+    created integer := 0;
+begin
+    while month <= last_at at time zone 'UTC' loop
+        partition_name := 'reels_raw_events_p' || to_char(month, 'YYYY_MM');
+        if to_regclass(partition_name) is null then
+            execute format(
+                'create table %I partition of reels_raw_events for values from (%L) to (%L)',
+                partition_name, month at time zone 'UTC', (month + interval '1 month') at time zone 'UTC'
+            );
+            created := created + 1;
+        end if;
+        month := month + interval '1 month';
+    end loop;
+    return created;
+end
+$$;
+
+select reels_raw_events_ensure_partitions(now(), now() + interval '3 months');
+
+-- One row per reel and UTC day of raw events past RAW_EVENTS_RETENTION_DAYS (app/raw_event_retention.py).
+create table if not exists reels_daily_rollups (
+    reel_id text not null,
+    day date not null,
+    snapshots integer not null,
+    first_scraped_at timestamptz not null,
+    last_scraped_at timestamptz not null,
+    last_views integer not null,
+    min_views integer not null,
+    max_views integer not null,
+    last_likes integer not null,
+    min_likes integer not null,
+    max_likes integer not null,
+    last_comments integer not null,
+    min_comments integer not null,
+    max_comments integer not null,
+    last_shares_or_saves integer,
+    min_shares_or_saves integer,
+    max_shares_or_saves integer,
+    platform text not null,
+    reel_url text not null,
+    publish_time timestamptz not null,
+    creator_id text,
+    caption_text text,
+    audio_id text,
+    audio_name text,
+    duration_seconds double precision,
+    apify_run_id text not null,
+    source_surface text not null,
+    last_created_at timestamptz not null,
+    primary key (reel_id, day)
+);
+
+-- Raw events plus each rolled-up day as its last snapshot; rebuild_latest_state reads this.
+create or replace view reels_snapshot_history as
+select
+    reel_id, platform, reel_url, scraped_at, publish_time, views, likes, comments, shares_or_saves,
+    creator_id, caption_text, audio_id, audio_name, duration_seconds, apify_run_id, source_surface,
+    created_at, 'raw' as tier
+from reels_raw_events
+union all
+select
+    reel_id, platform, reel_url, last_scraped_at, publish_time, last_views, last_likes, last_comments,
+    last_shares_or_saves, creator_id, caption_text, audio_id, audio_name, duration_seconds, apify_run_id,
+    source_surface, last_created_at, 'daily' as tier
+from reels_daily_rollups;
 
 create table if not exists reels_latest_state (
     reel_id text primary key,
@@ -34,11 +109,145 @@ create table if not exists reels_latest_state (
     latest_comments integer not null,
     latest_shares_or_saves integer,
     latest_scraped_at timestamptz not null,
+    -- Counters of the snapshot before latest_scraped_at (momentum); null until a second scrape.
+    prev_views integer,
+    prev_scraped_at timestamptz,
+    creator_id text,
     caption_text text,
     audio_id text,
     audio_name text,
     duration_seconds double precision,
+    last_raw_event_at timestamptz,
     updated_at timestamptz default now()
 );
 
 create index if not exists ix_reels_latest_state_publish_time on reels_latest_state (publish_time);
+create index if not exists ix_reels_latest_state_creator_views on reels_latest_state (creator_id, latest_views desc);
+
+-- Running totals per creator over reels_latest_state, updated incrementally by ingestion.
+create table if not exists creator_aggregates (
+    creator_id text primary key,
+    platform text not null,
+    video_count integer not null default 0,
+    total_views bigint not null default 0,
+    updated_at timestamptz not null default now()
+);
+
+-- Sorted values of each ranked metric per 7d/30d/90d window (little-endian float8), refreshed after ingestion.
+create table if not exists cohort_distributions (
+    window_days smallint not null,
+    metric text not null,
+    reel_count integer not null,
+    sorted_values bytea not null,
+    computed_at timestamptz not null,
+    primary key (window_days, metric)
+);
+
+create table if not exists ingestion_runs (
+    id uuid primary key default gen_random_uuid(),
+    apify_run_id text,
+    platform text not null default 'instagram',
+    started_at timestamptz not null default now(),
+    finished_at timestamptz,
+    status text not null default 'running',
+    events_ingested integer not null default 0,
+    events_suppressed integer not null default 0,
+    items_received integer not null default 0,
+    items_mapped integer not null default 0,
+    items_dropped integer not null default 0,
+    response_bytes bigint not null default 0,
+    fetch_seconds double precision,
+    map_seconds double precision,
+    insert_raw_seconds double precision,
+    upsert_latest_seconds double precision,
+    retention_seconds double precision,
+    error_message text,
+    created_at timestamptz not null default now()
+);
+
+create index if not exists ix_ingestion_runs_started_at on ingestion_runs (started_at);
+
+-- Single row read by GET /ingest/status, maintained by ingestion (app/ingest_totals.py).
+create table if not exists ingest_totals (
+    id smallint primary key constraint ck_ingest_totals_single_row check (id = 1),
+    total_raw_events bigint not null default 0,
+    latest_state_count bigint not null default 0,
+    last_scraped_at timestamptz,
+    last_apify_run_id text,
+    events_last_run integer not null default 0,
+    reels_published_last_7d integer not null default 0,
+    published_counted_at timestamptz,
+    updated_at timestamptz not null default now()
+);
+
+insert into ingest_totals (id) values (1) on conflict (id) do nothing;
+
+create table if not exists rebuild_checkpoints (
+    job_name text primary key,
+    last_reel_id text,
+    touched_since timestamptz,
+    rows_rebuilt integer not null default 0,
+    started_at timestamptz not null default now(),
+    updated_at timestamptz not null default now(),
+    finished_at timestamptz
+);
+
+-- Used when PERFORMANCE_SOURCE=view; refreshed after each ingestion run and rebuild.
+drop materialized view if exists reels_performance_mv;
+
+create materialized view reels_performance_mv AS
+WITH cohort AS (
+    SELECT
+        s.*,
+        now() AS computed_at,
+        ((extract(epoch FROM now()) - extract(epoch FROM s.publish_time)) * 1000000)::bigint AS age_micros,
+        CASE WHEN s.prev_scraped_at IS NULL THEN 0 ELSE COALESCE(s.prev_views, 0) END AS base_views,
+        ((extract(epoch FROM s.latest_scraped_at) - extract(epoch FROM COALESCE(s.prev_scraped_at, s.publish_time)))
+            * 1000000)::bigint AS momentum_micros
+    FROM reels_latest_state s
+    WHERE s.publish_time >= now() - interval '7 days'
+), derived AS (
+    SELECT
+        c.*,
+        GREATEST(c.age_micros::float8 / 1000000 / 3600, 1::float8 / 60) AS hours_since_publish,
+        CASE
+            WHEN c.latest_views <> 0 THEN
+                (c.latest_likes::bigint + c.latest_comments + COALESCE(c.latest_shares_or_saves, 0))::float8
+                / c.latest_views
+            ELSE 0::float8
+        END AS engagement_rate,
+        GREATEST(c.latest_views - c.base_views, 0)::float8
+            / GREATEST(c.momentum_micros::float8 / 1000000 / 3600, 1::float8 / 60) AS momentum
+    FROM cohort c
+), rates AS (
+    SELECT d.*, d.latest_views::float8 / d.hours_since_publish AS views_per_hour, count(*) OVER () AS n
+    FROM derived d
+)
+SELECT
+    reel_id,
+    platform,
+    reel_url,
+    publish_time,
+    latest_scraped_at,
+    latest_views AS views,
+    latest_likes AS likes,
+    latest_comments AS comments,
+    latest_shares_or_saves AS shares_or_saves,
+    prev_views,
+    prev_scraped_at,
+    hours_since_publish,
+    views_per_hour,
+    engagement_rate,
+    CASE WHEN n = 1 THEN 100::float8
+        ELSE (count(*) OVER (ORDER BY latest_views) - 1)::float8 / (n - 1) * 100 END AS views_percentile,
+    CASE WHEN n = 1 THEN 100::float8
+        ELSE (count(*) OVER (ORDER BY views_per_hour) - 1)::float8 / (n - 1) * 100 END AS views_per_hour_percentile,
+    CASE WHEN n = 1 THEN 100::float8
+        ELSE (count(*) OVER (ORDER BY engagement_rate) - 1)::float8 / (n - 1) * 100 END AS engagement_rate_percentile,
+    momentum,
+    CASE WHEN n = 1 THEN 100::float8
+        ELSE (count(*) OVER (ORDER BY momentum) - 1)::float8 / (n - 1) * 100 END AS momentum_percentile,
+    computed_at
+FROM rates;
+
+create unique index if not exists ux_reels_performance_mv_reel_id on reels_performance_mv (reel_id);